@@ -0,0 +1,340 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from execution.paper import Fill
+from models.market import Market
+from models.symbol import Symbol
+from models.transaction import OperationEnum, Transaction
+from strategies.batch import positions_from_signals
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+
+class PerformanceReport:
+    # Arrays are aligned with `timestamps` (unix seconds); ratios are fractions, not percent
+    timestamps: np.ndarray
+    equity: np.ndarray  # starts at 1
+    value: np.ndarray  # in the quote asset for analyze_fills, the same as equity otherwise
+    returns: np.ndarray  # per period, after fees
+    total_return: float
+    annualized_return: float
+    sharpe: float
+    sortino: float
+    max_drawdown: float
+    trades: int  # round trips, including one still open at the end
+    win_rate: float
+    exposure: float  # average fraction of capital in positions
+    turnover: float  # traded value as a multiple of capital
+
+    def __init__(self, **fields) -> None:
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def summary(self) -> str:
+        return "\n".join([
+            f"Total return:      {self.total_return:10.2%}",
+            f"Annualized return: {self.annualized_return:10.2%}",
+            f"Sharpe:            {self.sharpe:10.2f}",
+            f"Sortino:           {self.sortino:10.2f}",
+            f"Max drawdown:      {self.max_drawdown:10.2%}",
+            f"Trades:            {self.trades:10d}",
+            f"Win rate:          {self.win_rate:10.2%}",
+            f"Exposure:          {self.exposure:10.2%}",
+            f"Turnover:          {self.turnover:10.2f}x",
+        ])
+
+    def __repr__(self) -> str:
+        return (
+            f"PerformanceReport(total_return={self.total_return:.4f}, sharpe={self.sharpe:.2f}, "
+            f"max_drawdown={self.max_drawdown:.4f}, trades={self.trades}, win_rate={self.win_rate:.2f})"
+        )
+
+
+# Long/flat positions (shape (symbols, n)) from BUY/SELL transactions; a transaction at a
+# timestamp takes effect at the first frame at or after it
+def positions_from_transactions(
+    timestamps: np.ndarray,
+    symbols: List[Symbol],
+    transactions: List[Transaction],
+) -> np.ndarray:
+    rows = {str(symbol): i for i, symbol in enumerate(symbols)}
+    signals = np.zeros((len(symbols), len(timestamps)), dtype=np.int8)
+
+    traded = [t for t in transactions if t.operation is not OperationEnum.SKIP and str(t.symbol) in rows]
+    if not traded:
+        return signals
+
+    row = np.array([rows[str(t.symbol)] for t in traded])
+    index = np.searchsorted(timestamps, [t.timestamp.timestamp() for t in traded])
+    value = np.array([1 if t.operation is OperationEnum.BUY else -1 for t in traded], dtype=np.int8)
+
+    inside = index < len(timestamps)
+    # Fancy assignment keeps the last write, so the latest transaction of a frame wins
+    signals[row[inside], index[inside]] = value[inside]
+
+    return np.stack([positions_from_signals(signal) for signal in signals]) if len(symbols) else signals
+
+
+# Long/flat positions (shape (symbols, n)) from a PaperBroker's fills: held from a BUY fill's
+# frame until a SELL fill empties the position. Partially filled BUYs are held; partially
+# filled SELLs still are.
+def positions_from_fills(
+    timestamps: np.ndarray,
+    symbols: List[Symbol],
+    fills: List[Fill],
+) -> np.ndarray:
+    rows = {str(symbol): i for i, symbol in enumerate(symbols)}
+    signals = np.zeros((len(symbols), len(timestamps)), dtype=np.int8)
+
+    filled = [f for f in fills if str(f.symbol) in rows]
+    if not filled:
+        return signals
+
+    row = np.array([rows[str(f.symbol)] for f in filled])
+    index = np.searchsorted(timestamps, [f.timestamp.timestamp() for f in filled])
+    value = np.array([
+        1 if f.operation is OperationEnum.BUY or f.remaining > 0 else -1
+        for f in filled
+    ], dtype=np.int8)
+
+    inside = index < len(timestamps)
+    signals[row[inside], index[inside]] = value[inside]
+
+    return np.stack([positions_from_signals(signal) for signal in signals])
+
+
+# Last known close at every index (NaN before the first one), per symbol
+def forward_fill(closes: np.ndarray) -> np.ndarray:
+    missing = np.isnan(closes)
+    if not missing.any():
+        return closes
+    last = np.maximum.accumulate(np.where(missing, -1, np.arange(closes.shape[-1])), axis=-1)
+    filled = np.take_along_axis(closes, np.maximum(last, 0), axis=-1)
+    filled[last < 0] = np.nan
+    return filled
+
+
+# Equal-weight long/flat portfolio over all symbols: each position earns the next
+# close-to-close return and pays `fee` on every entry and exit. Missing candles (NaN)
+# earn nothing; the move across them is earned at the next present close.
+# Returns (per-period portfolio returns, position changes per symbol and period).
+def portfolio_returns(closes: np.ndarray, positions: np.ndarray, fee: float) -> Tuple[np.ndarray, np.ndarray]:
+    closes = forward_fill(closes)
+    returns = np.zeros_like(closes, dtype=np.float64)
+    returns[:, 1:] = closes[:, 1:] / closes[:, :-1] - 1
+    returns[~np.isfinite(returns)] = 0.0  # before a symbol's first candle
+
+    held = np.zeros_like(positions)
+    held[:, 1:] = positions[:, :-1]
+    changes = np.abs(np.diff(positions, axis=1, prepend=0))
+
+    if len(closes) == 0:
+        return np.zeros(closes.shape[1]), changes  # no symbols: nothing earned or paid
+    return (held * returns - fee * changes).mean(axis=0), changes
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    if len(equity) == 0:
+        return 0.0
+    return float((1 - equity / np.maximum.accumulate(equity)).max())
+
+
+# Return of every round trip per symbol, from the close it was entered at to the close it
+# was left at (or the last close), after fees on both sides
+def trade_returns(closes: np.ndarray, positions: np.ndarray, fee: float) -> np.ndarray:
+    results: List[np.ndarray] = []
+    for symbol_closes, position in zip(forward_fill(closes), positions):
+        change = np.diff(position.astype(np.int8), prepend=0, append=0)
+        entries = np.flatnonzero(change[:-1] > 0)
+        # Left at the close of the frame the position drops to 0, or the last one if still open
+        exits = np.minimum(np.flatnonzero(change < 0), len(position) - 1)
+        results.append(symbol_closes[exits] / symbol_closes[entries] * (1 - fee) ** 2 - 1)
+    return np.concatenate(results) if results else np.zeros(0)
+
+
+def _periods_per_year(timestamps: np.ndarray) -> float:
+    step = float(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 0.0
+    return SECONDS_PER_YEAR / step if step > 0 else 1.0
+
+
+# Return, risk and drawdown of per-period returns; the trade statistics are passed in
+def _report(
+    timestamps: np.ndarray,
+    returns: np.ndarray,
+    trades: np.ndarray,
+    exposure: float,
+    turnover: float,
+    periods_per_year: float,
+    value: Optional[np.ndarray]=None,
+) -> PerformanceReport:
+    equity = np.cumprod(1 + returns)
+    total_return = float(equity[-1] - 1) if len(equity) else 0.0
+
+    mean = float(returns.mean()) if len(returns) else 0.0
+    std = float(returns.std()) if len(returns) else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(returns, 0) ** 2))) if len(returns) else 0.0
+    years = len(returns) / periods_per_year
+    annualized_return = -1.0
+    if years > 0 and total_return > -1:
+        # Short runs compound to more than a float holds; that's inf rather than an error
+        with np.errstate(over="ignore"):
+            annualized_return = float(np.expm1(np.log1p(total_return) / years))
+
+    return PerformanceReport(
+        timestamps=timestamps,
+        equity=equity,
+        value=value if value is not None else equity,
+        returns=returns,
+        total_return=total_return,
+        annualized_return=annualized_return,
+        sharpe=float(mean / std * np.sqrt(periods_per_year)) if std > 0 else 0.0,
+        sortino=float(mean / downside * np.sqrt(periods_per_year)) if downside > 0 else 0.0,
+        max_drawdown=max_drawdown(equity),
+        trades=len(trades),
+        win_rate=float((trades > 0).mean()) if len(trades) else 0.0,
+        exposure=exposure,
+        turnover=turnover,
+    )
+
+
+def analyze(
+    timestamps: np.ndarray,
+    closes: np.ndarray,
+    positions: np.ndarray,
+    fee=0.00075,
+    periods_per_year: Optional[float]=None,
+) -> PerformanceReport:
+    returns, changes = portfolio_returns(closes, positions, fee)
+    return _report(
+        timestamps,
+        returns,
+        trade_returns(closes, positions, fee),
+        exposure=float(positions.mean()) if positions.size else 0.0,
+        turnover=float(changes.sum() / len(positions)) if len(positions) else 0.0,
+        periods_per_year=periods_per_year or _periods_per_year(timestamps),
+    )
+
+
+# Closes of the symbols the market has (shape (symbols, n)), and those symbols
+def _market_closes(market: Market, symbols: List[Symbol]) -> Tuple[np.ndarray, np.ndarray, List[Symbol]]:
+    columns = market.columns()
+    timestamps = columns.timestamps()
+    # Symbols the market never saw have no closes to value them at
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if columns.has_symbol(symbol)]
+    closes = np.stack([columns.column(symbol, "close") for symbol in symbols]) if symbols else np.zeros((0, len(timestamps)))
+    return timestamps, closes, symbols
+
+
+# Performance of the transactions over the market's closes (e.g. a backtest's resulting market)
+def analyze_market(
+    market: Market,
+    transactions: List[Transaction],
+    symbols: List[Symbol],
+    fee=0.00075,
+    periods_per_year: Optional[float]=None,
+) -> PerformanceReport:
+    timestamps, closes, symbols = _market_closes(market, symbols)
+    positions = positions_from_transactions(timestamps, symbols, transactions)
+    return analyze(timestamps, closes, positions, fee=fee, periods_per_year=periods_per_year)
+
+
+# Balances per asset (shape (assets, n)) after each frame's fills, replayed from `balances`
+# the way PaperBroker applied them; a fill belongs to the frame at its timestamp
+def balances_from_fills(
+    timestamps: np.ndarray,
+    fills: List[Fill],
+    balances: Dict[str, float],
+) -> Tuple[List[str], np.ndarray]:
+    assets = list(dict.fromkeys(list(balances) + [asset for f in fills for asset in (f.symbol.a, f.symbol.b)]))
+    rows = {asset: i for i, asset in enumerate(assets)}
+    changes = np.zeros((len(assets), len(timestamps)))
+
+    if len(timestamps):
+        index = np.minimum(np.searchsorted(timestamps, [f.timestamp.timestamp() for f in fills]), len(timestamps) - 1)
+        for i, f in zip(index.tolist(), fills):
+            notional = f.quantity * f.price
+            if f.operation is OperationEnum.BUY:
+                changes[rows[f.symbol.a], i] += f.quantity
+                changes[rows[f.symbol.b], i] -= notional + f.fee
+            else:
+                changes[rows[f.symbol.a], i] -= f.quantity
+                changes[rows[f.symbol.b], i] += notional - f.fee
+
+    starting = np.array([balances.get(asset, 0.0) for asset in assets])
+    return assets, starting[:, None] + np.cumsum(changes, axis=1)
+
+
+# Return of every round trip per pair, from the fills' prices and fees: a trip starts with
+# a BUY fill from a flat position and ends when SELL fills flatten it again. Trips still
+# open are valued at `prices`.
+def fill_trade_returns(fills: List[Fill], prices: Dict[str, float]) -> np.ndarray:
+    trips: Dict[str, List[float]] = {}  # pair -> [held, cost, proceeds]
+    results: List[float] = []
+
+    for f in fills:
+        key = str(f.symbol)
+        trip = trips.setdefault(key, [0.0, 0.0, 0.0])
+        if f.operation is OperationEnum.BUY:
+            trip[0] += f.quantity
+            trip[1] += f.quantity * f.price + f.fee
+        else:
+            trip[0] -= f.quantity
+            trip[2] += f.quantity * f.price - f.fee
+        if trip[0] <= 0 and trip[1] > 0:
+            results.append(trip[2] / trip[1] - 1)
+            del trips[key]
+
+    for key, (held, cost, proceeds) in trips.items():
+        price = prices.get(key)
+        if cost > 0 and price is not None:
+            results.append((proceeds + held * price) / cost - 1)
+
+    return np.array(results)
+
+
+# Performance of what a PaperBroker actually filled, rather than what the strategy asked for:
+# the broker's cash and positions, replayed from `balances` (the wallet's starting balances),
+# are marked to market in `quote` at every frame's closes. Like Portfolio.equity, assets
+# without a <asset>/<quote> close (yet) are left out.
+def analyze_fills(
+    market: Market,
+    fills: List[Fill],
+    balances: Dict[str, float],
+    quote: str,
+    periods_per_year: Optional[float]=None,
+) -> PerformanceReport:
+    columns = market.columns()
+    timestamps = columns.timestamps()
+    assets, held = balances_from_fills(timestamps, fills, balances)
+
+    cash = held[assets.index(quote)] if quote in assets else np.zeros(len(timestamps))
+    value = cash.copy()
+    prices: Dict[str, float] = {}
+    for asset, amounts in zip(assets, held):
+        key = f"{asset}/{quote}"
+        if asset == quote or not columns.has_symbol(key):
+            continue
+        closes = forward_fill(columns.column(key, "close"))
+        value += np.where(np.isnan(closes), 0.0, amounts * closes)
+        if len(closes) and not np.isnan(closes[-1]):
+            prices[key] = float(closes[-1])
+
+    returns = np.zeros(len(value))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = value[1:] / value[:-1] - 1
+        exposure = np.where(value > 0, 1 - cash / value, 0.0)
+    returns[~np.isfinite(returns)] = 0.0  # nothing to value yet, or everything was lost
+
+    traded = [f for f in fills if f.symbol.b == quote]
+    notional = sum(f.quantity * f.price for f in traded)
+
+    return _report(
+        timestamps,
+        returns,
+        fill_trade_returns(traded, prices),
+        exposure=float(exposure.mean()) if len(exposure) else 0.0,
+        turnover=float(notional / value[0]) if len(value) and value[0] > 0 else 0.0,
+        periods_per_year=periods_per_year or _periods_per_year(timestamps),
+        value=value,
+    )
@@ -2,18 +2,33 @@ import asyncio
 import typing
 import dotenv
 import os
-from typing import List
+from typing import Dict, List
 from datetime import datetime
 import plotly.graph_objects as go
 
+from analytics.performance import analyze_fills
+from execution.paper import PaperBroker
+from metrics.registry import default_registry
+from metrics.sinks import PrometheusTextSink
 from models.transaction import Transaction
 from timers.interval import IntervalTimer
 from timers.backtest import BacktestTimer
+from timers.stream import StreamTimer
 from providers.provider import Provider
+from providers.caching import CachingProvider
 from providers.ccxt import CCXTProvider
 from providers.mock_crypto import MockCryptoProvider
+from providers.session import SharedSession
+from providers.shared import SharedProvider
+from providers.stream import StreamingProvider
 from strategies.average_crossover import AverageCrossover
+from strategies.strategy import Strategy
+from strategies.batch import run_batch, transactions_from_signals
+from strategies.runtime import StrategyRuntime
+from sweeps.grid import results_table, run_sweep
 from models.symbol import Pair
+from wallets.mock_wallet import MockWallet
+from models.journal import OutputJournal
 from models.market import FunctionPlot, Log, Market
 
 dotenv.load_dotenv()
@@ -22,35 +37,51 @@ API_KEY = typing.cast(str, os.getenv("BINANCE_API_KEY"))
 API_SECRET = typing.cast(str, os.getenv("BINANCE_API_SECRET"))
 
 TIMEFRAME_MINUTES = 30
+STARTING_BALANCES = {"USDT": 1000.0, "USDC": 1000.0}
 SINCE = datetime(day=7, month=9, year=2024)
 UNTIL = datetime(day=1, month=10, year=2024)
 PAIRS: List[Pair] = [
-    Pair(a="BTC", b="USDT"),
-    Pair(a="BTC", b="USDC"),
-    Pair(a="BTC", b="USDC"),
-    Pair(a="ETH", b="USDT"),
-    Pair(a="ETH", b="USDC"),
-    Pair(a="BNB", b="USDT"),
-    Pair(a="ADA", b="USDT"),
-    Pair(a="SOL", b="USDT"),
-    Pair(a="XRP", b="USDT"),
+    Pair.of("BTC", "USDT"),
+    Pair.of("BTC", "USDC"),
+    Pair.of("BTC", "USDC"),
+    Pair.of("ETH", "USDT"),
+    Pair.of("ETH", "USDC"),
+    Pair.of("BNB", "USDT"),
+    Pair.of("ADA", "USDT"),
+    Pair.of("SOL", "USDT"),
+    Pair.of("XRP", "USDT"),
 ]
-FILENAME = f"/home/apisula/Documents/traderbot/data/{SINCE.day}-{SINCE.month}-{SINCE.year}_{UNTIL.day}-{UNTIL.month}-{UNTIL.year}_{TIMEFRAME_MINUTES}m"
-PLOT_FILENAME = f"/home/apisula/Documents/traderbot/plots/{SINCE.day}-{SINCE.month}-{SINCE.year}_{UNTIL.day}-{UNTIL.month}-{UNTIL.year}_{TIMEFRAME_MINUTES}m_plot"
+DATA_DIRECTORY = os.getenv("TRADERBOT_DATA_DIR", "/home/apisula/Documents/traderbot")
+FILENAME = f"{DATA_DIRECTORY}/data/{SINCE.day}-{SINCE.month}-{SINCE.year}_{UNTIL.day}-{UNTIL.month}-{UNTIL.year}_{TIMEFRAME_MINUTES}m"
+BINARY_FILENAME = f"{FILENAME}.mkt"
+CACHE_FILENAME = f"{DATA_DIRECTORY}/data/candles.db"
+METRICS_FILENAME = f"{DATA_DIRECTORY}/metrics/traderbot.prom"
+JOURNAL_DIRECTORY = f"{DATA_DIRECTORY}/journal"
+PLOT_FILENAME = f"{DATA_DIRECTORY}/plots/{SINCE.day}-{SINCE.month}-{SINCE.year}_{UNTIL.day}-{UNTIL.month}-{UNTIL.year}_{TIMEFRAME_MINUTES}m_plot"
+
+# Prefers the memory-mapped market file (see scripts/convert_market_data.py) over the CSV directory
+def load_history() -> Market:
+    market = Market(columnar=True)
+    if os.path.exists(BINARY_FILENAME):
+        market.import_from_file(BINARY_FILENAME, format="bin")
+    else:
+        market.import_from_file(FILENAME)
+    return market
 
 async def fetch_data():
-    ce = CCXTProvider(apikey=API_KEY, secret=API_SECRET)
-    try:
-        market = await ce.get_history(PAIRS, since=SINCE, until=UNTIL, timeframe_minutes=TIMEFRAME_MINUTES)
-        market.save_to_file(FILENAME)
-    finally:
-        await ce._exchange.close()
+    async with CCXTProvider(apikey=API_KEY, secret=API_SECRET) as ce:
+        cache = CachingProvider(ce, CACHE_FILENAME)
+        try:
+            market = await cache.get_history(PAIRS, since=SINCE, until=UNTIL, timeframe_minutes=TIMEFRAME_MINUTES)
+            market.save_to_file(FILENAME)
+        finally:
+            cache.close()
 
 async def import_from_file():
     m = Market()
     m.import_from_file(FILENAME)
 
-    p = Pair(a="ETH", b="USDC")
+    p = Pair.of("ETH", "USDC")
     f = m.plot_for_symbol(p, display=False)
 
     ohlcv = m.get_all_symbol_data(p)
@@ -69,10 +100,9 @@ async def import_from_file():
 async def backtest():
     provider: Provider
 
-    history_market = Market()
-    history_market.import_from_file(FILENAME)
+    history_market = load_history()
 
-    resulting_market = Market()
+    resulting_market = Market(columnar=True)
 
     STARTING_INDEX = 0
 
@@ -80,11 +110,10 @@ async def backtest():
         market=history_market,
         starting_index=STARTING_INDEX,
     )
-    timer = BacktestTimer(
-        market=history_market,
-        provider=provider,
-        starting_index=STARTING_INDEX
-    )
+    # Shares the provider's cursor and advances it after every frame
+    timer = BacktestTimer(provider=provider)
+    wallet = MockWallet(STARTING_BALANCES)
+    broker = PaperBroker(wallet, fee=0.00075, order_size=1 / len(set(PAIRS)))
     strategy = AverageCrossover(
         provider=provider,
         symbols=PAIRS,
@@ -92,6 +121,7 @@ async def backtest():
         fma_window=10,
         timeframe_minutes=TIMEFRAME_MINUTES,
         jitter=0.0005,
+        portfolio=broker.portfolio,
     )
 
     all_transactions: List[Transaction] = []
@@ -101,39 +131,24 @@ async def backtest():
     async for frame in timer:
         output_frame = await strategy.execute(frame)
         resulting_market.add_frame((frame, output_frame))
+        broker.execute(frame, output_frame.transactions)
 
         all_transactions += output_frame.transactions
         all_logs += output_frame.logs
         all_function_plots += output_frame.function_plots
 
-        provider.tick()
-        timer.tick()
-
     # for p in PAIRS:
-    p = Pair(a="BTC", b="USDT")
-    figure = resulting_market.plot_for_symbol(p, display=False, include_function_plots=False)
-
-    fma_x: List[datetime] = []
-    fma_y: List[float] = []
-    sma_x: List[datetime] = []
-    sma_y: List[float] = []
-
-    for function_plot in all_function_plots:
-        if function_plot.label == f"{p} FMA":
-            fma_x.append(function_plot.timestamp)
-            fma_y.append(function_plot.value)
-        elif function_plot.label == f"{p} SMA":
-            sma_x.append(function_plot.timestamp)
-            sma_y.append(function_plot.value)
-
-    figure.add_trace(go.Scatter(x=fma_x, y=fma_y, name="FMA", line=go.scatter.Line(color="blue")))
-    figure.add_trace(go.Scatter(x=sma_x, y=sma_y, name="SMA", line=go.scatter.Line(color="purple")))
-
-    for transaction in all_transactions:
-        if transaction.symbol != p:
+    p = Pair.of("BTC", "USDT")
+    os.makedirs(PLOT_FILENAME, exist_ok=True)
+    img_path = os.path.join(PLOT_FILENAME, f"{str(p).replace('/', '-')}.html")
+    figure = resulting_market.plot_for_symbol(p, display=False, filename=img_path)
+    print(f"Saved plot to {img_path}")
+
+    for fill in broker.fills:
+        if fill.symbol != p:
             continue
 
-        print(f"{transaction.symbol}: {transaction.operation} at {transaction.timestamp} (note: {transaction.notes})")
+        print(f"{fill.symbol}: {fill.operation.value} {fill.quantity:.6f} at {fill.price:.2f} on {fill.timestamp} (fee {fill.fee:.4f})")
         # figure.add_vline(
         #     x=transaction.timestamp.timestamp() * 1000,
         #     line_width=1,
@@ -142,29 +157,23 @@ async def backtest():
         #     annotation_align="left",
         # )
 
-    figure.show()
-
-    # if not os.path.exists(PLOT_FILENAME):
-    #     os.makedirs(PLOT_FILENAME)
+    print(f"{len(broker.fills)} fills, fees paid: {broker.fees_paid}")
+    print(f"Balances: {wallet.balances}")
+    for quote, starting in STARTING_BALANCES.items():
+        print(f"Equity in {quote}: {broker.portfolio.equity(quote):.2f} (started with {starting:.2f})")
+        print(analyze_fills(resulting_market, broker.fills, STARTING_BALANCES, quote).summary())
 
-    # img_bytes = figure.to_image(format="png", width=3840, height=2160)
-    # img = Image(img_bytes)
-    # figure.write_image(os.path.join(PLOT_FILENAME, f"{str(p).replace("/", "-")}.png"))
-    # img_path = os.path.join(PLOT_FILENAME, f"{str(p).replace('/', '-')}.png")
-    # with open(img_path, "wb") as f:
-    #     f.write(img_bytes)
-    #     print(f"Saved plot to {img_path}")
+    figure.show()
 
 
+async def backtest_vectorized():
+    history_market = load_history()
 
-async def main():
-    provider: Provider
+    STARTING_INDEX = 0
 
-    provider = CCXTProvider(apikey=API_KEY, secret=API_SECRET)
-    timer = IntervalTimer(
-        provider=provider,
-        symbols=PAIRS,
-        timeframe_minutes=TIMEFRAME_MINUTES,
+    provider = MockCryptoProvider(
+        market=history_market,
+        starting_index=STARTING_INDEX,
     )
     strategy = AverageCrossover(
         provider=provider,
@@ -172,13 +181,119 @@ async def main():
         sma_window=50,
         fma_window=10,
         timeframe_minutes=TIMEFRAME_MINUTES,
-        jitter=0.001,
+        jitter=0.0005,
     )
 
-    async for frame in timer:
-        transactions, logs, function_plots = await strategy.execute(frame)
-        for transaction in transactions:
-            print(transaction)
+    signals = await run_batch(
+        strategy,
+        provider,
+        history_market,
+        PAIRS,
+        starting_index=STARTING_INDEX,
+        timeframe_minutes=TIMEFRAME_MINUTES,
+    )
+    timestamps = history_market.columns().timestamps()[STARTING_INDEX:]
+
+    for transaction in transactions_from_signals(timestamps, signals):
+        print(f"{transaction.symbol}: {transaction.operation} at {transaction.timestamp} (note: {transaction.notes})")
+
+def sweep():
+    history_market = load_history()
+
+    results = run_sweep(
+        history_market,
+        PAIRS,
+        grid={
+            "sma_window": [20, 30, 50, 80, 120],
+            "fma_window": [5, 10, 15, 20],
+            "jitter": [0.0, 0.0005, 0.001, 0.005],
+            "transaction_cost": [0.00075],
+            "timeframe_minutes": [TIMEFRAME_MINUTES],
+        },
+    )
+
+    print(results_table(results))
+
+
+async def main():
+    # Latency histograms and counters from the timer, provider and strategy, rewritten every 10s
+    os.makedirs(os.path.dirname(METRICS_FILENAME), exist_ok=True)
+    default_registry.add_sink(PrometheusTextSink(METRICS_FILENAME))
+
+    session = SharedSession()
+
+    async with CCXTProvider(apikey=API_KEY, secret=API_SECRET, session=session) as provider:
+        timer = IntervalTimer(
+            provider=provider,
+            symbols=PAIRS,
+            timeframe_minutes=TIMEFRAME_MINUTES,
+        )
+        strategy = AverageCrossover(
+            provider=provider,
+            symbols=PAIRS,
+            sma_window=50,
+            fma_window=10,
+            timeframe_minutes=TIMEFRAME_MINUTES,
+            jitter=0.001,
+        )
+
+        with OutputJournal(JOURNAL_DIRECTORY) as journal:
+            async for frame in timer:
+                output_frame = await strategy.execute(frame)
+                journal.append(frame, output_frame)
+                for transaction in output_frame.transactions:
+                    print(transaction)
+
+async def main_multi():
+    async with CCXTProvider(apikey=API_KEY, secret=API_SECRET) as ccxt_provider:
+        provider = SharedProvider(ccxt_provider)
+        timer = IntervalTimer(
+            provider=ccxt_provider,
+            symbols=PAIRS,
+            timeframe_minutes=TIMEFRAME_MINUTES,
+        )
+        strategies: Dict[str, Strategy] = {
+            f"{pair} {fma_window}/{sma_window}": AverageCrossover(
+                provider=provider,
+                symbols=[pair],
+                sma_window=sma_window,
+                fma_window=fma_window,
+                timeframe_minutes=TIMEFRAME_MINUTES,
+                jitter=0.001,
+            )
+            for pair in PAIRS
+            for fma_window, sma_window in [(5, 20), (10, 50), (20, 100)]
+        }
+        runtime = StrategyRuntime(timer, strategies, budget_seconds=10.0)
+
+        async for frame, outputs in runtime:
+            for name, output_frame in outputs.items():
+                for transaction in output_frame.transactions:
+                    print(f"[{name}] {transaction}")
+
+async def main_stream():
+    async with CCXTProvider(apikey=API_KEY, secret=API_SECRET) as history_provider:
+        async with StreamingProvider(
+            symbols=PAIRS,
+            timeframe_minutes=TIMEFRAME_MINUTES,
+            apikey=API_KEY,
+            secret=API_SECRET,
+            history_provider=history_provider,
+        ) as provider:
+            timer = StreamTimer(provider)
+            strategy = AverageCrossover(
+                provider=provider,
+                symbols=PAIRS,
+                sma_window=50,
+                fma_window=10,
+                timeframe_minutes=TIMEFRAME_MINUTES,
+                jitter=0.001,
+            )
+
+            async for frame in timer:
+                output_frame = await strategy.execute(frame)
+                for transaction in output_frame.transactions:
+                    print(transaction)
 
 # async def fetch_market_data():
 #     dotenv.load_dotenv()
@@ -215,5 +330,7 @@ async def main():
 
 if __name__ == "__main__":
     asyncio.run(backtest())
+    # asyncio.run(backtest_vectorized())
+    # sweep()
     # asyncio.run(import_from_file())
     # asyncio.run(fetch_data())
\ No newline at end of file
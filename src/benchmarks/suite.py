@@ -0,0 +1,222 @@
+import asyncio
+import json
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+from os import path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import synthetic_market, synthetic_symbols
+from models.market import Market
+from providers.mock_crypto import MockCryptoProvider
+from strategies.average_crossover import AverageCrossover
+from timers.backtest import BacktestTimer
+
+
+class BenchmarkResult:
+    name: str
+    seconds: float
+    candles: int
+    peak_rss_mib: float
+
+    def __init__(self, name: str, seconds: float, candles: int, peak_rss_mib: float) -> None:
+        self.name = name
+        self.seconds = seconds
+        self.candles = candles
+        self.peak_rss_mib = peak_rss_mib
+
+    @property
+    def candles_per_second(self) -> float:
+        return self.candles / self.seconds if self.seconds > 0 else float("inf")
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "seconds": self.seconds,
+            "candles": self.candles,
+            "candles_per_second": self.candles_per_second,
+            "peak_rss_mib": self.peak_rss_mib,
+        }
+
+
+# A case gets the generated market and a scratch directory and returns the work to time,
+# which in turn returns how many candles it processed. Anything done before returning
+# the work (writing input files, ...) isn't timed.
+Case = Callable[[Market, str], Callable[[], int]]
+
+
+def candle_count(market: Market) -> int:
+    columns = market.columns()
+    return len(columns) * len(columns.symbols())
+
+
+def save_csv(market: Market, scratch: str) -> Callable[[], int]:
+    def run() -> int:
+        market.save_to_file(path.join(scratch, "csv"))
+        return candle_count(market)
+    return run
+
+
+def import_csv(market: Market, scratch: str) -> Callable[[], int]:
+    market.save_to_file(path.join(scratch, "csv"))
+
+    def run() -> int:
+        imported = Market(columnar=True)
+        imported.import_from_file(path.join(scratch, "csv"))
+        return candle_count(imported)
+    return run
+
+
+def save_bin(market: Market, scratch: str) -> Callable[[], int]:
+    def run() -> int:
+        market.save_to_file(path.join(scratch, "market.mkt"), format="bin")
+        return candle_count(market)
+    return run
+
+
+def import_bin(market: Market, scratch: str) -> Callable[[], int]:
+    market.save_to_file(path.join(scratch, "market.mkt"), format="bin")
+
+    def run() -> int:
+        imported = Market(columnar=True)
+        imported.import_from_file(path.join(scratch, "market.mkt"), format="bin")
+        # Touch every value so the memory map is actually read
+        columns = imported.columns()
+        for symbol in columns.symbols():
+            columns.ohlcv(symbol).sum()
+        return candle_count(imported)
+    return run
+
+
+def get_all_symbol_data(market: Market, scratch: str) -> Callable[[], int]:
+    def run() -> int:
+        candles = 0
+        for symbol in synthetic_symbols(len(market.columns().symbols())):
+            candles += len(market.get_all_symbol_data(symbol))
+        return candles
+    return run
+
+
+def backtest(market: Market, scratch: str) -> Callable[[], int]:
+    symbols = synthetic_symbols(len(market.columns().symbols()))
+
+    async def loop() -> int:
+        provider = MockCryptoProvider(market=market, starting_index=0)
+        timer = BacktestTimer(provider=provider)
+        strategy = AverageCrossover(provider=provider, symbols=symbols, sma_window=50, fma_window=10, jitter=0.0005)
+        resulting_market = Market()
+
+        frames = 0
+        async for frame in timer:
+            output_frame = await strategy.execute(frame)
+            resulting_market.add_frame((frame, output_frame))
+            frames += 1
+
+        return frames * len(symbols)
+
+    return lambda: asyncio.run(loop())
+
+
+def plot_for_symbol(market: Market, scratch: str) -> Callable[[], int]:
+    symbol = synthetic_symbols(1)[0]
+
+    def run() -> int:
+        market.plot_for_symbol(symbol, display=False)
+        return len(market.columns())
+    return run
+
+
+CASES: Dict[str, Case] = {
+    "save_csv": save_csv,
+    "import_csv": import_csv,
+    "save_bin": save_bin,
+    "import_bin": import_bin,
+    "get_all_symbol_data": get_all_symbol_data,
+    "backtest": backtest,
+    "plot_for_symbol": plot_for_symbol,
+}
+
+
+def peak_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def _run_case(name: str, symbols: int, candles: int, seed: int, repeat: int) -> Tuple[float, int, float]:
+    scratch = tempfile.mkdtemp(prefix="traderbot-bench-")
+    try:
+        market = synthetic_market(symbols, candles, seed=seed)
+        work = CASES[name](market, scratch)
+
+        # Best of `repeat` runs, to keep scheduler noise out of the comparison
+        best = float("inf")
+        processed = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            processed = work()
+            best = min(best, time.perf_counter() - start)
+
+        return best, processed, peak_rss_mib()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+# Every case runs in a fresh process so the peak RSS reported is that case's alone
+def run_suite(symbols: int, candles: int, seed=0, cases: Optional[List[str]]=None, repeat=3) -> List[BenchmarkResult]:
+    context = multiprocessing.get_context("spawn")
+    results: List[BenchmarkResult] = []
+
+    for name in cases or list(CASES):
+        with context.Pool(1) as pool:
+            seconds, processed, rss = pool.apply(_run_case, (name, symbols, candles, seed, repeat))
+        results.append(BenchmarkResult(name, seconds, processed, rss))
+        print(
+            f"{name:<22} {seconds:9.3f}s  {results[-1].candles_per_second:14,.0f} candles/s  "
+            f"{rss:9.1f} MiB peak RSS"
+        )
+
+    return results
+
+
+def save_baseline(filename: str, results: List[BenchmarkResult], symbols: int, candles: int, seed: int) -> None:
+    with open(filename, "w") as f:
+        json.dump(
+            {
+                "symbols": symbols,
+                "candles": candles,
+                "seed": seed,
+                "results": {result.name: result.to_dict() for result in results},
+            },
+            f,
+            indent=2,
+        )
+
+
+# Returns a line per regression: throughput more than `tolerance` below the baseline or
+# peak RSS more than `tolerance` above it
+def compare_to_baseline(filename: str, results: List[BenchmarkResult], symbols: int, candles: int, tolerance=0.1) -> List[str]:
+    with open(filename, "r") as f:
+        baseline = json.load(f)
+
+    if baseline["symbols"] != symbols or baseline["candles"] != candles:
+        raise Exception(
+            f"Baseline was recorded for {baseline['symbols']} symbols x {baseline['candles']} candles, "
+            f"not {symbols} x {candles}"
+        )
+
+    regressions: List[str] = []
+    for result in results:
+        previous = baseline["results"].get(result.name)
+        if previous is None:
+            continue
+
+        throughput = result.candles_per_second / previous["candles_per_second"] - 1
+        rss = result.peak_rss_mib / previous["peak_rss_mib"] - 1
+        print(f"{result.name:<22} throughput {throughput:+8.1%}  peak RSS {rss:+8.1%}")
+
+        if throughput < -tolerance:
+            regressions.append(f"{result.name}: throughput {throughput:+.1%}")
+        if rss > tolerance:
+            regressions.append(f"{result.name}: peak RSS {rss:+.1%}")
+
+    return regressions
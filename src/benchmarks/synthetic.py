@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import List
+
+import numpy as np
+
+from models.columnar import FIELDS, MarketColumns, to_epoch_seconds
+from models.market import Market
+from models.symbol import Pair
+
+START = datetime(year=2024, month=1, day=1)
+
+
+def synthetic_symbols(count: int) -> List[Pair]:
+    return [Pair.of(f"SYN{i}", "USDT") for i in range(count)]
+
+
+# Geometric brownian motion closes with wicks and lognormal volume. Every symbol draws
+# from its own seed stream, so a symbol's candles don't depend on how many symbols
+# are generated alongside it.
+def synthetic_columns(
+    symbols: int,
+    candles: int,
+    seed=0,
+    timeframe_minutes=1,
+    start: datetime=START,
+    drift=0.0,
+    volatility=0.001,
+) -> MarketColumns:
+    step = timeframe_minutes * 60
+    first = to_epoch_seconds(start) // step * step
+    timestamps = first + np.arange(candles, dtype=np.int64) * step
+
+    data = {}
+    for pair, sequence in zip(synthetic_symbols(symbols), np.random.SeedSequence(seed).spawn(symbols)):
+        rng = np.random.default_rng(sequence)
+        price = 10.0 ** rng.uniform(-1, 4)
+
+        returns = (drift - volatility**2 / 2) + volatility * rng.standard_normal(candles)
+        close = price * np.exp(np.cumsum(returns))
+        open_ = np.empty(candles)
+        open_[0] = price
+        open_[1:] = close[:-1]
+
+        wicks = np.abs(rng.standard_normal((2, candles))) * volatility / 2
+        high = np.maximum(open_, close) * (1 + wicks[0])
+        low = np.minimum(open_, close) * (1 - wicks[1])
+        volume = rng.lognormal(mean=3.0, sigma=1.0, size=candles)
+
+        block = np.empty((len(FIELDS), candles))
+        block[0], block[1], block[2], block[3], block[4] = open_, high, low, close, volume
+        data[str(pair)] = block
+
+    columns = MarketColumns()
+    columns.append_rows(timestamps, data)
+    return columns
+
+
+def synthetic_market(symbols: int, candles: int, seed=0, timeframe_minutes=1) -> Market:
+    return Market.from_columns(synthetic_columns(symbols, candles, seed=seed, timeframe_minutes=timeframe_minutes))
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models.market import MarketFrame, OHLCV
+from models.symbol import Pair, Symbol
+from models.transaction import OperationEnum, Transaction
+from wallets.mock_wallet import MockWallet
+
+
+@dataclass(slots=True)
+class Fill:
+    timestamp: datetime
+    symbol: Symbol
+    operation: OperationEnum
+    quantity: float  # base asset
+    price: float  # quote per base, slippage included
+    fee: float  # quote asset
+    remaining: float  # base quantity of the order still unfilled after this fill
+
+
+@dataclass(slots=True)
+class Order:
+    pair: Pair
+    operation: OperationEnum
+    remaining: Optional[float] = None  # base quantity, sized on the first fill
+
+
+class Portfolio:
+    # Read-only view of the broker's state valued at the last seen closes, for strategies
+    _wallet: MockWallet
+    _prices: Dict[str, float]
+    _positions: Dict[str, float]
+    _orders: Dict[str, Order]
+
+    def __init__(
+        self,
+        wallet: MockWallet,
+        prices: Dict[str, float],
+        positions: Dict[str, float],
+        orders: Dict[str, Order],
+    ) -> None:
+        self._wallet = wallet
+        self._prices = prices
+        self._positions = positions
+        self._orders = orders
+
+    def balance(self, asset: str) -> float:
+        return self._wallet.balances.get(asset, 0.0)
+
+    # Base asset bought through this pair and not sold yet. Pairs sharing a base asset
+    # (BTC/USDT, BTC/USDC) hold separate positions even though the wallet pools the BTC.
+    def position(self, pair: Pair) -> float:
+        return self._positions.get(str(pair), 0.0)
+
+    # Whether the pair is (or is about to be) held: it has a position, or a BUY that hasn't
+    # filled yet; a pending SELL means it is being left
+    def holding(self, pair: Pair) -> bool:
+        order = self._orders.get(str(pair))
+        if order is not None:
+            return order.operation is OperationEnum.BUY
+        return self.position(pair) > 0
+
+    def price(self, pair: Pair) -> Optional[float]:
+        return self._prices.get(str(pair))
+
+    # Value of the wallet in `quote`; assets without a <asset>/<quote> price seen yet are left out
+    def equity(self, quote: str) -> float:
+        total = 0.0
+        for asset, amount in self._wallet.balances.items():
+            if asset == quote:
+                total += amount
+            elif amount:
+                price = self._prices.get(f"{asset}/{quote}")
+                if price is not None:
+                    total += amount * price
+        return total
+
+
+class PaperBroker:
+    # Simulated execution of strategy transactions against each frame's candles:
+    #  - a BUY spends order_size of the quote balance, a SELL sells what that pair bought
+    #  - fills happen at the close moved against us by `slippage`, capped to the candle's range
+    #  - at most max_volume_fraction of the candle's volume fills per frame; the rest of the
+    #    order carries over to the next frames until it fills, funds run out, or a new
+    #    transaction for the same pair replaces it
+    #  - `fee` is charged on the notional, in the quote asset
+    fills: List[Fill]
+    fees_paid: Dict[str, float]  # by quote asset
+
+    _wallet: MockWallet
+    _orders: Dict[str, Order]
+    _prices: Dict[str, float]
+    _positions: Dict[str, float]  # base quantity held per pair
+
+    def __init__(
+        self,
+        wallet: MockWallet,
+        fee=0.00075,
+        slippage=0.0005,
+        max_volume_fraction: Optional[float]=0.1,
+        order_size=1.0,
+    ) -> None:
+        self._wallet = wallet
+        self._fee = fee
+        self._slippage = slippage
+        self._max_volume_fraction = max_volume_fraction
+        self._order_size = order_size
+        self._orders = {}
+        self._prices = {}
+        self._positions = {}
+        self.fills = []
+        self.fees_paid = {}
+
+    @property
+    def portfolio(self) -> Portfolio:
+        return Portfolio(self._wallet, self._prices, self._positions, self._orders)
+
+    @property
+    def pending(self) -> Dict[str, Order]:
+        return dict(self._orders)
+
+    def execute(self, frame: MarketFrame, transactions: List[Transaction]) -> List[Fill]:
+        for transaction in transactions:
+            if transaction.operation is OperationEnum.SKIP:
+                continue
+            if not isinstance(transaction.symbol, Pair):
+                raise Exception(f"Only pairs can be traded, got {transaction.symbol}")
+            self._orders[str(transaction.symbol)] = Order(transaction.symbol, transaction.operation)
+
+        for key, ohlcv in frame.ohlcv.items():
+            self._prices[key] = ohlcv.close
+
+        fills: List[Fill] = []
+        for key, order in list(self._orders.items()):
+            ohlcv = frame.ohlcv.get(key)
+            if ohlcv is None:
+                continue
+
+            fill = self.__fill(frame.timestamp, key, order, ohlcv)
+            if fill is not None:
+                fills.append(fill)
+            if fill is None or fill.remaining <= 0:
+                del self._orders[key]
+
+        self.fills += fills
+        return fills
+
+    def __fill(self, timestamp: datetime, key: str, order: Order, ohlcv: OHLCV) -> Optional[Fill]:
+        balances = self._wallet.balances
+        base, quote = order.pair.a, order.pair.b
+        cap = ohlcv.volume * self._max_volume_fraction if self._max_volume_fraction is not None else float("inf")
+
+        # Enum members are singletons; `is` skips OperationEnum.__eq__, which dominated the profile
+        if order.operation is OperationEnum.BUY:
+            price = min(ohlcv.close * (1 + self._slippage), ohlcv.high)
+            affordable = balances.get(quote, 0.0) / (price * (1 + self._fee))
+            if order.remaining is None:
+                order.remaining = affordable * self._order_size
+            quantity = min(order.remaining, cap, affordable)
+            if quantity <= 0:
+                return None
+
+            notional = quantity * price
+            fee = notional * self._fee
+            balances[quote] = balances.get(quote, 0.0) - notional - fee
+            balances[base] = balances.get(base, 0.0) + quantity
+            self._positions[key] = self._positions.get(key, 0.0) + quantity
+            # Out of funds: whatever is left of the order can't be bought anyway
+            exhausted = quantity == affordable
+        else:
+            price = max(ohlcv.close * (1 - self._slippage), ohlcv.low)
+            # Only what this pair bought, even if other pairs hold more of the base asset
+            held = min(self._positions.get(key, 0.0), balances.get(base, 0.0))
+            if order.remaining is None:
+                order.remaining = held
+            quantity = min(order.remaining, cap, held)
+            if quantity <= 0:
+                return None
+
+            notional = quantity * price
+            fee = notional * self._fee
+            balances[base] = balances.get(base, 0.0) - quantity
+            balances[quote] = balances.get(quote, 0.0) + notional - fee
+            self._positions[key] = self._positions.get(key, 0.0) - quantity
+            exhausted = quantity == held
+
+        order.remaining = 0.0 if exhausted else order.remaining - quantity
+        self.fees_paid[quote] = self.fees_paid.get(quote, 0.0) + fee
+        return Fill(timestamp, order.pair, order.operation, quantity, price, fee, order.remaining)
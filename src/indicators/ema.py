@@ -0,0 +1,35 @@
+import math
+from typing import Optional
+
+
+class EMA:
+    _alpha: float
+    _window: int
+    _value: float
+    _count: int
+
+    def __init__(self, window: int, alpha: Optional[float]=None) -> None:
+        self._window = window
+        self._alpha = alpha if alpha is not None else 2 / (window + 1)
+        self._value = math.nan
+        self._count = 0
+
+    def update(self, value: float) -> float:
+        if self._count == 0:
+            self._value = value
+        else:
+            self._value += self._alpha * (value - self._value)
+        self._count += 1
+        return self._value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self._window
+
+    def reset(self) -> None:
+        self._value = math.nan
+        self._count = 0
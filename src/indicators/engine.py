@@ -0,0 +1,60 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from indicators.indicator import Indicator
+from models.columnar import FIELD_INDEX
+from models.market import Market, MarketFrame
+from models.symbol import Symbol
+
+
+class IndicatorEngine:
+    # Per-symbol streaming indicators: strategies subscribe once by name and read
+    # the current value after each frame is pushed through update()
+    _subscriptions: Dict[str, Tuple[Callable[[], Indicator], str]]
+    _indicators: Dict[int, Dict[str, Indicator]]  # by symbol id
+
+    def __init__(self) -> None:
+        self._subscriptions = {}
+        self._indicators = {}
+
+    def subscribe(self, name: str, factory: Callable[[], Indicator], field="close") -> None:
+        self._subscriptions[name] = (factory, field)
+        for indicators in self._indicators.values():
+            indicators[name] = factory()
+
+    def __for_symbol(self, symbol: Symbol) -> Dict[str, Indicator]:
+        indicators = self._indicators.get(symbol.id)
+        if indicators is None:
+            indicators = {name: factory() for name, (factory, _) in self._subscriptions.items()}
+            self._indicators[symbol.id] = indicators
+        return indicators
+
+    # Symbols listed more than once are only updated once; symbols missing from the frame are skipped
+    def update(self, frame: MarketFrame, symbols: List[Symbol]) -> None:
+        for symbol in dict.fromkeys(symbols):
+            ohlcv = frame.ohlcv.get(str(symbol))
+            if ohlcv is None:
+                continue
+            for name, indicator in self.__for_symbol(symbol).items():
+                indicator.update(getattr(ohlcv, self._subscriptions[name][1]))
+
+    def warm_up(self, market: Market, symbols: List[Symbol]) -> None:
+        for symbol in dict.fromkeys(symbols):
+            _, ohlcv = market.get_symbol_columns(symbol)
+            for name, indicator in self.__for_symbol(symbol).items():
+                for value in ohlcv[FIELD_INDEX[self._subscriptions[name][1]]].tolist():
+                    indicator.update(value)
+
+    def get(self, symbol: Symbol, name: str) -> Indicator:
+        return self.__for_symbol(symbol)[name]
+
+    def value(self, symbol: Symbol, name: str) -> float:
+        return self.__for_symbol(symbol)[name].value
+
+    # All symbols, or only `symbols`
+    def reset(self, symbols: Optional[List[Symbol]]=None) -> None:
+        ids = {symbol.id for symbol in symbols} if symbols is not None else None
+        for id, indicators in self._indicators.items():
+            if ids is not None and id not in ids:
+                continue
+            for indicator in indicators.values():
+                indicator.reset()
@@ -0,0 +1,17 @@
+from typing import Protocol
+
+
+class Indicator(Protocol):
+    def update(self, value: float) -> float:
+        raise NotImplementedError
+
+    @property
+    def value(self) -> float:
+        raise NotImplementedError
+
+    @property
+    def ready(self) -> bool:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
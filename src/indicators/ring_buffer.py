@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+
+class RingBuffer:
+    _values: List[float]
+    _capacity: int
+    _start: int
+    _count: int
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise Exception("RingBuffer capacity must be positive")
+
+        self._values = [0.0] * capacity
+        self._capacity = capacity
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def full(self) -> bool:
+        return self._count == self._capacity
+
+    # Returns the value pushed out of the buffer, if any
+    def push(self, value: float) -> Optional[float]:
+        if self._count < self._capacity:
+            self._values[(self._start + self._count) % self._capacity] = value
+            self._count += 1
+            return None
+
+        evicted = self._values[self._start]
+        self._values[self._start] = value
+        self._start = (self._start + 1) % self._capacity
+        return evicted
+
+    def last(self) -> float:
+        if self._count == 0:
+            raise IndexError("RingBuffer is empty")
+        return self._values[(self._start + self._count - 1) % self._capacity]
+
+    def values(self) -> List[float]:
+        end = self._start + self._count
+        if end <= self._capacity:
+            return self._values[self._start:end]
+        return self._values[self._start:] + self._values[:end - self._capacity]
+
+    def clear(self) -> None:
+        self._start = 0
+        self._count = 0
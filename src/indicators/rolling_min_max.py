@@ -0,0 +1,60 @@
+import math
+from collections import deque
+from typing import Deque, Tuple
+
+
+class RollingMinMax:
+    # Monotonic deques of (position, value): amortized O(1) per update
+    _window: int
+    _position: int
+    _mins: Deque[Tuple[int, float]]
+    _maxs: Deque[Tuple[int, float]]
+
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise Exception("RollingMinMax window must be positive")
+
+        self._window = window
+        self._position = 0
+        self._mins = deque()
+        self._maxs = deque()
+
+    def update(self, value: float) -> float:
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append((self._position, value))
+
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append((self._position, value))
+
+        expired = self._position - self._window
+        if self._mins[0][0] <= expired:
+            self._mins.popleft()
+        if self._maxs[0][0] <= expired:
+            self._maxs.popleft()
+
+        self._position += 1
+        return self.value
+
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else math.nan
+
+    # Range of the window
+    @property
+    def value(self) -> float:
+        return self.max - self.min
+
+    @property
+    def ready(self) -> bool:
+        return self._position >= self._window
+
+    def reset(self) -> None:
+        self._position = 0
+        self._mins.clear()
+        self._maxs.clear()
@@ -0,0 +1,61 @@
+import math
+
+from indicators.ring_buffer import RingBuffer
+
+
+class RollingStd:
+    _buffer: RingBuffer
+    _ddof: int
+    _sum: float
+    _sum_sq: float
+    _updates: int
+
+    def __init__(self, window: int, ddof=0) -> None:
+        self._buffer = RingBuffer(window)
+        self._ddof = ddof
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._updates = 0
+
+    def update(self, value: float) -> float:
+        evicted = self._buffer.push(value)
+        self._sum += value
+        self._sum_sq += value * value
+        if evicted is not None:
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+
+        # Re-sum once per window to stop floating point drift of the running sums
+        self._updates += 1
+        if self._updates == self._buffer.capacity:
+            self._updates = 0
+            values = self._buffer.values()
+            self._sum = math.fsum(values)
+            self._sum_sq = math.fsum(x * x for x in values)
+
+        return self.value
+
+    @property
+    def mean(self) -> float:
+        if len(self._buffer) == 0:
+            return math.nan
+        return self._sum / len(self._buffer)
+
+    @property
+    def value(self) -> float:
+        count = len(self._buffer)
+        if count - self._ddof <= 0:
+            return math.nan
+
+        variance = (self._sum_sq - self._sum * self._sum / count) / (count - self._ddof)
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def ready(self) -> bool:
+        return self._buffer.full
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._updates = 0
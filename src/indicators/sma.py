@@ -0,0 +1,42 @@
+import math
+
+from indicators.ring_buffer import RingBuffer
+
+
+class SMA:
+    # Mean of the last `window` values (or of all values while fewer have been seen)
+    _buffer: RingBuffer
+    _sum: float
+    _updates: int
+
+    def __init__(self, window: int) -> None:
+        self._buffer = RingBuffer(window)
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, value: float) -> float:
+        evicted = self._buffer.push(value)
+        self._sum += value if evicted is None else value - evicted
+
+        # Re-sum once per window to stop floating point drift of the running sum
+        self._updates += 1
+        if self._updates == self._buffer.capacity:
+            self._updates = 0
+            self._sum = sum(self._buffer.values())
+
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self._buffer) == 0:
+            return math.nan
+        return self._sum / len(self._buffer)
+
+    @property
+    def ready(self) -> bool:
+        return self._buffer.full
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self._sum = 0.0
+        self._updates = 0
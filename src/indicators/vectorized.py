@@ -0,0 +1,19 @@
+import numpy as np
+
+
+# Whole-array counterparts of the streaming indicators. Like the streaming versions,
+# the first window-1 values average over what has been seen so far.
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    if window < 1:
+        raise Exception("rolling_mean window must be positive")
+    if len(values) == 0:
+        return np.empty(0)
+
+    # Cumulative sums of values offset by the first one keep the sums small,
+    # so differencing them loses less precision
+    offset = values[0]
+    sums = np.cumsum(values - offset)
+    sums[window:] = sums[window:] - sums[:-window]
+
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return sums / counts + offset
@@ -0,0 +1,162 @@
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+
+# Latency buckets in seconds, 1ms to 60s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    value: float
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount=1.0) -> None:
+        self.value += amount
+
+
+class Histogram:
+    # Fixed buckets: observing is a bisect and two additions, so it can stay on in the hot loop
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    bounds: Tuple[float, ...]
+    counts: List[int]  # the last bucket counts values above every bound
+    sum: float
+    count: int
+
+    def __init__(self, bounds: Tuple[float, ...]=DEFAULT_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    # Upper bound of the bucket holding the q-th quantile
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Timing:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> "Timing":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class Sink(Protocol):
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        ...
+
+
+class MetricsRegistry:
+    # Metrics are looked up by name and labels; callers on a hot path can keep the returned
+    # Counter/Histogram around instead of looking it up every time. Nothing is written out
+    # until flush(), which maybe_flush() calls at most once every flush_interval seconds;
+    # the timers and StrategyRuntime call maybe_flush() once per frame.
+    _counters: Dict[Tuple[str, Labels], Counter]
+    _histograms: Dict[Tuple[str, Labels], Histogram]
+    _sinks: List[Sink]
+    _last_flush: float
+
+    def __init__(
+        self,
+        sinks: Optional[List[Sink]]=None,
+        flush_interval=10.0,
+        clock: Callable[[], float]=time.monotonic,
+    ) -> None:
+        self._counters = {}
+        self._histograms = {}
+        self._sinks = list(sinks or [])
+        self._flush_interval = flush_interval
+        self._clock = clock
+        self._last_flush = clock()
+
+    def add_sink(self, sink: Sink) -> None:
+        self._sinks.append(sink)
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = Counter()
+            self._counters[key] = counter
+        return counter
+
+    def histogram(self, name: str, bounds: Tuple[float, ...]=DEFAULT_BUCKETS, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = Histogram(bounds)
+            self._histograms[key] = histogram
+        return histogram
+
+    # with registry.time("fetch_seconds", symbol="BTC/USDT"): ...
+    def time(self, name: str, **labels: str) -> Timing:
+        return Timing(self.histogram(name, **labels))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "timestamp": time.time(),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": counter.value}
+                for (name, labels), counter in self._counters.items()
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "bounds": list(histogram.bounds),
+                    "counts": list(histogram.counts),
+                }
+                for (name, labels), histogram in self._histograms.items()
+            ],
+        }
+
+    def flush(self) -> None:
+        self._last_flush = self._clock()
+        if not self._sinks:
+            return
+
+        snapshot = self.snapshot()
+        for sink in self._sinks:
+            try:
+                sink.write(snapshot)
+            except Exception as e:
+                print(f"Failed to write metrics to {sink}: {e}")
+
+    def maybe_flush(self) -> None:
+        if self._clock() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+
+# Process-wide registry used when a component isn't given one
+default_registry = MetricsRegistry()
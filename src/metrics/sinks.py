@@ -0,0 +1,81 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labels: Dict[str, str], extra: Optional[Dict[str, str]]=None) -> str:
+    merged = {**labels, **(extra or {})}
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in merged.items()) + "}"
+
+
+class MemorySink:
+    # Keeps the last `keep` snapshots, mostly for tests and interactive inspection
+    snapshots: List[Dict[str, Any]]
+
+    def __init__(self, keep=100) -> None:
+        self.snapshots = []
+        self._keep = keep
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        self.snapshots.append(snapshot)
+        del self.snapshots[:-self._keep]
+
+    @property
+    def last(self) -> Dict[str, Any] | None:
+        return self.snapshots[-1] if self.snapshots else None
+
+
+class PrometheusTextSink:
+    # Rewrites a file in the Prometheus text exposition format, e.g. for node_exporter's
+    # textfile collector. The file is replaced atomically so scrapes never see half of it.
+    _filename: str
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        lines: List[str] = []
+
+        typed = set()
+        for counter in snapshot["counters"]:
+            if counter["name"] not in typed:
+                lines.append(f"# TYPE {counter['name']} counter")
+                typed.add(counter["name"])
+            lines.append(f"{counter['name']}{_label_str(counter['labels'])} {counter['value']}")
+
+        for histogram in snapshot["histograms"]:
+            name = histogram["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+
+            cumulative = 0
+            for bound, count in zip(histogram["bounds"], histogram["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_str(histogram['labels'], {'le': repr(bound)})} {cumulative}")
+            lines.append(f"{name}_bucket{_label_str(histogram['labels'], {'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{_label_str(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{_label_str(histogram['labels'])} {histogram['count']}")
+
+        temporary = f"{self._filename}.tmp"
+        with open(temporary, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary, self._filename)
+
+
+class JsonLinesSink:
+    # Appends one JSON object per flush
+    _filename: str
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        with open(self._filename, "a") as f:
+            f.write(json.dumps(snapshot) + "\n")
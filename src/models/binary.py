@@ -0,0 +1,75 @@
+import struct
+from typing import Dict
+
+import numpy as np
+
+from models.columnar import FIELDS, MarketColumns
+
+# File layout (little endian):
+#   header      64 bytes, see HEADER below
+#   symbols     n_symbols * SYMBOL_WIDTH bytes, utf-8, NUL padded
+#   timestamps  n_rows int64 unix seconds
+#   data        n_symbols blocks of (5, n_rows) float64 - open, high, low, close, volume rows
+# Sections start on ALIGNMENT byte boundaries so they can be mapped as arrays in place.
+MAGIC = b"TRDRMKT\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQ")
+HEADER_SIZE = 64
+SYMBOL_WIDTH = 32
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_market_file(filename: str, columns: MarketColumns) -> None:
+    symbols = columns.symbols()
+    rows = len(columns)
+
+    symbols_offset = HEADER_SIZE
+    timestamps_offset = _align(symbols_offset + len(symbols) * SYMBOL_WIDTH)
+    data_offset = _align(timestamps_offset + rows * 8)
+
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(symbols), rows, symbols_offset, timestamps_offset, data_offset).ljust(HEADER_SIZE, b"\0"))
+
+        for symbol in symbols:
+            encoded = symbol.encode("utf-8")
+            if len(encoded) > SYMBOL_WIDTH:
+                raise Exception(f"Symbol name too long for the market file format: {symbol}")
+            f.write(encoded.ljust(SYMBOL_WIDTH, b"\0"))
+
+        f.write(b"\0" * (timestamps_offset - f.tell()))
+        f.write(np.ascontiguousarray(columns.timestamps(), dtype="<i8").tobytes())
+
+        f.write(b"\0" * (data_offset - f.tell()))
+        for symbol in symbols:
+            f.write(np.ascontiguousarray(columns.ohlcv(symbol), dtype="<f8").tobytes())
+
+
+# The returned columns are read-only views of the mapped file: nothing is read until a
+# page is touched. Appending to them copies the data into memory first.
+def read_market_file(filename: str) -> MarketColumns:
+    mapped = np.memmap(filename, dtype=np.uint8, mode="r")
+
+    magic, version, n_symbols, rows, symbols_offset, timestamps_offset, data_offset = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise Exception(f"{filename} is not a market data file")
+    if version != VERSION:
+        raise Exception(f"Unsupported market data file version: {version}")
+
+    symbols = [
+        bytes(mapped[symbols_offset + i * SYMBOL_WIDTH:symbols_offset + (i + 1) * SYMBOL_WIDTH]).rstrip(b"\0").decode("utf-8")
+        for i in range(n_symbols)
+    ]
+
+    timestamps = mapped[timestamps_offset:timestamps_offset + rows * 8].view("<i8")
+
+    block_size = len(FIELDS) * rows * 8
+    data: Dict[str, np.ndarray] = {}
+    for i, symbol in enumerate(symbols):
+        start = data_offset + i * block_size
+        data[symbol] = mapped[start:start + block_size].view("<f8").reshape(len(FIELDS), rows)
+
+    return MarketColumns(timestamps=timestamps, data=data)
@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.symbol import Symbol
+
+FIELDS: Tuple[str, ...] = ("open", "high", "low", "close", "volume")
+FIELD_INDEX: Dict[str, int] = {field: i for i, field in enumerate(FIELDS)}
+
+INITIAL_CAPACITY = 1024
+
+
+def to_epoch_seconds(timestamp: datetime | int | float) -> int:
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp())
+    # Exchanges report candle timestamps in milliseconds
+    return int(timestamp) // 1000 if timestamp > 10**11 else int(timestamp)
+
+
+class MarketColumns:
+    # Timestamps are unix seconds; each symbol owns a (5, capacity) block so every
+    # OHLCV field is a contiguous row. Candles missing from a frame are NaN.
+    _timestamps: np.ndarray
+    _data: Dict[str, np.ndarray]
+    _length: int
+
+    def __init__(
+        self,
+        timestamps: Optional[np.ndarray]=None,
+        data: Optional[Dict[str, np.ndarray]]=None,
+    ) -> None:
+        if timestamps is None:
+            self._timestamps = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+            self._data = {}
+            self._length = 0
+        else:
+            self._timestamps = timestamps
+            self._data = data if data is not None else {}
+            self._length = len(timestamps)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def capacity(self) -> int:
+        return len(self._timestamps)
+
+    def symbols(self) -> List[str]:
+        return list(self._data.keys())
+
+    def has_symbol(self, symbol: Symbol | str) -> bool:
+        return str(symbol) in self._data
+
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self._length]
+
+    def ohlcv(self, symbol: Symbol | str) -> np.ndarray:
+        return self._data[str(symbol)][:, :self._length]
+
+    def column(self, symbol: Symbol | str, field: str) -> np.ndarray:
+        return self._data[str(symbol)][FIELD_INDEX[field], :self._length]
+
+    def __grow(self, minimum: int) -> None:
+        capacity = max(self.capacity * 2, minimum, INITIAL_CAPACITY)
+
+        timestamps = np.empty(capacity, dtype=np.int64)
+        timestamps[:self._length] = self._timestamps[:self._length]
+        self._timestamps = timestamps
+
+        for key, block in self._data.items():
+            grown = np.full((len(FIELDS), capacity), np.nan)
+            grown[:, :self._length] = block[:, :self._length]
+            self._data[key] = grown
+
+    def __block(self, key: str) -> np.ndarray:
+        block = self._data.get(key)
+        if block is None:
+            block = np.full((len(FIELDS), self.capacity), np.nan)
+            self._data[key] = block
+        return block
+
+    def append(self, timestamp: datetime | int, ohlcv: Dict[str, Tuple[float, float, float, float, float]]) -> None:
+        if self._length == self.capacity:
+            self.__grow(self._length + 1)
+
+        i = self._length
+        self._timestamps[i] = to_epoch_seconds(timestamp)
+        for key, values in ohlcv.items():
+            self.__block(key)[:, i] = values
+        self._length += 1
+
+    def append_rows(self, timestamps: np.ndarray, data: Dict[str, np.ndarray]) -> None:
+        count = len(timestamps)
+        if self._length + count > self.capacity:
+            self.__grow(self._length + count)
+
+        start, end = self._length, self._length + count
+        self._timestamps[start:end] = timestamps
+        for key, rows in data.items():
+            self.__block(key)[:, start:end] = rows
+        self._length = end
+
+    def row(self, index: int) -> Tuple[int, Dict[str, np.ndarray]]:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MarketColumns index out of range")
+
+        values: Dict[str, np.ndarray] = {}
+        for key, block in self._data.items():
+            if not np.isnan(block[3, index]):
+                values[key] = block[:, index]
+        return int(self._timestamps[index]), values
+
+    # Rows [start, end) sharing this instance's arrays. Safe because rows are never modified
+    # once appended: appending to either side later writes past the view or into new arrays.
+    def view(self, start: int, end: int) -> "MarketColumns":
+        start, end, _ = slice(start, end).indices(self._length)
+        end = max(start, end)
+        return MarketColumns(
+            self._timestamps[start:end],
+            {key: block[:, start:end] for key, block in self._data.items()},
+        )
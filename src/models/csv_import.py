@@ -0,0 +1,165 @@
+import io
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from os import listdir, path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from models.columnar import FIELDS, MarketColumns, to_epoch_seconds
+from models.symbol import Symbol
+
+# Reader for CSV market directories written by Market.save_to_file: one
+# <timestamp>.mf.csv per frame, with rows "timestamp,symbol,open,high,low,close,volume".
+# Output frames (.of.csv) in the same directory are ignored.
+SUFFIX = ".mf.csv"
+ROW = np.dtype([
+    ("timestamp", np.int64),
+    ("symbol", "S32"),  # bytes parse faster than str
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+])
+WORKERS = 8
+# Files parsed together in one vectorized call; when streaming, the next chunk is read
+# while the current one is consumed
+CHUNK_SIZE = 2048
+
+
+def _in_range(timestamp: int, since: Optional[int], until: Optional[int]) -> bool:
+    return (since is None or timestamp >= since) and (until is None or timestamp < until)
+
+
+# (timestamp, filename) of the frame files in [since, until), in time order. The range is
+# checked on the file names, so files outside it are never opened.
+def _frame_files(directory: str, since: Optional[int], until: Optional[int]) -> List[Tuple[int, str]]:
+    files: List[Tuple[int, str]] = []
+    for name in listdir(directory):
+        if not name.endswith(SUFFIX):
+            continue
+        timestamp = to_epoch_seconds(int(name[:-len(SUFFIX)]))
+        if _in_range(timestamp, since, until):
+            files.append((timestamp, path.join(directory, name)))
+    files.sort()
+    return files
+
+
+# Data lines (headers dropped) of consecutive frame files, and how many each file has
+def _read_lines(filenames: List[str]) -> Tuple[str, List[int]]:
+    text: List[str] = []
+    counts: List[int] = []
+    for filename in filenames:
+        with open(filename, "r") as f:
+            lines = f.read().partition("\n")[2]
+        if "\n\n" in lines or (lines and not lines.endswith("\n")):
+            lines = "".join(line + "\n" for line in lines.splitlines() if line)
+        text.append(lines)
+        counts.append(lines.count("\n"))
+    return "".join(text), counts
+
+
+# Parses the files of one chunk at once: (timestamps, {symbol: (5, n) block}), NaN where
+# a frame has no candle for the symbol
+def _parse_chunk(
+    files: List[Tuple[int, str]],
+    contents: List[Tuple[str, List[int]]],
+    symbols: Optional[Set[str]],
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    timestamps = np.array([timestamp for timestamp, _ in files], dtype=np.int64)
+    text = "".join(lines for lines, _ in contents)
+    if not text:
+        return timestamps, {}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # no data lines at all
+        rows = np.loadtxt(io.StringIO(text), dtype=ROW, delimiter=",", ndmin=1)
+    frame = np.repeat(np.arange(len(files)), [count for _, counts in contents for count in counts])
+
+    if symbols is not None:
+        keep = np.isin(rows["symbol"], [symbol.encode("utf-8") for symbol in symbols])
+        rows, frame = rows[keep], frame[keep]
+
+    keys, symbol_index = np.unique(rows["symbol"], return_inverse=True)
+    data: Dict[str, np.ndarray] = {}
+    for i, key in enumerate(key.decode("utf-8") for key in keys.tolist()):
+        mask = symbol_index == i
+        block = np.full((len(FIELDS), len(files)), np.nan)
+        for j, field in enumerate(FIELDS):
+            block[j, frame[mask]] = rows[field][mask]
+        data[key] = block
+    return timestamps, data
+
+
+def _normalize(
+    symbols: Optional[Iterable[Symbol | str]],
+    since: Optional[datetime | int],
+    until: Optional[datetime | int],
+) -> Tuple[Optional[Set[str]], Optional[int], Optional[int]]:
+    return (
+        {str(symbol) for symbol in symbols} if symbols is not None else None,
+        to_epoch_seconds(since) if since is not None else None,
+        to_epoch_seconds(until) if until is not None else None,
+    )
+
+
+# Parsed chunks in time order. Files are read on a thread pool one chunk ahead of the
+# parser, so memory stays bounded by about two chunks however large the directory is.
+def _iter_chunks(
+    directory: str,
+    symbols: Optional[Iterable[Symbol | str]],
+    since: Optional[datetime | int],
+    until: Optional[datetime | int],
+    workers: int,
+    chunk_size: int,
+) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    keys, since_epoch, until_epoch = _normalize(symbols, since, until)
+    files = _frame_files(directory, since_epoch, until_epoch)
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="csv-import") as executor:
+        # One task per worker rather than per file; futures cost more than reading a small file
+        def read(chunk: List[Tuple[int, str]]) -> List[Future]:
+            size = -(-len(chunk) // workers)  # ceil
+            return [
+                executor.submit(_read_lines, [filename for _, filename in chunk[i:i + size]])
+                for i in range(0, len(chunk), size)
+            ]
+
+        reading = read(chunks[0]) if chunks else []
+        for i, chunk in enumerate(chunks):
+            current = reading
+            reading = read(chunks[i + 1]) if i + 1 < len(chunks) else []
+            yield _parse_chunk(chunk, [future.result() for future in current], keys)
+
+
+# Yields (timestamp, {symbol: array of open, high, low, close, volume}) for every frame
+# file in [since, until), in time order, only for `symbols` when given
+def iter_csv_frames(
+    directory: str,
+    symbols: Optional[Iterable[Symbol | str]]=None,
+    since: Optional[datetime | int]=None,
+    until: Optional[datetime | int]=None,
+    workers=WORKERS,
+    chunk_size=CHUNK_SIZE,
+) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    for timestamps, data in _iter_chunks(directory, symbols, since, until, workers, chunk_size):
+        for i, timestamp in enumerate(timestamps.tolist()):
+            yield timestamp, {key: block[:, i] for key, block in data.items() if not np.isnan(block[3, i])}
+
+
+# Reads the matching frame files into columns, one row per file
+def read_csv_columns(
+    directory: str,
+    symbols: Optional[Iterable[Symbol | str]]=None,
+    since: Optional[datetime | int]=None,
+    until: Optional[datetime | int]=None,
+    workers=WORKERS,
+    chunk_size=CHUNK_SIZE,
+) -> MarketColumns:
+    columns = MarketColumns()
+    for timestamps, data in _iter_chunks(directory, symbols, since, until, workers, chunk_size):
+        columns.append_rows(timestamps, data)
+    return columns
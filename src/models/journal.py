@@ -0,0 +1,246 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from os import listdir, makedirs, path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models.columnar import FIELDS, MarketColumns
+from models.market import AnyFrame, AnyOutput, Log, LogType, Market, MarketFrame, OutputFrame
+from models.records import Candle, Frame, FunctionPlotRecord, OutputRecord, TransactionRecord, frames_from_columns
+from models.symbol import parse_symbol
+from models.transaction import OperationEnum
+
+# Append-only journal of a run's frames and outputs: one JSON object per line, one line per
+# frame, in files journal-000000.jsonl, journal-000001.jsonl, ... rotated at max_bytes.
+#
+#   {"timestamp": 1727740800, "ohlcv": {"BTC/USDT": [o, h, l, c, v]},
+#    "logs": [[ts, type, value, symbol]], "transactions": [[ts, operation, symbol, notes]],
+#    "function_plots": [[ts, label, value, color, symbol]]}
+#
+# Timestamps are unix seconds and symbols their string keys. A crash can leave the last line
+# of a file without its newline; readers skip such a torn tail.
+
+PREFIX = "journal-"
+SUFFIX = ".jsonl"
+
+
+def _journal_filename(directory: str, index: int) -> str:
+    return path.join(directory, f"{PREFIX}{index:06d}{SUFFIX}")
+
+
+def _journal_files(directory: str) -> List[str]:
+    names = [name for name in listdir(directory) if name.startswith(PREFIX) and name.endswith(SUFFIX)]
+    return [path.join(directory, name) for name in sorted(names)]
+
+
+def _epoch(timestamp: datetime) -> int:
+    return int(timestamp.timestamp())
+
+
+def encode_frame(frame: AnyFrame, output: AnyOutput) -> str:
+    return json.dumps({
+        "timestamp": _epoch(frame.timestamp),
+        "ohlcv": {key: [o.open, o.high, o.low, o.close, o.volume] for key, o in frame.ohlcv.items()},
+        "logs": [
+            [_epoch(log.timestamp), log.type.value, log.value, str(log.symbol) if log.symbol else None]
+            for log in output.logs
+        ],
+        "transactions": [
+            [_epoch(t.timestamp), t.operation.value, str(t.symbol), t.notes]
+            for t in output.transactions
+        ],
+        "function_plots": [
+            [_epoch(f.timestamp), f.label, f.value, f.color, str(f.symbol) if f.symbol else None]
+            for f in output.function_plots
+        ],
+    }, separators=(",", ":"))
+
+
+def _decode_output(record: Dict[str, Any]) -> OutputRecord:
+    return OutputRecord(
+        datetime.fromtimestamp(record["timestamp"]),
+        [
+            Log(
+                timestamp=datetime.fromtimestamp(ts),
+                type=LogType(type),
+                value=value,
+                symbol=parse_symbol(symbol) if symbol else None,
+            )
+            for ts, type, value, symbol in record["logs"]
+        ],
+        [
+            TransactionRecord(datetime.fromtimestamp(ts), OperationEnum(operation), parse_symbol(symbol), notes)
+            for ts, operation, symbol, notes in record["transactions"]
+        ],
+        [
+            FunctionPlotRecord(datetime.fromtimestamp(ts), label, value, color, parse_symbol(symbol) if symbol else None)
+            for ts, label, value, color, symbol in record["function_plots"]
+        ],
+    )
+
+
+def _decode(record: Dict[str, Any]) -> Tuple[MarketFrame, OutputFrame]:
+    frame = Frame(
+        datetime.fromtimestamp(record["timestamp"]),
+        {key: Candle(*v) for key, v in record["ohlcv"].items()},
+    )
+    return frame.to_model(), _decode_output(record).to_model()
+
+
+def decode_frame(line: str) -> Tuple[MarketFrame, OutputFrame]:
+    return _decode(json.loads(line))
+
+
+class OutputJournal:
+    # append() only queues the frame; encoding and writing happen on a single background
+    # thread, in batches of batch_size frames or every flush_interval seconds, so the
+    # event loop never waits on the disk. Lines are written in append order. A timer thread
+    # flushes frames that waited flush_interval even when no more frames are appended.
+    _directory: str
+    _pending: List[Tuple[AnyFrame, AnyOutput]]
+    _file: Optional[IO[str]] = None
+    _index: int
+    _last_flush: float
+
+    def __init__(
+        self,
+        directory: str,
+        batch_size=256,
+        flush_interval=1.0,
+        max_bytes=64 * 2**20,
+    ) -> None:
+        self._directory = directory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_bytes = max_bytes
+
+        makedirs(directory, exist_ok=True)
+        # Continue after the files of earlier runs instead of appending to them
+        existing = _journal_files(directory)
+        self._index = int(path.basename(existing[-1])[len(PREFIX):-len(SUFFIX)]) + 1 if existing else 0
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        self._last_flush = time.monotonic()
+        self._closing = threading.Event()
+        self._timer = threading.Thread(target=self.__flush_on_time, name="journal-timer", daemon=True)
+        self._timer.start()
+
+    def __enter__(self) -> "OutputJournal":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def append(self, frame: AnyFrame, output: AnyOutput) -> None:
+        with self._lock:
+            self._pending.append((frame, output))
+            due = len(self._pending) >= self._batch_size or time.monotonic() - self._last_flush >= self._flush_interval
+        if due:
+            self.flush()
+
+    # Hands the queued frames to the writer thread; returns without waiting for the write
+    def flush(self) -> Future:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            write = self._writer.submit(self.__write, batch)
+        write.add_done_callback(self.__report)
+        return write
+
+    def __flush_on_time(self) -> None:
+        while not self._closing.wait(self._flush_interval / 4):
+            with self._lock:
+                due = bool(self._pending) and time.monotonic() - self._last_flush >= self._flush_interval
+            if due:
+                self.flush()
+
+    def __report(self, write: Future) -> None:
+        if write.exception() is not None:
+            print(f"Failed to write journal batch: {write.exception()}")
+
+    def close(self) -> None:
+        self._closing.set()
+        self._timer.join()
+        self.flush().result()
+        self._writer.shutdown(wait=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __write(self, batch: List[Tuple[AnyFrame, AnyOutput]]) -> None:
+        if not batch:
+            return
+
+        lines = "".join(encode_frame(frame, output) + "\n" for frame, output in batch)
+
+        if self._file is not None and self._file.tell() + len(lines) > self._max_bytes and self._file.tell() > 0:
+            self._file.close()
+            self._file = None
+            self._index += 1
+        if self._file is None:
+            self._file = open(_journal_filename(self._directory, self._index), "a")
+
+        self._file.write(lines)
+        self._file.flush()
+
+
+# The journal's records in order, across all rotated files
+def _read_records(directory: str) -> Iterator[Dict[str, Any]]:
+    for filename in _journal_files(directory):
+        with open(filename, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn tail
+                if line.strip():
+                    yield json.loads(line)
+
+
+# Streams the journal back frame by frame, across all rotated files
+def read_journal(directory: str) -> Iterator[Tuple[MarketFrame, OutputFrame]]:
+    for record in _read_records(directory):
+        yield _decode(record)
+
+
+# Builds the market chunk_size frames at a time straight into MarketColumns, without a model
+# per candle. Only frames with logs, transactions or function plots keep an output.
+def market_from_journal(directory: str, columnar=True, chunk_size=4096) -> Market:
+    columns = MarketColumns()
+    outputs: Dict[int, AnyOutput] = {}
+
+    chunk: List[Dict[str, Any]] = []
+    for record in _read_records(directory):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            _append_chunk(columns, outputs, chunk)
+            chunk = []
+    _append_chunk(columns, outputs, chunk)
+
+    if columnar:
+        return Market.from_columns(columns, outputs)
+    return Market(frames=[
+        (frame, outputs[i]) if i in outputs else frame
+        for i, frame in enumerate(frames_from_columns(columns))
+    ])
+
+
+def _append_chunk(columns: MarketColumns, outputs: Dict[int, AnyOutput], chunk: List[Dict[str, Any]]) -> None:
+    if not chunk:
+        return
+
+    data: Dict[str, np.ndarray] = {}
+    for i, record in enumerate(chunk):
+        for key, values in record["ohlcv"].items():
+            block = data.get(key)
+            if block is None:
+                block = data[key] = np.full((len(FIELDS), len(chunk)), np.nan)
+            block[:, i] = values
+        if record["logs"] or record["transactions"] or record["function_plots"]:
+            outputs[len(columns) + i] = _decode_output(record)
+
+    columns.append_rows(np.array([record["timestamp"] for record in chunk], dtype=np.int64), data)
@@ -1,14 +1,22 @@
 import enum
+from bisect import bisect_left, bisect_right
 import json
 from re import A
 import typing
 from pydantic import BaseModel, Field
-from typing import List, Literal, Optional, Tuple, Dict 
+from typing import Iterable, Iterator, List, Literal, Optional, Sequence, Tuple, Dict, overload
 from os import path, mkdir, listdir
 from datetime import datetime
+from importlib.util import find_spec
+import numpy as np
 import plotly.graph_objects as go
 
 from models import symbol
+from models.binary import read_market_file, write_market_file
+from models.columnar import FIELDS, MarketColumns, to_epoch_seconds
+from models.csv_import import iter_csv_frames, read_csv_columns
+from models.plotting import MAX_POINTS, decimate_candles, decimate_series
+from models.records import Frame, OutputRecord, frame_from_values, frames_from_columns
 from models.symbol import Symbol
 from models.transaction import OperationEnum, Transaction
 
@@ -77,37 +85,229 @@ class OutputFrame(BaseModel):
     def csv(self) -> List[str]:
         def csv_row(x: Log | Transaction | FunctionPlot) -> str:
             if isinstance(x, Log):
-                return f"{int(x.timestamp.timestamp())},{x.value_str()},{x.symbol if x.symbol else ""},,,,,,,,,"
+                fields = [int(x.timestamp.timestamp()), x.value_str(), x.symbol or ""] + [""] * 9
             elif isinstance(x, Transaction):
-                return f",,,{int(x.timestamp.timestamp())},{x.operation},{x.symbol},{x.notes if x.notes else ""},,,,,"
-            elif isinstance(x, FunctionPlot):
-                return f",,,,,,,{int(x.timestamp.timestamp())},{x.label},{x.value},{x.color},{x.symbol if x.symbol else ""}"
+                fields = [""] * 3 + [int(x.timestamp.timestamp()), x.operation, x.symbol, x.notes or ""] + [""] * 5
+            else:
+                fields = [""] * 7 + [int(x.timestamp.timestamp()), x.label, x.value, x.color, x.symbol or ""]
+            return ",".join(csv_field(field) for field in fields)
 
         rows = [csv_row(x) for x in self.logs + self.transactions + self.function_plots]
 
         return rows
 
+
+# Quotes a CSV field when it contains a separator, quote or newline (e.g. JSON log values)
+def csv_field(value: object) -> str:
+    text = str(value)
+    if any(c in text for c in ',"\n\r'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+# A market holds either the pydantic models or their models.records counterparts, which is
+# what providers, the market itself and strategies build
+AnyFrame = MarketFrame | Frame
+AnyOutput = OutputFrame | OutputRecord
+
+
+class ColumnarFrames(Sequence[AnyFrame | Tuple[AnyFrame, AnyOutput]]):
+    # Read-only stand-in for Market._frames when the market is columnar; frames are
+    # materialized as Frame records from the arrays only when accessed.
+    _columns: MarketColumns
+    _outputs: Dict[int, AnyOutput]
+
+    def __init__(self, columns: MarketColumns, outputs: Dict[int, AnyOutput]) -> None:
+        self._columns = columns
+        self._outputs = outputs
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __frame(self, index: int) -> AnyFrame | Tuple[AnyFrame, AnyOutput]:
+        if index < 0:
+            index += len(self._columns)
+
+        mf = frame_from_values(*self._columns.row(index))
+
+        of = self._outputs.get(index)
+        return (mf, of) if of is not None else mf
+
+    @overload
+    def __getitem__(self, index: int) -> AnyFrame | Tuple[AnyFrame, AnyOutput]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[AnyFrame | Tuple[AnyFrame, AnyOutput]]: ...
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return [self.__frame(i) for i in range(*index.indices(len(self._columns)))]
+        return self.__frame(index)
+
+    def __iter__(self) -> Iterator[AnyFrame | Tuple[AnyFrame, AnyOutput]]:
+        for i in range(len(self._columns)):
+            yield self.__frame(i)
+
+    def __add__(self, other: List[AnyFrame | Tuple[AnyFrame, AnyOutput]]) -> List[AnyFrame | Tuple[AnyFrame, AnyOutput]]:
+        return list(self) + list(other)
+
+
 class Market:
-    _frames: List[MarketFrame | Tuple[MarketFrame, OutputFrame]]
+    _frames: List[AnyFrame | Tuple[AnyFrame, AnyOutput]]
+    # Set when the market uses the columnar backend; _frames is then a ColumnarFrames view
+    _columns: Optional[MarketColumns] = None
+    _outputs: Dict[int, AnyOutput]
 
-    def __init__(self, frames: List[MarketFrame | Tuple[MarketFrame, OutputFrame]]=[]) -> None:
-        self._frames = frames
+    def __init__(
+            self,
+            frames: Optional[List[AnyFrame | Tuple[AnyFrame, AnyOutput]]]=None,
+            columnar=False,
+        ) -> None:
+        self._outputs = {}
+
+        if columnar:
+            self.__use_columns(MarketColumns())
+            for frame in frames or []:
+                self.add_frame(frame)
+        else:
+            self._frames = frames if frames is not None else []
+
+    @classmethod
+    def from_columns(cls, columns: MarketColumns, outputs: Optional[Dict[int, AnyOutput]]=None) -> "Market":
+        market = cls(columnar=True)
+        market.__use_columns(columns, outputs)
+        return market
+
+    def __use_columns(self, columns: MarketColumns, outputs: Optional[Dict[int, AnyOutput]]=None) -> None:
+        self._columns = columns
+        self._outputs = outputs if outputs is not None else {}
+        self._frames = typing.cast(
+            List[AnyFrame | Tuple[AnyFrame, AnyOutput]],
+            ColumnarFrames(columns, self._outputs),
+        )
+
+    @property
+    def columnar(self) -> bool:
+        return self._columns is not None
+
+    # The market's columnar storage; built (copied) from the frames for list-backed markets
+    def columns(self) -> MarketColumns:
+        if self._columns is not None:
+            return self._columns
+
+        columns = MarketColumns()
+        for frame in self._frames:
+            mf = frame[0] if isinstance(frame, tuple) else frame
+            columns.append(mf.timestamp, {key: (o.open, o.high, o.low, o.close, o.volume) for key, o in mf.ohlcv.items()})
+        return columns
+
+    # Index of the first frame at or after `timestamp` (side="left") or after it (side="right").
+    # Frames are in time order, so this is a binary search.
+    def __search(self, timestamp: datetime | int, side: Literal["left", "right"]="left") -> int:
+        epoch = to_epoch_seconds(timestamp)
+        if self._columns is not None:
+            return int(np.searchsorted(self._columns.timestamps(), epoch, side=side))
+
+        key = lambda frame: to_epoch_seconds((frame[0] if isinstance(frame, tuple) else frame).timestamp)
+        search = bisect_left if side == "left" else bisect_right
+        return search(self._frames, epoch, key=key)
+
+    # Frames [start, end) by position, as a Market. Columnar markets share their arrays with
+    # the view (no frames are materialized or copied); list-backed markets copy the frame references.
+    def slice(self, start: int, end: int) -> "Market":
+        if self._columns is None:
+            return Market(frames=self._frames[start:end])
+
+        view = self._columns.view(start, end)
+        outputs = {}
+        if self._outputs:
+            if len(view) < len(self._outputs):
+                outputs = {i - start: self._outputs[i] for i in range(start, start + len(view)) if i in self._outputs}
+            else:
+                outputs = {i - start: of for i, of in self._outputs.items() if start <= i < start + len(view)}
+        return Market.from_columns(view, outputs)
+
+    # Frames with start <= timestamp < end; either bound can be left open
+    def window(self, start: Optional[datetime | int]=None, end: Optional[datetime | int]=None) -> "Market":
+        first = self.__search(start) if start is not None else 0
+        last = self.__search(end) if end is not None else len(self._frames)
+        return self.slice(first, max(first, last))
+
+    # The last `count` frames
+    def tail(self, count: int) -> "Market":
+        length = len(self._frames)
+        return self.slice(max(length - count, 0), length)
+
+    # The latest frame at or before `timestamp`, None if the market starts after it
+    def at(self, timestamp: datetime | int) -> Optional[AnyFrame]:
+        index = self.__search(timestamp, side="right") - 1
+        if index < 0:
+            return None
+        frame = self._frames[index]
+        return frame[0] if isinstance(frame, tuple) else frame
+
+    # Returns (timestamps in unix seconds, array of shape (5, n) ordered as open, high, low, close, volume).
+    # Zero-copy views for columnar markets.
+    def get_symbol_columns(self, symbol: Symbol) -> Tuple[np.ndarray, np.ndarray]:
+        if self._columns is not None:
+            timestamps = self._columns.timestamps()
+            if not self._columns.has_symbol(symbol):
+                return timestamps[:0], np.empty((len(FIELDS), 0))
+
+            ohlcv = self._columns.ohlcv(symbol)
+            present = ~np.isnan(ohlcv[3])
+            if present.all():
+                return timestamps, ohlcv
+            return timestamps[present], ohlcv[:, present]
+
+        key = str(symbol)
+        data = [
+            mf.get_symbol(symbol)
+            for mf in (frame[0] if isinstance(frame, tuple) else frame for frame in self._frames)
+            if key in mf.ohlcv
+        ]
+        timestamps = np.array([to_epoch_seconds(x[0]) for x in data], dtype=np.int64)
+        ohlcv = np.array([[x[1].open, x[1].high, x[1].low, x[1].close, x[1].volume] for x in data], dtype=np.float64)
+        return timestamps, ohlcv.reshape(-1, len(FIELDS)).T
 
     def get_all_symbol_data(self, symbol: Symbol) -> List[Tuple[datetime, OHLCV]]:
         data: List[Tuple[datetime, OHLCV]] = []
 
+        if self._columns is not None:
+            timestamps, ohlcv = self.get_symbol_columns(symbol)
+            for timestamp, v in zip(timestamps.tolist(), ohlcv.T.tolist()):
+                data.append((
+                    datetime.fromtimestamp(timestamp),
+                    OHLCV(open=v[0], high=v[1], low=v[2], close=v[3], volume=v[4]),
+                ))
+            return data
+
+        key = str(symbol)
         for frame in self._frames:
-            if isinstance(frame, MarketFrame):
-                data += [frame.get_symbol(symbol)]
-            elif isinstance(frame, tuple) and isinstance(frame[0], MarketFrame):
-                data += [frame[0].get_symbol(symbol)]
-            
+            mf = frame[0] if isinstance(frame, tuple) else frame
+            if key in mf.ohlcv:
+                timestamp, candle = mf.get_symbol(symbol)
+                data.append((timestamp, candle if isinstance(candle, OHLCV) else candle.to_model()))
+
         return data
 
-    def add_frame(self, frame: MarketFrame | Tuple[MarketFrame, OutputFrame]) -> None:
-        self._frames.append(frame)
+    def add_frame(self, frame: AnyFrame | Tuple[AnyFrame, AnyOutput]) -> None:
+        if self._columns is None:
+            self._frames.append(frame)
+            return
+
+        mf = frame[0] if isinstance(frame, tuple) else frame
+        if isinstance(frame, tuple):
+            self._outputs[len(self._columns)] = frame[1]
+        self._columns.append(
+            mf.timestamp,
+            {key: (o.open, o.high, o.low, o.close, o.volume) for key, o in mf.ohlcv.items()},
+        )
 
     # https://plotly.com/python-api-reference/generated/plotly.html?highlight=update#plotly.basedatatypes.BaseFigure.add_trace
+    # Candles and function plots are decimated to about max_points points (None keeps all of them);
+    # transactions and logs are drawn as one marker trace each instead of a line per event.
+    # filename writes the figure as static HTML (.html) or an image (.png etc., needs kaleido).
     def plot_for_symbol(
             self,
             symbol: Symbol,
@@ -115,146 +315,198 @@ class Market:
             include_logs=True,
             include_transactions=True,
             include_function_plots=True,
+            max_points: Optional[int]=MAX_POINTS,
+            filename: Optional[str]=None,
         ) -> go.Figure:
-        symbol_ohlcv = self.get_all_symbol_data(symbol)
-
-        timestamps = [x[0] for x in symbol_ohlcv]
+        epoch_timestamps, ohlcv = self.get_symbol_columns(symbol)
 
-        opens = [x[1].open for x in symbol_ohlcv]
-        highs = [x[1].high for x in symbol_ohlcv]
-        lows = [x[1].low for x in symbol_ohlcv]
-        closes = [x[1].close for x in symbol_ohlcv]
+        candle_timestamps, candles = epoch_timestamps, ohlcv
+        if max_points is not None:
+            candle_timestamps, candles = decimate_candles(epoch_timestamps, ohlcv, max_points)
+        timestamps = [datetime.fromtimestamp(x) for x in candle_timestamps.tolist()]
 
-        fig = go.Figure(data=[go.Candlestick(x=timestamps, open=opens, high=highs, low=lows, close=closes)])
+        fig = go.Figure(data=[go.Candlestick(
+            x=timestamps, open=candles[0], high=candles[1], low=candles[2], close=candles[3], name=str(symbol),
+        )])
 
         logs: List[Log] = []
         transactions: List[Transaction] = []
-        function_plots: List[FunctionPlot] = []
-
-        for frame in self._frames:
-            if include_logs and isinstance(frame, tuple) and isinstance(frame[1], OutputFrame):
-                logs += frame[1].logs
-            if include_transactions and isinstance(frame, tuple) and isinstance(frame[1], OutputFrame):
-                transactions += frame[1].transactions
-            if include_function_plots and isinstance(frame, tuple) and isinstance(frame[1], OutputFrame):
-                function_plots += frame[1].function_plots
-
-        for log in logs:
-            self.__plot_log(fig, symbol, log)
-
-        for transaction in transactions:
-            self.__plot_transaction(fig, symbol, transaction)
-
-        for function_plot in function_plots:
-            self.__plot_function_plot(fig, symbol, function_plot)
+        function_plots: Dict[str, Tuple[str, List[datetime], List[float]]] = {}  # label -> (color, x, y)
+
+        for output_frame in self.__output_frames():
+            if include_logs:
+                logs += [log for log in output_frame.logs if not log.symbol or log.symbol == symbol]
+            if include_transactions:
+                transactions += [t for t in output_frame.transactions if t.symbol == symbol]
+            if include_function_plots:
+                for function_plot in output_frame.function_plots:
+                    if function_plot.symbol and function_plot.symbol != symbol:
+                        continue
+                    _, x, y = function_plots.setdefault(function_plot.label, (function_plot.color, [], []))
+                    x.append(function_plot.timestamp)
+                    y.append(function_plot.value)
+
+        for label, (color, x, y) in function_plots.items():
+            self.__plot_function_plot(fig, label, color, x, y, max_points)
+
+        if transactions:
+            self.__plot_transactions(fig, transactions, epoch_timestamps, ohlcv[3])
+
+        if logs:
+            self.__plot_logs(fig, logs, epoch_timestamps, ohlcv[1])
+
+        fig.update_layout(xaxis_rangeslider_visible=False)
+
+        if filename is not None:
+            if filename.endswith(".html"):
+                fig.write_html(filename, include_plotlyjs="cdn")
+            else:
+                # plotly renders static images through kaleido, which isn't a dependency
+                if find_spec("kaleido") is None:
+                    raise Exception(f"Saving a plot as {path.splitext(filename)[1] or 'an image'} needs the kaleido package (pip install kaleido); save it as .html instead")
+                fig.write_image(filename)
 
         if display:
             fig.show()
 
         return fig
 
-    def __plot_log(self, fig: go.Figure, symbol: Optional[Symbol], log: Log) -> None:
-        if log.symbol and symbol != log.symbol:
-            return
-
-        annotation_text: Optional[str] = None
-
-        if log.type == LogType.STRING:
-            annotation_text = typing.cast(str, log.value)
-        elif log.type == LogType.JSON:
-            annotation_text = "`json`" + json.dumps(typing.cast(dict, log.value))
-
-        fig.add_vline(
-            x=int(log.timestamp.timestamp() * 1000),
-            line_width=1,
-            line_dash="dash",
-            line_color="black",
-            annotation_text=annotation_text,
-        )
-
-    def __plot_transaction(self, fig: go.Figure, symbol: Optional[Symbol], transaction: Transaction) -> None:
-        if transaction.symbol != symbol:
-            return
-
-        color: str
-
-        if transaction.operation == OperationEnum.BUY:
-            color = "green"
-        elif transaction.operation == OperationEnum.SELL:
-            color = "red"
-        else:
-            color = "blue"
-
-        fig.add_vline(
-            x=int(transaction.timestamp.timestamp() * 1000),
-            line_width=1,
-            line_color=color,
-            annotation_text=transaction.notes or "",
-            annotation_align="left",
-        )
-
-    def __plot_function_plot(self, fig: go.Figure, symbol: Optional[Symbol], function_plot: FunctionPlot) -> None:  # doesn't work yet, probably best to add to a list and draw all at once at the end
-        pass
-
-        # if function_plot.symbol and function_plot.symbol != symbol:
-        #     return
-        # fig.add_trace(go.Scatter(
-        #     x=int(function_plot.timestamp.timestamp() * 1000),
-        #     y=function_plot.value,
-        #     name=function_plot.label,
-        #     # line_width=1,
-        #     # line_dash="dash",
-        #     line=go.scatter.Line(color=function_plot.color),
-        #     # line_color=function_plot.color,
-        # ))
-
-    # For format="csv", filename is a directory where the CSV files will be saved
+    # Marker y positions: the value of `series` at the last candle at or before each timestamp
+    def __values_at(self, timestamps: List[datetime], epoch_timestamps: np.ndarray, series: np.ndarray) -> np.ndarray:
+        if len(series) == 0:
+            return np.zeros(len(timestamps))
+        indices = np.searchsorted(epoch_timestamps, [t.timestamp() for t in timestamps], side="right") - 1
+        return series[np.clip(indices, 0, len(series) - 1)]
+
+    def __plot_logs(self, fig: go.Figure, logs: List[Log], epoch_timestamps: np.ndarray, highs: np.ndarray) -> None:
+        x = [log.timestamp for log in logs]
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=self.__values_at(x, epoch_timestamps, highs),
+            mode="markers",
+            name="Logs",
+            marker=go.scatter.Marker(symbol="circle-open", color="black", size=8),
+            hovertext=[log.value_str() for log in logs],
+            hoverinfo="x+text",
+        ))
+
+    def __plot_transactions(self, fig: go.Figure, transactions: List[Transaction], epoch_timestamps: np.ndarray, closes: np.ndarray) -> None:
+        colors = {OperationEnum.BUY.value: "green", OperationEnum.SELL.value: "red"}
+        markers = {OperationEnum.BUY.value: "triangle-up", OperationEnum.SELL.value: "triangle-down"}
+
+        x = [t.timestamp for t in transactions]
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=self.__values_at(x, epoch_timestamps, closes),
+            mode="markers",
+            name="Transactions",
+            marker=go.scatter.Marker(
+                color=[colors.get(t.operation.value, "blue") for t in transactions],
+                symbol=[markers.get(t.operation.value, "circle") for t in transactions],
+                size=10,
+            ),
+            hovertext=[f"{t.operation.value}{f' ({t.notes})' if t.notes else ''}" for t in transactions],
+            hoverinfo="x+y+text",
+        ))
+
+    def __plot_function_plot(self, fig: go.Figure, label: str, color: str, x: List[datetime], y: List[float], max_points: Optional[int]) -> None:
+        xs, ys = np.array(x, dtype=object), np.array(y, dtype=np.float64)
+        if max_points is not None:
+            xs, ys = decimate_series(xs, ys, max_points)
+
+        fig.add_trace(go.Scatter(
+            x=xs,
+            y=ys,
+            mode="lines",
+            name=label,
+            line=go.scatter.Line(color=color),
+        ))
+
+    def __output_frames(self) -> List[AnyOutput]:
+        if self._columns is not None:
+            return [self._outputs[i] for i in sorted(self._outputs)]
+        return [frame[1] for frame in self._frames if isinstance(frame, tuple) and isinstance(frame[1], (OutputFrame, OutputRecord))]
+
+    # For format="csv", filename is a directory where the CSV files will be saved.
+    # For format="bin", filename is a single memory-mappable file (see models.binary) holding market frames only.
     def save_to_file(self, filename: str, format="csv") -> None:
-        if format == "csv":
+        if format == "bin":
+            if self.__output_frames():
+                raise NotImplementedError("Output frames can't be saved in the bin format")
+            write_market_file(filename, self.columns())
+        elif format == "csv":
             if not path.exists(filename):
                 mkdir(filename)
 
+            for output_frame in self.__output_frames():
+                if isinstance(output_frame, OutputRecord):
+                    output_frame = output_frame.to_model()
+                with open(path.join(filename, f"{int(output_frame.timestamp.timestamp())}.of.csv"), "w") as f:
+                    f.write(output_frame.csv_header() + "\n")
+                    for line in output_frame.csv():
+                        f.write(line + "\n")
+
+            if self._columns is not None:
+                self.__save_columns_csv(filename, self._columns)
+                return
+
             for frame in self._frames:
-                if isinstance(frame, tuple) and isinstance(frame[1], OutputFrame):
-                    with open(path.join(filename, f"{int(frame[1].timestamp.timestamp())}.of.csv"), "w") as f:
-                        f.write(frame[1].csv_header() + "\n")
-                        for line in frame[1].csv():
-                            f.write(line + "\n")
-                if isinstance(frame, MarketFrame) or (isinstance(frame, tuple) and isinstance(frame[0], MarketFrame)):
-                    mf = frame[0] if isinstance(frame, tuple) else frame
+                mf = frame[0] if isinstance(frame, tuple) else frame
+                if isinstance(mf, Frame):
+                    mf = mf.to_model()
+                if isinstance(mf, MarketFrame):
                     with open(path.join(filename, f"{int(mf.timestamp.timestamp())}.mf.csv"), "w") as f:
                         f.write(f"{mf.csv_header()}\n")
                         for line in mf.csv():
                             f.write(line + "\n")
 
         else:
-            raise NotImplementedError("Only CSV format is supported")
-
-    def import_from_file(self, filename: str, format="csv") -> None:
-        if format == "csv":
-            self._frames = []
-
-            files = listdir(filename)
-            sorted_files = sorted(files, key=lambda x: int(x.split(".")[0]))
-
-            for file in sorted_files:
-                with open(path.join(filename, file), "r") as f:
-                    lines = f.readlines()
-                    timestamp_str = lines[1].split(",")[0]
-                    timestamp = int(timestamp_str) if len(timestamp_str) == 10 else int(timestamp_str) // 1000
-                    ohlcv = {}
-                    for line in lines[1:]:
-                        parts = line.split(",")
-                        ohlcv[parts[1]] = OHLCV(
-                            open=float(parts[2]),
-                            high=float(parts[3]),
-                            low=float(parts[4]),
-                            close=float(parts[5]),
-                            volume=float(parts[6]),
-                        )
-                    try:
-                        self._frames.append(MarketFrame(timestamp=datetime.fromtimestamp(timestamp), ohlcv=ohlcv))
-                    except Exception as e:
-                        print(e)
+            raise NotImplementedError("Only CSV and bin formats are supported")
+
+    def __save_columns_csv(self, filename: str, columns: MarketColumns) -> None:
+        header = MarketFrame(timestamp=datetime.fromtimestamp(0), ohlcv={}).csv_header()
+        rows = {key: columns.ohlcv(key).T.tolist() for key in columns.symbols()}
+
+        for i, timestamp in enumerate(columns.timestamps().tolist()):
+            with open(path.join(filename, f"{timestamp}.mf.csv"), "w") as f:
+                f.write(f"{header}\n")
+                for key, values in rows.items():
+                    o, h, l, c, v = values[i]
+                    if c != c:  # NaN - symbol missing from this frame
+                        continue
+                    f.write(f"{timestamp},{key},{o},{h},{l},{c},{v}\n")
+
+    # For format="csv", only `symbols` and frames in [since, until) are loaded; other formats load everything
+    def import_from_file(
+            self,
+            filename: str,
+            format="csv",
+            symbols: Optional[Iterable[Symbol | str]]=None,
+            since: Optional[datetime | int]=None,
+            until: Optional[datetime | int]=None,
+        ) -> None:
+        if format == "bin":
+            columns = read_market_file(filename)
+            if self._columns is not None:
+                self.__use_columns(columns)
+            else:
+                self._frames = list(frames_from_columns(columns))
+        elif format == "csv":
+            columns = read_csv_columns(filename, symbols=symbols, since=since, until=until)
+            if self._columns is not None:
+                self.__use_columns(columns)
+            else:
+                self._frames = list(frames_from_columns(columns))
         else:
-            raise NotImplementedError("Only CSV format is supported")
\ No newline at end of file
+            raise NotImplementedError("Only CSV and bin formats are supported")
+
+    # Frames of a CSV market directory one at a time, without loading the whole directory
+    @staticmethod
+    def stream_from_file(
+            filename: str,
+            symbols: Optional[Iterable[Symbol | str]]=None,
+            since: Optional[datetime | int]=None,
+            until: Optional[datetime | int]=None,
+        ) -> Iterator[Frame]:
+        for timestamp, values in iter_csv_frames(filename, symbols=symbols, since=since, until=until):
+            yield frame_from_values(timestamp, values)
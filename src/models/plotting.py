@@ -0,0 +1,57 @@
+from typing import Tuple
+
+import numpy as np
+
+# Plotly gets slow (and its HTML huge) well before it runs out of pixels to draw on, so
+# series are decimated to about this many points by default
+MAX_POINTS = 2000
+
+
+def _bucket_starts(length: int, max_points: int) -> np.ndarray:
+    size = -(-length // max_points)  # ceil
+    return np.arange(0, length, size)
+
+
+# Merges runs of consecutive candles into one candle each, keeping every high and low
+# extreme: (5, n) -> (5, <= max_points). Timestamps are the first of each run.
+def decimate_candles(timestamps: np.ndarray, ohlcv: np.ndarray, max_points=MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    length = len(timestamps)
+    if length <= max_points:
+        return timestamps, ohlcv
+
+    starts = _bucket_starts(length, max_points)
+    ends = np.append(starts[1:], length) - 1
+
+    decimated = np.empty((ohlcv.shape[0], len(starts)))
+    decimated[0] = ohlcv[0, starts]
+    decimated[1] = np.fmax.reduceat(ohlcv[1], starts)  # fmax/fmin skip missing (NaN) candles
+    decimated[2] = np.fmin.reduceat(ohlcv[2], starts)
+    decimated[3] = ohlcv[3, ends]
+    decimated[4] = np.add.reduceat(np.nan_to_num(ohlcv[4]), starts)
+    return timestamps[starts], decimated
+
+
+# Keeps the minimum and maximum of every run of points, in the order they occur, so
+# spikes survive the decimation: n -> <= max_points points (two per run)
+def decimate_series(x: np.ndarray, y: np.ndarray, max_points=MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    length = len(x)
+    if length <= max_points:
+        return x, y
+
+    starts = _bucket_starts(length, max(max_points // 2, 1))
+    filled = np.nan_to_num(y, nan=np.inf)
+    lowest = np.minimum.reduceat(filled, starts)
+    filled = np.nan_to_num(y, nan=-np.inf)
+    highest = np.maximum.reduceat(filled, starts)
+
+    # Index of the first minimum and maximum in each run
+    run = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, length)))
+    positions = np.arange(length)
+    low_index = np.full(len(starts), length)
+    high_index = np.full(len(starts), length)
+    np.minimum.at(low_index, run, np.where(y == lowest[run], positions, length))
+    np.minimum.at(high_index, run, np.where(y == highest[run], positions, length))
+
+    keep = np.unique(np.concatenate([low_index, high_index]))
+    keep = keep[keep < length]  # runs that were all NaN
+    return x[keep], y[keep]
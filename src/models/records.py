@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models.columnar import MarketColumns
+from models.symbol import Symbol
+from models.transaction import OperationEnum, Transaction
+
+if TYPE_CHECKING:
+    from models.market import OHLCV, FunctionPlot, Log, MarketFrame, OutputFrame
+
+# Lightweight hot-path counterparts of the pydantic models: one slotted object per record
+# and no validation. Field names match the models, so code that only reads them (the
+# indicator engine, strategies, brokers, the journal) accepts either. Providers, the market
+# and strategies build records; convert at the I/O boundary with from_model()/to_model().
+# to_model() validates normally, as pydantic v2's model_construct turned out slower than
+# validation (see scripts/benchmark_candles.py).
+#
+# models.market builds records, so the market models are imported on conversion only.
+
+
+@dataclass(slots=True)
+class Candle:
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+    @classmethod
+    def from_model(cls, ohlcv: "OHLCV") -> "Candle":
+        return cls(ohlcv.open, ohlcv.high, ohlcv.low, ohlcv.close, ohlcv.volume)
+
+    def to_model(self) -> "OHLCV":
+        from models.market import OHLCV
+
+        return OHLCV(
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            close=self.close,
+            volume=self.volume,
+        )
+
+
+@dataclass(slots=True)
+class Frame:
+    timestamp: datetime
+    ohlcv: Dict[str, Candle]
+
+    def get_symbol(self, symbol: Symbol) -> Tuple[datetime, Candle]:
+        return self.timestamp, self.ohlcv[str(symbol)]
+
+    @classmethod
+    def from_model(cls, frame: "MarketFrame") -> "Frame":
+        return cls(
+            frame.timestamp,
+            {symbol: Candle.from_model(ohlcv) for symbol, ohlcv in frame.ohlcv.items()},
+        )
+
+    def to_model(self) -> "MarketFrame":
+        from models.market import MarketFrame
+
+        return MarketFrame(
+            timestamp=self.timestamp,
+            ohlcv={symbol: candle.to_model() for symbol, candle in self.ohlcv.items()},
+        )
+
+
+@dataclass(slots=True)
+class TransactionRecord:
+    timestamp: datetime
+    operation: OperationEnum
+    symbol: Symbol
+    notes: Optional[str] = None
+
+    @classmethod
+    def from_model(cls, transaction: Transaction) -> "TransactionRecord":
+        return cls(transaction.timestamp, transaction.operation, transaction.symbol, transaction.notes)
+
+    def to_model(self) -> Transaction:
+        return Transaction(
+            timestamp=self.timestamp,
+            operation=self.operation,
+            symbol=self.symbol,
+            notes=self.notes,
+        )
+
+
+@dataclass(slots=True)
+class FunctionPlotRecord:
+    timestamp: datetime
+    label: str
+    value: float
+    color: str
+    symbol: Optional[Symbol] = None
+
+    @classmethod
+    def from_model(cls, function_plot: "FunctionPlot") -> "FunctionPlotRecord":
+        return cls(
+            function_plot.timestamp,
+            function_plot.label,
+            function_plot.value,
+            function_plot.color,
+            function_plot.symbol,
+        )
+
+    def to_model(self) -> "FunctionPlot":
+        from models.market import FunctionPlot
+
+        return FunctionPlot(
+            timestamp=self.timestamp,
+            label=self.label,
+            value=self.value,
+            color=self.color,
+            symbol=self.symbol,
+        )
+
+
+# Logs are rare, so they stay pydantic Log models
+@dataclass(slots=True)
+class OutputRecord:
+    timestamp: datetime
+    logs: List["Log"]
+    transactions: List[TransactionRecord]
+    function_plots: List[FunctionPlotRecord]
+
+    @classmethod
+    def from_model(cls, output: "OutputFrame") -> "OutputRecord":
+        return cls(
+            output.timestamp,
+            list(output.logs),
+            [TransactionRecord.from_model(t) for t in output.transactions],
+            [FunctionPlotRecord.from_model(f) for f in output.function_plots],
+        )
+
+    def to_model(self) -> "OutputFrame":
+        from models.market import OutputFrame
+
+        return OutputFrame(
+            timestamp=self.timestamp,
+            logs=self.logs,
+            transactions=[t.to_model() for t in self.transactions],
+            function_plots=[f.to_model() for f in self.function_plots],
+        )
+
+
+def frame_from_values(timestamp: int, values: Dict[str, np.ndarray]) -> Frame:
+    return Frame(
+        datetime.fromtimestamp(timestamp),
+        {key: Candle(*row.tolist()) for key, row in values.items()},
+    )
+
+
+# Iterates a market's candles as Frame records without building any pydantic models
+def frames_from_columns(columns: MarketColumns) -> Iterator[Frame]:
+    symbols = columns.symbols()
+    blocks = {symbol: columns.ohlcv(symbol).T.tolist() for symbol in symbols}
+
+    for i, timestamp in enumerate(columns.timestamps().tolist()):
+        candles: Dict[str, Candle] = {}
+        for symbol in symbols:
+            values = blocks[symbol][i]
+            if values[3] == values[3]:  # NaN - symbol missing from this frame
+                candles[symbol] = Candle(*values)
+        yield Frame(datetime.fromtimestamp(timestamp), candles)
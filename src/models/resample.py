@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.columnar import FIELDS, MarketColumns, to_epoch_seconds
+from models.market import AnyFrame, Market
+from models.records import Candle, Frame
+
+
+# Builds an N-minute market from a finer one (1m by default). Any N works, including ones
+# exchanges don't offer (7m); buckets are aligned to multiples of N minutes since the epoch
+# like exchange candles. Buckets at either end of the data that are missing source candles
+# (the data starts mid-bucket or the last bucket is still forming) are dropped unless
+# include_partial is set; gaps inside the data are kept.
+def resample(
+    market: Market,
+    timeframe_minutes: int,
+    source_minutes=1,
+    include_partial=False,
+) -> Market:
+    if timeframe_minutes % source_minutes != 0:
+        raise Exception("timeframe_minutes must be a multiple of source_minutes")
+
+    columns = market.columns()
+    timestamps = columns.timestamps()
+    if len(timestamps) == 0:
+        return Market(columnar=True)
+
+    step = timeframe_minutes * 60
+    buckets = timestamps // step
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1) != 0)
+    ends = np.append(starts[1:], len(buckets))
+
+    keep = np.ones(len(starts), dtype=bool)
+    if not include_partial:
+        expected = timeframe_minutes // source_minutes
+        counts = ends - starts
+        keep[0] = counts[0] == expected
+        keep[-1] = counts[-1] == expected
+
+    positions = np.arange(len(timestamps))
+    data: Dict[str, np.ndarray] = {}
+    for symbol in columns.symbols():
+        ohlcv = columns.ohlcv(symbol)
+        valid = ~np.isnan(ohlcv[3])
+
+        first = np.minimum.reduceat(np.where(valid, positions, len(positions)), starts)
+        last = np.maximum.reduceat(np.where(valid, positions, -1), starts)
+        present = last >= 0
+
+        block = np.full((len(FIELDS), len(starts)), np.nan)
+        block[0, present] = ohlcv[0, first[present]]
+        block[1] = np.fmax.reduceat(ohlcv[1], starts)
+        block[2] = np.fmin.reduceat(ohlcv[2], starts)
+        block[3, present] = ohlcv[3, last[present]]
+        block[4] = np.add.reduceat(np.where(valid, ohlcv[4], 0.0), starts)
+        block[4, ~present] = np.nan
+
+        data[symbol] = np.ascontiguousarray(block[:, keep])
+
+    return Market.from_columns(MarketColumns(
+        timestamps=np.ascontiguousarray(buckets[starts][keep] * step),
+        data=data,
+    ))
+
+
+class CandleAggregator:
+    # Incremental counterpart of resample() for live data: feed it source frames in order and
+    # it returns each completed N-minute frame as soon as its last source candle arrives (or,
+    # if that candle never comes, when the first frame of the next bucket does). Like
+    # resample(), a first bucket joined mid-way is dropped unless include_partial is set.
+    _timeframe_minutes: int
+    _source_minutes: int
+    _include_partial: bool
+    _bucket: Optional[int] = None
+    _bucket_frames: int = 0
+    _started = False
+    _candles: Dict[str, List[float]]
+
+    def __init__(self, timeframe_minutes: int, source_minutes=1, include_partial=False) -> None:
+        if timeframe_minutes % source_minutes != 0:
+            raise Exception("timeframe_minutes must be a multiple of source_minutes")
+
+        self._timeframe_minutes = timeframe_minutes
+        self._source_minutes = source_minutes
+        self._include_partial = include_partial
+        self._candles = {}
+
+    @property
+    def timeframe_minutes(self) -> int:
+        return self._timeframe_minutes
+
+    def update(self, frame: AnyFrame) -> List[Frame]:
+        step = self._timeframe_minutes * 60
+        timestamp = to_epoch_seconds(frame.timestamp)
+        bucket = timestamp // step
+
+        completed: List[Frame] = []
+        if self._bucket is not None and bucket != self._bucket:
+            completed += self.__flush()
+
+        self._bucket = bucket
+        self._bucket_frames += 1
+        for symbol, ohlcv in frame.ohlcv.items():
+            candle = self._candles.get(symbol)
+            if candle is None:
+                self._candles[symbol] = [ohlcv.open, ohlcv.high, ohlcv.low, ohlcv.close, ohlcv.volume]
+            else:
+                candle[1] = max(candle[1], ohlcv.high)
+                candle[2] = min(candle[2], ohlcv.low)
+                candle[3] = ohlcv.close
+                candle[4] += ohlcv.volume
+
+        # The last source candle of the bucket closes it
+        if timestamp + self._source_minutes * 60 >= (bucket + 1) * step:
+            completed += self.__flush()
+
+        return completed
+
+    def __flush(self) -> List[Frame]:
+        if self._bucket is None or not self._candles:
+            return []
+
+        first_partial = not self._started and self._bucket_frames < self._timeframe_minutes // self._source_minutes
+        self._started = True
+        if first_partial and not self._include_partial:
+            self.__reset()
+            return []
+
+        frame = Frame(
+            datetime.fromtimestamp(self._bucket * self._timeframe_minutes * 60),
+            {symbol: Candle(*c) for symbol, c in self._candles.items()},
+        )
+        self.__reset()
+        return [frame]
+
+    def __reset(self) -> None:
+        self._bucket = None
+        self._bucket_frames = 0
+        self._candles = {}
@@ -1,46 +1,157 @@
-from typing import Protocol, TypeVar
+from functools import cached_property
+from typing import Any, Dict, List, Optional, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Symbol(BaseModel):
-    def __str__(self) -> str:
+    # Symbols are immutable; the string key is computed once and cached on the instance,
+    # so hashing and str() are cheap dict lookups.
+    # (cached_property rather than PrivateAttr: pydantic's private attribute access is
+    # several times slower than formatting the string again)
+    model_config = ConfigDict(frozen=True)
+
+    @cached_property
+    def key(self) -> str:
         raise NotImplementedError
-    
+
+    # Small integer assigned by the registry, stable for the lifetime of the process
+    @cached_property
+    def id(self) -> int:
+        return registry.id_of(self)
+
+    def __str__(self) -> str:
+        return self.key
+
     def __eq__(self, other) -> bool:
-        raise NotImplementedError
+        if self is other:
+            return True
+        if not isinstance(other, Symbol):
+            return NotImplemented
+        return self.key == other.key
 
     def __hash__(self) -> int:
-        return hash(self.__str__())
+        return hash(self.key)
+
+    # Ids are per process, so they aren't carried over into pickles (e.g. sweep workers)
+    def __getstate__(self) -> Dict[Any, Any]:
+        state = super().__getstate__()
+        state["__dict__"] = {k: v for k, v in state["__dict__"].items() if k != "id"}
+        return state
 
 T = TypeVar("T", bound=Symbol)
 
+
+class SymbolRegistry:
+    # One canonical instance per distinct symbol, numbered in order of registration
+    _by_key: Dict[str, Symbol]
+    _ids: Dict[str, int]
+    _symbols: List[Symbol]
+
+    def __init__(self) -> None:
+        self._by_key = {}
+        self._ids = {}
+        self._symbols = []
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def intern(self, symbol: T) -> T:
+        canonical = self._by_key.get(symbol.key)
+        if canonical is None:
+            self._by_key[symbol.key] = symbol
+            self._ids[symbol.key] = len(self._symbols)
+            self._symbols.append(symbol)
+            return symbol
+        return canonical  # type: ignore
+
+    def id_of(self, symbol: Symbol) -> int:
+        self.intern(symbol)
+        return self._ids[symbol.key]
+
+    def lookup(self, key: str) -> Optional[Symbol]:
+        return self._by_key.get(key)
+
+    def get(self, id: int) -> Symbol:
+        return self._symbols[id]
+
+
+registry = SymbolRegistry()
+
+
 class Pair(Symbol):
     a: str
     b: str
 
-    # def __init__(self, a: str, b: str) -> None:
-    #     self.a = a
-    #     self.b = b
-    
-    def __str__(self):
-        return f"{self.a}/{self.b}"
+    # Returns the interned instance, creating it on first use
+    @classmethod
+    def of(cls, a: str, b: str) -> "Pair":
+        canonical = registry.lookup(f"{a}/{b}")
+        if isinstance(canonical, Pair):
+            return canonical
+        return registry.intern(cls(a=a, b=b))
 
-    def __eq__(self, other) -> bool:
-        return self.a == other.a and self.b == other.b
-    
-    def __hash__(self) -> int:
-        return hash(self.__str__())
+    @cached_property
+    def key(self) -> str:
+        return f"{self.a}/{self.b}"
 
 
 class Ticker(Symbol):
     code: str
 
+    # Symbols are equal by key, so a ticker can't look like a pair ("BTC/USDT" == Pair.of("BTC", "USDT"))
     def __init__(self, code: str) -> None:
-        self.code = code
-    
-    def __str__(self):
+        if "/" in code:
+            raise Exception(f"Ticker codes can't contain '/', use Pair for {code}")
+        super().__init__(code=code)
+
+    @classmethod
+    def of(cls, code: str) -> "Ticker":
+        canonical = registry.lookup(code)
+        if isinstance(canonical, Ticker):
+            return canonical
+        return registry.intern(cls(code))
+
+    @cached_property
+    def key(self) -> str:
         return self.code
-    
-    def __eq__(self, other) -> bool:
-        return self.code == other.code
+
+
+# A pair on a specific exchange, for providers reading several venues: "binance:BTC/USDT"
+class VenuePair(Pair):
+    venue: str
+
+    @classmethod
+    def of(cls, venue: str, a: str, b: str) -> "VenuePair":
+        canonical = registry.lookup(f"{venue}:{a}/{b}")
+        if isinstance(canonical, VenuePair):
+            return canonical
+        return registry.intern(cls(venue=venue, a=a, b=b))
+
+    @classmethod
+    def on(cls, venue: str, pair: Pair) -> "VenuePair":
+        return cls.of(venue, pair.a, pair.b)
+
+    # The pair without the venue, as the venue itself names it
+    @property
+    def pair(self) -> Pair:
+        return Pair.of(self.a, self.b)
+
+    @cached_property
+    def key(self) -> str:
+        return f"{self.venue}:{self.a}/{self.b}"
+
+
+# Inverse of str(): "binance:BTC/USDT" -> VenuePair, "BTC/USDT" -> Pair, anything else -> Ticker; interned
+def parse_symbol(key: str) -> Symbol:
+    symbol = registry.lookup(key)
+    if symbol is not None:
+        return symbol
+    if ":" in key and "/" in key:
+        venue, pair = key.split(":", 1)
+        a, b = pair.split("/", 1)
+        return VenuePair.of(venue, a, b)
+    if "/" in key:
+        a, b = key.split("/", 1)
+        return Pair.of(a, b)
+    return Ticker.of(key)
@@ -0,0 +1,282 @@
+from dataclasses import dataclass
+from datetime import datetime
+from os import listdir, makedirs, path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from models.market import MarketFrame, OHLCV
+from models.symbol import Symbol
+
+# Timestamps of ticks are unix milliseconds, like the exchanges report them
+TRADE = np.dtype([
+    ("timestamp", np.int64),
+    ("price", np.float64),
+    ("amount", np.float64),  # base asset
+    ("side", np.int8),  # 1 buy, -1 sell, 0 unknown
+])
+
+
+# L2 order book snapshots, best level first
+def book_dtype(depth=10) -> np.dtype:
+    return np.dtype([
+        ("timestamp", np.int64),
+        ("bid_price", np.float64, (depth,)),
+        ("bid_amount", np.float64, (depth,)),
+        ("ask_price", np.float64, (depth,)),
+        ("ask_amount", np.float64, (depth,)),
+    ])
+
+
+CHUNK_SIZE = 1_000_000
+SUFFIX = ".npy"
+
+
+class TickStore:
+    # Append-only store of tick events (TRADE or book_dtype records), one directory per
+    # symbol holding .npy chunks of chunk_size events in time order:
+    #   <directory>/<quoted symbol>/00000000.npy, 00000001.npy, ...
+    # Chunks are written whole and read back memory-mapped, so reading touches only the
+    # chunks (and pages) a time range needs, however many events are stored.
+    _directory: str
+    _pending: Dict[str, List[np.ndarray]]
+    _chunks: Dict[str, List[str]]
+    _last: Dict[str, int]
+
+    def __init__(self, directory: str, dtype: np.dtype=TRADE, chunk_size=CHUNK_SIZE) -> None:
+        self._directory = directory
+        self._dtype = dtype
+        self._chunk_size = chunk_size
+        self._pending = {}
+        self._chunks = {}
+        self._last = {}
+
+        makedirs(directory, exist_ok=True)
+        for name in listdir(directory):
+            if path.isdir(path.join(directory, name)):
+                self.__load(unquote(name))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    def __symbol_directory(self, key: str) -> str:
+        return path.join(self._directory, quote(key, safe=""))
+
+    def __load(self, key: str) -> None:
+        directory = self.__symbol_directory(key)
+        names = sorted(name for name in listdir(directory) if name.endswith(SUFFIX))
+        self._chunks[key] = [path.join(directory, name) for name in names]
+        if names:
+            chunk = self.__open(self._chunks[key][-1])
+            if chunk.dtype != self._dtype:
+                raise Exception(f"Tick store chunks of {key} hold {chunk.dtype}, expected {self._dtype}")
+            self._last[key] = int(chunk["timestamp"][-1])
+
+    def __open(self, filename: str) -> np.ndarray:
+        return np.load(filename, mmap_mode="r")
+
+    def symbols(self) -> List[str]:
+        return sorted(set(self._chunks) | set(self._pending))
+
+    def count(self, symbol: Symbol | str) -> int:
+        key = str(symbol)
+        stored = sum(len(self.__open(filename)) for filename in self._chunks.get(key, []))
+        return stored + sum(len(events) for events in self._pending.get(key, []))
+
+    # Events must come in time order, not before the symbol's last stored event
+    def append(self, symbol: Symbol | str, events: np.ndarray) -> None:
+        key = str(symbol)
+        if events.dtype != self._dtype:
+            events = events.astype(self._dtype)
+        if len(events) == 0:
+            return
+
+        timestamps = events["timestamp"]
+        if np.any(np.diff(timestamps) < 0) or timestamps[0] < self._last.get(key, timestamps[0]):
+            raise Exception(f"Ticks of {key} must be appended in time order")
+        self._last[key] = int(timestamps[-1])
+
+        pending = self._pending.setdefault(key, [])
+        pending.append(events)
+        if sum(len(p) for p in pending) >= self._chunk_size:
+            self.__write(key, final=False)
+
+    def flush(self) -> None:
+        for key in list(self._pending):
+            self.__write(key, final=True)
+
+    # Writes the pending events as full chunks; the remainder stays pending unless `final`
+    def __write(self, key: str, final: bool) -> None:
+        pending = self._pending.pop(key, [])
+        if not pending:
+            return
+        events = np.concatenate(pending)
+
+        directory = self.__symbol_directory(key)
+        makedirs(directory, exist_ok=True)
+        chunks = self._chunks.setdefault(key, [])
+
+        start = 0
+        while len(events) - start >= self._chunk_size or (final and start < len(events)):
+            filename = path.join(directory, f"{len(chunks):08d}{SUFFIX}")
+            np.save(filename, events[start:start + self._chunk_size])
+            chunks.append(filename)
+            start += self._chunk_size
+
+        if start < len(events):
+            self._pending[key] = [events[start:]]
+
+    # Memory-mapped chunks of the symbol's events in [since, until) (unix milliseconds), in
+    # time order; chunks outside the range are skipped without being read
+    def read(self, symbol: Symbol | str, since: Optional[int]=None, until: Optional[int]=None) -> Iterator[np.ndarray]:
+        for filename in self._chunks.get(str(symbol), []):
+            chunk = self.__open(filename)
+            timestamps = chunk["timestamp"]
+            if until is not None and timestamps[0] >= until:
+                return
+            if since is not None and timestamps[-1] < since:
+                continue
+
+            start = int(np.searchsorted(timestamps, since)) if since is not None else 0
+            end = int(np.searchsorted(timestamps, until)) if until is not None else len(chunk)
+            if start < end:
+                yield chunk[start:end]
+
+
+@dataclass(slots=True)
+class TickBatch:
+    # Events of several symbols merged in time order; symbol[i] indexes `symbols` for events[i]
+    symbols: List[str]
+    symbol: np.ndarray
+    events: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+# k-way merge of per-symbol event streams (each in time order) into TickBatches in time
+# order. Merges a block at a time rather than an event at a time: every stream offers
+# its next batch_size events, and everything up to the earliest of their last timestamps
+# is safe to emit, since no stream can still produce anything earlier. At most
+# len(streams) * batch_size events are held at once.
+def merge_streams(streams: Dict[str, Iterator[np.ndarray]], batch_size=65536) -> Iterator[TickBatch]:
+    symbols = list(streams)
+    iterators = [iter(stream) for stream in streams.values()]
+    heads: List[Optional[np.ndarray]] = [None] * len(iterators)
+
+    def refill(i: int) -> None:
+        while heads[i] is None or len(heads[i]) == 0:
+            block = next(iterators[i], None)
+            if block is None:
+                heads[i] = None
+                return
+            heads[i] = block
+
+    for i in range(len(iterators)):
+        refill(i)
+
+    while True:
+        active = [i for i, head in enumerate(heads) if head is not None]
+        if not active:
+            return
+
+        # The earliest of the streams' offered last timestamps bounds what can be emitted
+        horizon = min(int(heads[i]["timestamp"][min(batch_size, len(heads[i])) - 1]) for i in active)
+
+        parts: List[np.ndarray] = []
+        owners: List[np.ndarray] = []
+        for i in active:
+            head = heads[i]
+            take = int(np.searchsorted(head["timestamp"][:batch_size], horizon, side="right"))
+            if take == 0:
+                continue
+            parts.append(head[:take])
+            owners.append(np.full(take, i, dtype=np.int32))
+            heads[i] = head[take:]
+            refill(i)
+
+        events = np.concatenate(parts)
+        owner = np.concatenate(owners)
+        order = np.argsort(events["timestamp"], kind="stable")
+        yield TickBatch(symbols, owner[order], events[order])
+
+
+# Builds N-minute candles from merged ticks as they are replayed, so candle strategies
+# can run on tick data. Trades make candles of their prices and amounts; book snapshots
+# make candles of the mid price with no volume. A candle closes when the first tick of a
+# later bucket arrives (or on flush()); symbols without ticks in a bucket are left out of
+# its frame, like missing candles.
+class TickCandleBuilder:
+    _bucket: Optional[int] = None
+    _candles: Dict[str, List[float]]
+
+    def __init__(self, timeframe_minutes=1) -> None:
+        self._step = timeframe_minutes * 60 * 1000
+        self._candles = {}
+
+    def add(self, batch: TickBatch) -> List[MarketFrame]:
+        if len(batch) == 0:
+            return []
+
+        events = batch.events
+        if "price" in events.dtype.names:
+            prices = events["price"]
+            amounts = events["amount"]
+        else:
+            prices = (events["bid_price"][:, 0] + events["ask_price"][:, 0]) / 2
+            amounts = np.zeros(len(events))
+
+        buckets = events["timestamp"] // self._step
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1) != 0)
+        ends = np.append(starts[1:], len(buckets))
+
+        completed: List[MarketFrame] = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            bucket = int(buckets[start])
+            if self._bucket is not None and bucket != self._bucket:
+                completed += self.flush()
+            self._bucket = bucket
+            self.__update(batch.symbols, batch.symbol[start:end], prices[start:end], amounts[start:end])
+        return completed
+
+    # One bucket's ticks, grouped by symbol with reductions instead of a loop over ticks
+    def __update(self, symbols: List[str], owner: np.ndarray, prices: np.ndarray, amounts: np.ndarray) -> None:
+        order = np.argsort(owner, kind="stable")  # keeps time order within each symbol
+        owner, prices, amounts = owner[order], prices[order], amounts[order]
+        starts = np.flatnonzero(np.diff(owner, prepend=-1) != 0)
+        ends = np.append(starts[1:], len(owner)) - 1
+
+        highs = np.maximum.reduceat(prices, starts).tolist()
+        lows = np.minimum.reduceat(prices, starts).tolist()
+        volumes = np.add.reduceat(amounts, starts).tolist()
+        opens = prices[starts].tolist()
+        closes = prices[ends].tolist()
+
+        for j, i in enumerate(owner[starts].tolist()):
+            key = symbols[i]
+            candle = self._candles.get(key)
+            if candle is None:
+                self._candles[key] = [opens[j], highs[j], lows[j], closes[j], volumes[j]]
+            else:
+                candle[1] = max(candle[1], highs[j])
+                candle[2] = min(candle[2], lows[j])
+                candle[3] = closes[j]
+                candle[4] += volumes[j]
+
+    # Closes the current candle, e.g. at the end of a replay
+    def flush(self) -> List[MarketFrame]:
+        if self._bucket is None or not self._candles:
+            return []
+
+        frame = MarketFrame(
+            timestamp=datetime.fromtimestamp(self._bucket * self._step // 1000),
+            ohlcv={
+                key: OHLCV(open=c[0], high=c[1], low=c[2], close=c[3], volume=c[4])
+                for key, c in self._candles.items()
+            },
+        )
+        self._bucket = None
+        self._candles = {}
+        return [frame]
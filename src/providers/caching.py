@@ -0,0 +1,174 @@
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.columnar import FIELDS, MarketColumns, to_epoch_seconds
+from models.market import Market, MarketFrame
+from models.symbol import Symbol
+from providers.provider import Provider
+
+
+class CachingProvider(Provider):
+    # Wraps any provider with a local SQLite candle store indexed by (symbol, timeframe, timestamp).
+    # get_history is answered from disk and only the missing candles are fetched from the wrapped provider.
+    # Closed candles the wrapped provider doesn't have are stored as rows of NULLs, so known
+    # gaps are answered from disk too instead of being fetched again.
+    _provider: Provider
+    _db: sqlite3.Connection
+    _clock: Callable[[], datetime]
+
+    def __init__(
+        self,
+        provider: Provider,
+        filename: str,
+        # "now" for count-based requests; a backtest passes the simulated time
+        clock: Callable[[], datetime]=datetime.now,
+    ) -> None:
+        self._provider = provider
+        self._clock = clock
+        self._db = sqlite3.connect(filename)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS candles ("
+            "symbol TEXT NOT NULL, timeframe INTEGER NOT NULL, timestamp INTEGER NOT NULL, "
+            "open REAL, high REAL, low REAL, close REAL, volume REAL, "
+            "PRIMARY KEY (symbol, timeframe, timestamp)"
+            ") WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # Not cached: the current candle may still be forming
+    async def get_current(self, symbols: List[Symbol], timeframe_minutes: int=1) -> MarketFrame:
+        return await self._provider.get_current(symbols, timeframe_minutes=timeframe_minutes)
+
+    async def get_history(
+        self,
+        symbols: List[Symbol],
+        # use this (count)
+        count: Optional[int]=None,
+        # or this (since+until)
+        since: Optional[datetime]=None,
+        until: Optional[datetime]=None,
+        timeframe_minutes=1,
+    ) -> Market:
+        symbols = list(dict.fromkeys(symbols))
+        grid = self.__grid(count, since, until, timeframe_minutes)
+
+        cached = {symbol: self.__load(str(symbol), timeframe_minutes, grid) for symbol in symbols}
+        missing = {symbol: ~known for symbol, (_, known) in cached.items()}
+
+        fetched_any = False
+        for start, end, run_symbols in self.__missing_runs(grid, missing):
+            market = await self._provider.get_history(
+                symbols=run_symbols,
+                since=datetime.fromtimestamp(int(grid[start])),
+                until=datetime.fromtimestamp(int(grid[end - 1]) + timeframe_minutes * 60),
+                timeframe_minutes=timeframe_minutes,
+            )
+            self.__store_market(market, run_symbols, timeframe_minutes, grid[start:end])
+            fetched_any = True
+
+        if fetched_any:
+            cached = {symbol: self.__load(str(symbol), timeframe_minutes, grid) for symbol in symbols}
+
+        present = np.zeros(len(grid), dtype=bool)
+        for ohlcv, _ in cached.values():
+            present |= ~np.isnan(ohlcv[3])
+
+        return Market.from_columns(MarketColumns(
+            timestamps=grid[present],
+            data={str(symbol): np.ascontiguousarray(ohlcv[:, present]) for symbol, (ohlcv, _) in cached.items()},
+        ))
+
+    # Candle open times (unix seconds) a get_history call should return. `count` candles end
+    # with the last closed one: the candle before the one open at the clock's time, which is
+    # also the last candle a MockCryptoProvider's history has.
+    def __grid(
+        self,
+        count: Optional[int],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        timeframe_minutes: int,
+    ) -> np.ndarray:
+        step = timeframe_minutes * 60
+
+        if since and until:
+            count = int((until - since).total_seconds() // step)
+            start = -(-to_epoch_seconds(since) // step) * step
+        elif count:
+            start = to_epoch_seconds(self._clock()) // step * step - count * step
+        else:
+            raise Exception("Invalid arguments")
+
+        return start + step * np.arange(count, dtype=np.int64)
+
+    # Contiguous index ranges [start, end) of the grid with candles missing, and the symbols missing them
+    def __missing_runs(
+        self,
+        grid: np.ndarray,
+        missing: Dict[Symbol, np.ndarray],
+    ) -> List[Tuple[int, int, List[Symbol]]]:
+        any_missing = np.zeros(len(grid), dtype=bool)
+        for mask in missing.values():
+            any_missing |= mask
+
+        edges = np.diff(any_missing.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        return [
+            (start, end, [symbol for symbol, mask in missing.items() if mask[start:end].any()])
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
+
+    # (5, len(grid)) array aligned with the grid, NaN where there is no candle, and whether
+    # each slot is cached at all (a known gap is cached but NaN)
+    def __load(self, symbol: str, timeframe_minutes: int, grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ohlcv = np.full((len(FIELDS), len(grid)), np.nan)
+        known = np.zeros(len(grid), dtype=bool)
+        if len(grid) == 0:
+            return ohlcv, known
+
+        rows = self._db.execute(
+            "SELECT timestamp, open, high, low, close, volume FROM candles "
+            "WHERE symbol = ? AND timeframe = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+            (symbol, timeframe_minutes, int(grid[0]), int(grid[-1])),
+        ).fetchall()
+        if not rows:
+            return ohlcv, known
+
+        values = np.array(rows, dtype=np.float64)  # NULLs become NaN
+        timestamps = values[:, 0].astype(np.int64)
+        positions = np.searchsorted(grid, timestamps)
+        on_grid = (positions < len(grid)) & (grid[np.minimum(positions, len(grid) - 1)] == timestamps)
+
+        ohlcv[:, positions[on_grid]] = values[on_grid, 1:].T
+        known[positions[on_grid]] = True
+        return ohlcv, known
+
+    # Stores the fetched candles, and a NULL row for every closed slot of `requested` the
+    # provider had no candle for
+    def __store_market(self, market: Market, symbols: List[Symbol], timeframe_minutes: int, requested: np.ndarray) -> None:
+        # Candles that have not closed yet would be served stale later
+        closed_before = to_epoch_seconds(self._clock()) - timeframe_minutes * 60
+        requested = requested[requested <= closed_before]
+
+        for symbol in symbols:
+            timestamps, ohlcv = market.get_symbol_columns(symbol)
+            closed = timestamps <= closed_before
+            timestamps, ohlcv = timestamps[closed], ohlcv[:, closed]
+            gaps = np.setdiff1d(requested, timestamps)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((str(symbol), timeframe_minutes, timestamp, *values) for timestamp, values in zip(timestamps.tolist(), ohlcv.T.tolist())),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO candles (symbol, timeframe, timestamp) VALUES (?, ?, ?)",
+                ((str(symbol), timeframe_minutes, timestamp) for timestamp in gaps.tolist()),
+            )
+        self._db.commit()
@@ -1,60 +1,200 @@
-from typing import List, Optional, Sequence, Tuple
-import typing
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import time
 import ccxt.async_support as ccxt
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from models.market import Market, MarketFrame, OHLCV, OutputFrame
+import numpy as np
+
+from metrics.registry import MetricsRegistry, default_registry
+from models.columnar import MarketColumns
+from models.market import Market
+from models.records import Candle, Frame
+from models.resample import resample
 from models.symbol import Pair
+from models.ticks import TRADE, book_dtype
 from providers.provider import Provider
+from providers.session import SharedSession
+
+
+class FetchReport:
+    symbol: str
+    started_at: datetime
+    elapsed: float  # seconds
+    error: Optional[Exception]
+    # Candles of get_history's timestamps this symbol has no candle for (NaN in the market)
+    missing: int
+
+    def __init__(self, symbol: str, started_at: datetime, elapsed: float, error: Optional[Exception]=None, missing=0) -> None:
+        self.symbol = symbol
+        self.started_at = started_at
+        self.elapsed = elapsed
+        self.error = error
+        self.missing = missing
+
+    def __repr__(self) -> str:
+        status = f"failed: {self.error!r}" if self.error else f"{self.missing} missing" if self.missing else "ok"
+        return f"FetchReport({self.symbol}, {self.elapsed * 1000:.1f}ms, {status})"
 
 
 class CCXTProvider(Provider):
-    def __init__(self, apikey: str, secret: str, verbose=False):
-        self._exchange = ccxt.binance(
+    # Reports of the symbol requests made by the last get_current / get_history call
+    last_fetch_reports: Dict[str, FetchReport]
+    exchange_id: str
+
+    _markets_ttl: float
+    _markets_loaded_at: Optional[float] = None
+    _shared_session: Optional[SharedSession]
+    _session_acquired = False
+    _metrics: MetricsRegistry
+
+    def __init__(
+        self,
+        apikey: str,
+        secret: str,
+        verbose=False,
+        max_concurrency=4,
+        exchange: Optional[ccxt.Exchange]=None,
+        markets_ttl=3600.0,
+        session: Optional[SharedSession]=None,
+        metrics: Optional[MetricsRegistry]=None,
+        # Any ccxt exchange id; ignored when `exchange` is given
+        exchange_id="binance",
+    ):
+        exchange_class = getattr(ccxt, exchange_id, None)
+        if exchange is None and exchange_class is None:
+            raise Exception(f"Unknown ccxt exchange: {exchange_id}")
+
+        # ccxt throttles requests to the exchange rate limit (enableRateLimit); the
+        # semaphore additionally caps how many symbol requests are in flight at once
+        self._exchange = exchange or exchange_class(
             {
                 "apiKey": apikey,
                 "secret": secret,
                 "verbose": verbose,
+                "enableRateLimit": True,
             }
         )
+        # Labels the metrics, so several venues can be told apart
+        self.exchange_id = getattr(self._exchange, "id", None) or exchange_id
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.last_fetch_reports = {}
+
+        self._markets_ttl = markets_ttl
+        self._markets_lock = asyncio.Lock()
+        self._shared_session = session
+        self._metrics = metrics or default_registry
+
+    async def __aenter__(self) -> "CCXTProvider":
+        self.__use_shared_session()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    # The shared session is handed to ccxt lazily because aiohttp sessions must be
+    # created inside a running event loop
+    def __use_shared_session(self) -> None:
+        if self._shared_session is None or self._session_acquired:
+            return
+
+        self._exchange.session = self._shared_session.acquire()
+        self._exchange.own_session = False
+        self._session_acquired = True
+
+    async def close(self) -> None:
+        await self._exchange.close()
+        if self._session_acquired and self._shared_session is not None:
+            self._session_acquired = False
+            await self._shared_session.release()
+
+    # Market metadata is loaded once and then reused until it is older than markets_ttl
+    async def __ensure_markets(self) -> None:
+        self.__use_shared_session()
+
+        if self._markets_loaded_at is not None and time.monotonic() - self._markets_loaded_at < self._markets_ttl:
+            return
+
+        async with self._markets_lock:
+            if self._markets_loaded_at is not None and time.monotonic() - self._markets_loaded_at < self._markets_ttl:
+                return
+            with self._metrics.time("load_markets_seconds", exchange=self.exchange_id):
+                await self._exchange.load_markets(reload=self._markets_loaded_at is not None)
+            self._markets_loaded_at = time.monotonic()
+
+    async def refresh_markets(self) -> None:
+        async with self._markets_lock:
+            self.__use_shared_session()
+            with self._metrics.time("load_markets_seconds", exchange=self.exchange_id):
+                await self._exchange.load_markets(reload=True)
+            self._markets_loaded_at = time.monotonic()
+
+    # `expected` is the exact number of candles the request must return, if any
+    async def __fetch_ohlcv(self, pair: Pair, expected: Optional[int], *args: Any, **kwargs: Any) -> Optional[List[List[Any]]]:
+        symbol = str(pair)
+        started_at = datetime.now()
+        start = time.perf_counter()
+        error: Optional[Exception] = None
+        ohlcv: Optional[List[List[Any]]] = None
+
+        try:
+            async with self._semaphore:
+                # Time the request itself, not the wait for a free slot
+                started_at = datetime.now()
+                start = time.perf_counter()
+                ohlcv = await self._exchange.fetch_ohlcv(symbol, *args, **kwargs)
+            if expected is not None and len(ohlcv) != expected:
+                raise Exception(f"Incorrect amount of data points: {len(ohlcv)} for {symbol}, expected {expected}")
+        except Exception as e:
+            error = e
+            ohlcv = None
+
+        report = FetchReport(symbol, started_at, time.perf_counter() - start, error)
+        self.last_fetch_reports[symbol] = report
+        self._metrics.histogram("fetch_seconds", symbol=symbol, exchange=self.exchange_id).observe(report.elapsed)
+        if error is not None:
+            self._metrics.counter("fetch_errors_total", symbol=symbol, exchange=self.exchange_id).inc()
+        return ohlcv
+
+    # Failed symbols are left out; see last_fetch_reports and the fetch_errors_total metric
+    async def __fetch_all(self, symbols: List[Pair], expected: Optional[int], *args: Any, **kwargs: Any) -> Dict[str, List[List[Any]]]:
+        self.last_fetch_reports = {}
+        pairs = list(dict.fromkeys(symbols))
+
+        results = await asyncio.gather(*[self.__fetch_ohlcv(pair, expected, *args, **kwargs) for pair in pairs])
+
+        failed = [report for report in self.last_fetch_reports.values() if report.error]
+        if len(failed) == len(pairs) and pairs:
+            raise Exception(f"All symbol requests failed: {failed}")
+
+        return {str(pair): ohlcv for pair, ohlcv in zip(pairs, results) if ohlcv is not None}
 
     async def get_current(
         self, symbols: List[Pair], timeframe_minutes=1
-    ) -> MarketFrame:
-        await self._exchange.load_markets()
+    ) -> Frame:
+        await self.__ensure_markets()
 
         timeframe_str = f"{timeframe_minutes}m"
-        since = datetime.now() - timedelta(minutes=timeframe_minutes)
+        # The last closed candle: the one before the candle still forming now
+        step = timeframe_minutes * 60
+        since = datetime.fromtimestamp(int(time.time()) // step * step - step)
         limit = 1
 
-        market_frame = MarketFrame(
-            timestamp=datetime.fromtimestamp(0),
-            ohlcv={},
-        )
+        market_frame = Frame(datetime.fromtimestamp(0), {})
 
-        for pair in symbols:
-            ohlcv = await self._exchange.fetch_ohlcv(
-                str(pair),
-                timeframe_str,
-                int(since.timestamp() * 1000),
-                limit,
-            )
-
-            if len(ohlcv) != 1:
-                raise Exception(
-                    f"Incorrect amount of data points: {len(ohlcv)} for {pair}"
-                )
+        fetched = await self.__fetch_all(
+            symbols,
+            limit,
+            timeframe_str,
+            int(since.timestamp() * 1000),
+            limit,
+        )
 
-            market_frame.timestamp = ohlcv[0][0]
+        for pair, ohlcv in fetched.items():
+            market_frame.timestamp = datetime.fromtimestamp(ohlcv[0][0] / 1000)
 
             # Array<Array<int>> -> A list of candles ordered as timestamp, open, high, low, close, volume
-            market_frame.ohlcv[str(pair)] = OHLCV(
-                open=ohlcv[0][1],
-                high=ohlcv[0][2],
-                low=ohlcv[0][3],
-                close=ohlcv[0][4],
-                volume=ohlcv[0][5],
-            )
+            market_frame.ohlcv[pair] = Candle(*ohlcv[0][1:6])
 
         return market_frame
 
@@ -83,54 +223,102 @@ class CCXTProvider(Provider):
         }
 
         timeframe_str = ALLOWED_TIMEFRAMES.get(timeframe_minutes)
-        if not timeframe_str:
-            raise Exception("Invalid timeframe - see ALLOWED_TIMEFRAMES")
 
+        # Candles opening in [start, end); count-based requests end with the last closed candle
+        step = timeframe_minutes * 60
         if since and until:
-            count = int((until - since).total_seconds() // (timeframe_minutes * 60))
-            print(count)
+            start = -(-int(since.timestamp()) // step) * step
+            end = int(until.timestamp())
         elif count:
-            since = datetime.now() - timedelta(minutes=(count+1)*timeframe_minutes)  # Fetch one more than needed
-            until = datetime.now() - timedelta(minutes=timeframe_minutes)  # Don't include the current frame
+            end = int(datetime.now().timestamp()) // step * step  # the current candle is still forming
+            start = end - count * step
         else:
             raise Exception("Invalid arguments")
 
-        limit = count + 1 
-
-        market_frames = [
-            MarketFrame(
-                timestamp=datetime.fromtimestamp(0),
-                ohlcv={},
-            )
-            for _ in range(count)
-        ]
-
-        await self._exchange.load_markets()
-        for pair in symbols:
-            ohlcv = await self._exchange.fetch_ohlcv(
-                str(pair),
-                timeframe_str,
-                int(since.timestamp() * 1000),
-                limit,
-                params={
-                    "until": int(until.timestamp() * 1000),
-                    "paginate": True,
-                },
+        if not timeframe_str:
+            # Timeframes the exchange doesn't offer are built from 1m candles
+            minute_market = await self.get_history(
+                symbols,
+                since=datetime.fromtimestamp(start),
+                until=datetime.fromtimestamp(end),
+                timeframe_minutes=1,
             )
+            return resample(minute_market, timeframe_minutes)
+
+        limit = max(-(-(end - start) // step), 0)
+
+        await self.__ensure_markets()
+        fetched = await self.__fetch_all(
+            symbols,
+            None,
+            timeframe_str,
+            start * 1000,
+            limit,
+            params={
+                "until": end * 1000 - 1,  # inclusive
+                "paginate": True,
+            },
+        )
+
+        # Candles go straight into the columnar store instead of one pydantic model each.
+        # Pairs may miss candles (e.g. no trades in that minute), so the market's timestamps are
+        # the union of every pair's and a pair's missing candles are NaN.
+        rows: Dict[str, np.ndarray] = {}
+        for pair, ohlcv in fetched.items():
+            # Array<Array<int>> -> A list of candles ordered as timestamp, open, high, low, close, volume
+            values = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+            timestamps = values[:, 0].astype(np.int64) // 1000
+            inside = (timestamps >= start) & (timestamps < end)
+            values, timestamps = values[inside], timestamps[inside]
+            _, unique = np.unique(timestamps, return_index=True)
+            rows[pair] = values[unique]
+
+        grid = np.unique(np.concatenate([values[:, 0].astype(np.int64) // 1000 for values in rows.values()])) if rows else np.zeros(0, dtype=np.int64)
+        data: Dict[str, np.ndarray] = {}
+        for pair, values in rows.items():
+            block = np.full((5, len(grid)), np.nan)
+            block[:, np.searchsorted(grid, values[:, 0].astype(np.int64) // 1000)] = values[:, 1:].T
+            data[pair] = block
+
+            missing = len(grid) - len(values)
+            self.last_fetch_reports[pair].missing = missing
+            if missing:
+                self._metrics.counter("fetch_missing_candles_total", symbol=pair, exchange=self.exchange_id).inc(missing)
+
+        columns = MarketColumns()
+        if len(grid):
+            columns.append_rows(grid, data)
+
+        return Market.from_columns(columns)
 
-            if len(ohlcv) != limit:
-                raise Exception("Not enough data points")
+    # Recent trades of a pair as TRADE records (unix milliseconds), e.g. for a TickStore
+    async def get_trades(self, pair: Pair, since: Optional[datetime]=None, limit: Optional[int]=None) -> np.ndarray:
+        await self.__ensure_markets()
+        with self._metrics.time("fetch_trades_seconds", symbol=str(pair), exchange=self.exchange_id):
+            trades = await self._exchange.fetch_trades(str(pair), int(since.timestamp() * 1000) if since else None, limit)
 
-            for i in range(count):
-                market_frames[i].timestamp = ohlcv[i][0]
+        events = np.zeros(len(trades), dtype=TRADE)
+        events["timestamp"] = [trade["timestamp"] for trade in trades]
+        events["price"] = [trade["price"] for trade in trades]
+        events["amount"] = [trade["amount"] for trade in trades]
+        events["side"] = [1 if trade.get("side") == "buy" else -1 if trade.get("side") == "sell" else 0 for trade in trades]
+        # Exchanges return trades oldest first, but not all of them guarantee it
+        return events[np.argsort(events["timestamp"], kind="stable")]
 
-                # Array<Array<int>> -> A list of candles ordered as timestamp, open, high, low, close, volume
-                market_frames[i].ohlcv[str(pair)] = OHLCV(
-                    open=ohlcv[i][1],
-                    high=ohlcv[i][2],
-                    low=ohlcv[i][3],
-                    close=ohlcv[i][4],
-                    volume=ohlcv[i][5],
-                )
+    # The current L2 order book of a pair as a single book_dtype(depth) record; levels the
+    # book doesn't have are NaN
+    async def get_order_book(self, pair: Pair, depth=10) -> np.ndarray:
+        await self.__ensure_markets()
+        with self._metrics.time("fetch_order_book_seconds", symbol=str(pair), exchange=self.exchange_id):
+            book = await self._exchange.fetch_order_book(str(pair), depth)
 
-        return Market(frames=typing.cast(List[MarketFrame | Tuple[MarketFrame, OutputFrame]], market_frames))
+        snapshot = np.zeros(1, dtype=book_dtype(depth))
+        snapshot["timestamp"] = book.get("timestamp") or int(time.time() * 1000)
+        for side in ("bid", "ask"):
+            levels = np.full((depth, 2), np.nan)
+            rows = [level[:2] for level in book[f"{side}s"][:depth]]
+            if rows:
+                levels[:len(rows)] = rows
+            snapshot[f"{side}_price"][0] = levels[:, 0]
+            snapshot[f"{side}_amount"][0] = levels[:, 1]
+        return snapshot
@@ -0,0 +1,237 @@
+import asyncio
+import enum
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from metrics.registry import MetricsRegistry, default_registry
+from models.columnar import FIELDS, MarketColumns
+from models.market import Market
+from models.records import Candle, Frame
+from models.symbol import Pair, Symbol, VenuePair
+from providers.ccxt import CCXTProvider
+from providers.provider import Provider
+from providers.session import SharedSession
+
+R = TypeVar("R")
+
+
+class MissingCandle(enum.Enum):
+    # What to put in the frame when a venue fails, times out, or is a candle behind the others
+    DROP = "DROP"  # leave the venue's candle out
+    PREVIOUS = "PREVIOUS"  # repeat the venue's last close as a flat candle with no volume
+    FAIL = "FAIL"  # raise
+
+
+class FederatedProvider(Provider):
+    # Reads the same pairs from several exchanges at once. Every venue is queried
+    # concurrently with its own timeout, and the answers are aligned on candle timestamps
+    # into one frame keyed by venue-qualified symbols ("binance:BTC/USDT"). Plain Pairs are
+    # requested from every venue, VenuePairs only from theirs.
+    # Errors (timeouts included) of the venues that failed the last request, by venue
+    last_errors: Dict[str, Exception]
+
+    _venues: Dict[str, Provider]
+    _timeouts: Dict[str, float]
+    _last_close: Dict[str, float]
+    _metrics: MetricsRegistry
+
+    def __init__(
+        self,
+        venues: Dict[str, Provider],
+        timeout=5.0,
+        # Per venue overrides of `timeout`, in seconds
+        timeouts: Optional[Dict[str, float]]=None,
+        missing=MissingCandle.DROP,
+        metrics: Optional[MetricsRegistry]=None,
+    ):
+        if not venues:
+            raise Exception("FederatedProvider needs at least one venue")
+
+        self._venues = venues
+        self._timeouts = {venue: (timeouts or {}).get(venue, timeout) for venue in venues}
+        self._missing = missing
+        self._metrics = metrics or default_registry
+        self._last_close = {}
+        self.last_errors = {}
+
+    # One CCXTProvider per ccxt exchange id; credentials are (apikey, secret) by exchange id
+    @classmethod
+    def from_ccxt(
+        cls,
+        exchange_ids: List[str],
+        credentials: Optional[Dict[str, Tuple[str, str]]]=None,
+        session: Optional[SharedSession]=None,
+        metrics: Optional[MetricsRegistry]=None,
+        **kwargs: Any,
+    ) -> "FederatedProvider":
+        venues: Dict[str, Provider] = {}
+        for exchange_id in exchange_ids:
+            apikey, secret = (credentials or {}).get(exchange_id, ("", ""))
+            venues[exchange_id] = CCXTProvider(apikey=apikey, secret=secret, exchange_id=exchange_id, session=session, metrics=metrics)
+        return cls(venues, metrics=metrics, **kwargs)
+
+    @property
+    def venues(self) -> List[str]:
+        return list(self._venues)
+
+    async def __aenter__(self) -> "FederatedProvider":
+        for provider in self._venues.values():
+            enter = getattr(provider, "__aenter__", None)
+            if enter is not None:
+                await enter()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await asyncio.gather(*[
+            provider.close() for provider in self._venues.values() if hasattr(provider, "close")
+        ])
+
+    # The pairs to request from each venue
+    def __requests(self, symbols: List[Symbol]) -> Dict[str, List[Pair]]:
+        requests: Dict[str, List[Pair]] = {venue: [] for venue in self._venues}
+        for symbol in dict.fromkeys(symbols):
+            if isinstance(symbol, VenuePair):
+                if symbol.venue not in requests:
+                    raise Exception(f"Unknown venue: {symbol.venue}")
+                requests[symbol.venue].append(symbol.pair)
+            elif isinstance(symbol, Pair):
+                for pairs in requests.values():
+                    pairs.append(symbol)
+            else:
+                raise Exception(f"Only pairs can be federated, got {symbol}")
+        return {venue: pairs for venue, pairs in requests.items() if pairs}
+
+    # The venue's answer, or None when it failed or ran out of time
+    async def __query(self, venue: str, request: Awaitable[R]) -> Optional[R]:
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(request, timeout=self._timeouts[venue])
+        except asyncio.TimeoutError:
+            self.last_errors[venue] = Exception(f"{venue} did not answer within {self._timeouts[venue]}s")
+            self._metrics.counter("federated_timeouts_total", venue=venue).inc()
+        except Exception as e:
+            self.last_errors[venue] = e
+            self._metrics.counter("federated_errors_total", venue=venue).inc()
+        finally:
+            self._metrics.histogram("federated_venue_seconds", venue=venue).observe(time.perf_counter() - start)
+        return None
+
+    async def __gather(self, requests: Dict[str, Awaitable[R]]) -> Dict[str, R]:
+        self.last_errors = {}
+        results = await asyncio.gather(*[self.__query(venue, request) for venue, request in requests.items()])
+
+        answered = {venue: result for venue, result in zip(requests, results) if result is not None}
+        if not answered:
+            raise Exception(f"All venue requests failed: {self.last_errors}")
+        return answered
+
+    def __missing(self, key: str) -> Optional[Candle]:
+        self._metrics.counter("federated_missing_candles_total", venue=key.split(":", 1)[0]).inc()
+        if self._missing == MissingCandle.FAIL:
+            raise Exception(f"Missing candle for {key}: {self.last_errors.get(key.split(':', 1)[0], 'late')}")
+        if self._missing == MissingCandle.PREVIOUS and key in self._last_close:
+            close = self._last_close[key]
+            return Candle(close, close, close, close, 0.0)
+        return None
+
+    async def get_current(self, symbols: List[Symbol], timeframe_minutes=1) -> Frame:
+        requests = self.__requests(symbols)
+        frames = await self.__gather({
+            venue: self._venues[venue].get_current(pairs, timeframe_minutes=timeframe_minutes)
+            for venue, pairs in requests.items()
+        })
+
+        # The frame is the newest candle any venue has; older candles are late
+        answered = [frame.timestamp for frame in frames.values() if frame.ohlcv]
+        if not answered:
+            raise Exception(f"No venue returned candles: {self.last_errors}")
+        timestamp = max(answered)
+
+        ohlcv: Dict[str, Candle] = {}
+        for venue, pairs in requests.items():
+            frame = frames.get(venue)
+            on_time = frame is not None and frame.timestamp == timestamp
+            if frame is not None and frame.ohlcv and not on_time:
+                self._metrics.counter("federated_late_candles_total", venue=venue).inc()
+
+            for pair in pairs:
+                key = str(VenuePair.on(venue, pair))
+                candle = frame.ohlcv.get(str(pair)) if frame is not None and on_time else None
+                if candle is None:
+                    candle = self.__missing(key)
+                if candle is not None:
+                    ohlcv[key] = candle
+                    self._last_close[key] = candle.close
+
+        return Frame(timestamp, ohlcv)
+
+    # Candles of every venue on the union of their timestamps
+    async def get_history(
+        self,
+        symbols: List[Symbol],
+        # use this (count)
+        count: Optional[int]=None,
+        # or this (since+until)
+        since: Optional[datetime]=None,
+        until: Optional[datetime]=None,
+        timeframe_minutes=1,
+    ) -> Market:
+        requests = self.__requests(symbols)
+        markets = await self.__gather({
+            venue: self._venues[venue].get_history(
+                pairs,
+                count=count,
+                since=since,
+                until=until,
+                timeframe_minutes=timeframe_minutes,
+            )
+            for venue, pairs in requests.items()
+        })
+
+        venue_columns = {venue: market.columns() for venue, market in markets.items()}
+        timestamps = np.unique(np.concatenate(
+            [columns.timestamps() for columns in venue_columns.values()] + [np.zeros(0, dtype=np.int64)]
+        ))
+        if count is not None:
+            timestamps = timestamps[-count:]
+
+        data: Dict[str, np.ndarray] = {}
+        for venue, pairs in requests.items():
+            columns = venue_columns.get(venue)
+            for pair in pairs:
+                key = str(VenuePair.on(venue, pair))
+                block = np.full((len(FIELDS), len(timestamps)), np.nan)
+                if columns is not None and columns.has_symbol(pair):
+                    own = columns.timestamps()
+                    index = np.searchsorted(timestamps, own)
+                    inside = (index < len(timestamps)) & (timestamps[np.minimum(index, len(timestamps) - 1)] == own)
+                    block[:, index[inside]] = columns.ohlcv(pair)[:, inside]
+                data[key] = self.__fill_missing(key, block)
+
+        aligned = MarketColumns()
+        aligned.append_rows(timestamps, data)
+        return Market.from_columns(aligned)
+
+    def __fill_missing(self, key: str, block: np.ndarray) -> np.ndarray:
+        missing = np.isnan(block[3])
+        if not missing.any():
+            return block
+
+        self._metrics.counter("federated_missing_candles_total", venue=key.split(":", 1)[0]).inc(int(missing.sum()))
+        if self._missing == MissingCandle.FAIL:
+            raise Exception(f"Missing {int(missing.sum())} candle(s) for {key}")
+        if self._missing == MissingCandle.PREVIOUS:
+            # Forward fill the close as flat candles with no volume; leading gaps stay missing
+            last = np.maximum.accumulate(np.where(missing, -1, np.arange(len(missing))))
+            fill = missing & (last >= 0)
+            closes = block[3, np.maximum(last, 0)]
+            for field in range(4):
+                block[field, fill] = closes[fill]
+            block[4, fill] = 0.0
+        return block
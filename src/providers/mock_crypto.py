@@ -1,23 +1,66 @@
 from datetime import datetime
 from typing import List, Optional
 
+import numpy as np
+
+from models.columnar import to_epoch_seconds
 from models.market import Market, MarketFrame
 from models.symbol import Pair
 from providers.provider import Provider
 
 
+class ReplayCursor:
+    # Position of a replay in its market: the frame that is "now". Shared by the provider
+    # answering queries and the BacktestTimer moving through the frames.
+    index: int
+
+    def __init__(self, index=0) -> None:
+        self.index = index
+
+
 class MockCryptoProvider(Provider):
+    # Point-in-time replay of a market: get_current returns the frame at the cursor and
+    # get_history only ever sees frames before it, like a live exchange would.
     _market: Market
-    _index: int
+    _cursor: ReplayCursor
+    # Unix seconds of the frames of a list-backed market, for binary searches; extended
+    # when frames are added to the market during the replay
+    _list_timestamps: np.ndarray
 
-    def __init__(self, market: Market, starting_index=100):
+    def __init__(self, market: Market, starting_index=100, cursor: Optional[ReplayCursor]=None):
         self._market = market
-        self._index = starting_index
+        self._cursor = cursor if cursor is not None else ReplayCursor(starting_index)
+        self._list_timestamps = np.zeros(0, dtype=np.int64)
+
+    @property
+    def market(self) -> Market:
+        return self._market
+
+    @property
+    def cursor(self) -> ReplayCursor:
+        return self._cursor
 
     def tick(self):
-        self._index += 1
+        self._cursor.index += 1
+
+    # Unix seconds of every frame of the market as it is now
+    def __timestamps(self) -> np.ndarray:
+        if self._market.columnar:
+            return self._market.columns().timestamps()
+
+        frames = self._market._frames
+        if len(self._list_timestamps) != len(frames):
+            added = np.array(
+                [to_epoch_seconds((frame[0] if isinstance(frame, tuple) else frame).timestamp) for frame in frames[len(self._list_timestamps):]],
+                dtype=np.int64,
+            )
+            self._list_timestamps = np.concatenate([self._list_timestamps[:len(frames)], added])
+        return self._list_timestamps
 
     async def __get_market_frame(self, pairs: List[Pair], index: int) -> MarketFrame:
+        if not 0 <= index < len(self._market._frames):
+            raise Exception(f"MockCryptoProvider has no frame at index {index}")
+
         frame_mf_of = self._market._frames[index]
         mf = frame_mf_of[0] if isinstance(frame_mf_of, tuple) else frame_mf_of
         return mf
@@ -27,23 +70,29 @@ class MockCryptoProvider(Provider):
         symbols: List[Pair]=[],  # unused
         timeframe_minutes: int=1,
     ) -> MarketFrame:
-        mf = await self.__get_market_frame(symbols, self._index)
+        mf = await self.__get_market_frame(symbols, self._cursor.index)
         return mf
 
+    # Like CCXTProvider, history excludes the current frame; frames after it don't exist yet
     async def get_history(
         self,
         symbols: List[Pair]=[],
         # use this (count)
         count: Optional[int]=None,
-        # do NOT use these (since+until)
+        # or this (since+until)
         since: Optional[datetime]=None,
         until: Optional[datetime]=None,
         timeframe_minutes: int=1,
     ) -> Market:
+        timestamps = self.__timestamps()
+        now = min(max(self._cursor.index, 0), len(timestamps))
+
+        if since and until:
+            start = int(np.searchsorted(timestamps[:now], to_epoch_seconds(since)))
+            end = int(np.searchsorted(timestamps[:now], to_epoch_seconds(until)))
+            return self._market.slice(start, max(start, end))
+
         if count is None:
-            raise Exception("count is required for MockCryptoProvider.get_history")
-        
-        if since or until:
-            raise NotImplementedError("since and until are not supported for MockCryptoProvider.get_history")
-        
-        return Market(frames=self._market._frames[-1*count:])
+            raise Exception("count or since+until is required for MockCryptoProvider.get_history")
+
+        return self._market.slice(max(now - count, 0), now)
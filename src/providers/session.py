@@ -0,0 +1,42 @@
+from typing import Optional
+
+import aiohttp
+
+
+class SharedSession:
+    # One aiohttp session, and so one connection pool, reused by every provider that
+    # acquires it. Closed when the last provider releases it.
+    _session: Optional[aiohttp.ClientSession] = None
+    _users: int = 0
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30.0, ttl_dns_cache=300) -> None:
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._ttl_dns_cache = ttl_dns_cache
+
+    # Must be called from a running event loop
+    def acquire(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._limit,
+                    limit_per_host=self._limit_per_host,
+                    keepalive_timeout=self._keepalive_timeout,
+                    ttl_dns_cache=self._ttl_dns_cache,
+                    enable_cleanup_closed=True,
+                ),
+            )
+        self._users += 1
+        return self._session
+
+    async def release(self) -> None:
+        self._users = max(self._users - 1, 0)
+        if self._users == 0:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._users = 0
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from models.market import Market, MarketFrame
+from models.symbol import Symbol
+from providers.provider import Provider
+
+# (timeframe_minutes, since, until); callers asking for different counts share a batch
+HistoryKey = Tuple[int, Optional[datetime], Optional[datetime]]
+
+
+# Whether a request for `have` frames answers one for `want` (None: the provider's default)
+def _covers(have: Optional[int], want: Optional[int]) -> bool:
+    if have is None or want is None:
+        return have == want
+    return want <= have
+
+
+class _HistoryBatch:
+    symbols: Dict[str, Symbol]
+    # The largest count of the callers, fetched once and cut to each caller's count
+    count: Optional[int]
+    started: bool
+    task: "asyncio.Task[Market]"
+
+    def __init__(self, count: Optional[int]) -> None:
+        self.symbols = {}
+        self.count = count
+        self.started = False
+
+
+class SharedProvider(Provider):
+    # Lets many strategies share one provider: get_history calls for the same timeframe and
+    # range made while a request is pending (or within `ttl` seconds of it completing) are
+    # answered by one request to the wrapped provider for the union of the requested
+    # symbols and the largest requested count, each caller getting its own last `count`
+    # frames; concurrent identical get_current calls share one request
+    _provider: Provider
+    _ttl: float
+    _batches: Dict[HistoryKey, _HistoryBatch]
+    _results: Dict[HistoryKey, Tuple[float, Set[str], Optional[int], Market]]
+    _current: Dict[Tuple[Tuple[str, ...], int], "asyncio.Task[MarketFrame]"]
+
+    def __init__(self, provider: Provider, ttl=1.0) -> None:
+        self._provider = provider
+        self._ttl = ttl
+        self._batches = {}
+        self._results = {}
+        self._current = {}
+
+    async def get_current(self, symbols: List[Symbol], timeframe_minutes: int=1) -> MarketFrame:
+        key = (tuple(sorted(str(symbol) for symbol in symbols)), timeframe_minutes)
+
+        task = self._current.get(key)
+        if task is None:
+            task = asyncio.create_task(self._provider.get_current(symbols, timeframe_minutes=timeframe_minutes))
+            self._current[key] = task
+            task.add_done_callback(lambda _: self._current.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def get_history(
+        self,
+        symbols: List[Symbol],
+        # use this (count)
+        count: Optional[int]=None,
+        # or this (since+until)
+        since: Optional[datetime]=None,
+        until: Optional[datetime]=None,
+        timeframe_minutes=1,
+    ) -> Market:
+        key: HistoryKey = (timeframe_minutes, since, until)
+        requested = {str(symbol): symbol for symbol in symbols}
+
+        cached = self._results.get(key)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < self._ttl
+            and requested.keys() <= cached[1]
+            and _covers(cached[2], count)
+        ):
+            return self.__share(cached[3], count)
+
+        batch = self._batches.get(key)
+        if batch is not None and not batch.started and not _covers(batch.count, count):
+            if batch.count is None or count is None:
+                batch = None  # a default-sized request can't be merged with a counted one
+            else:
+                batch.count = count
+        if batch is None or (batch.started and not (requested.keys() <= batch.symbols.keys() and _covers(batch.count, count))):
+            batch = _HistoryBatch(count)
+            self._batches[key] = batch
+            batch.task = asyncio.create_task(self.__fetch(key, batch))
+        if not batch.started:
+            batch.symbols.update(requested)
+
+        return self.__share(await asyncio.shield(batch.task), count)
+
+    async def __fetch(self, key: HistoryKey, batch: _HistoryBatch) -> Market:
+        # Give the other strategies handling the same frame a chance to join the batch
+        await asyncio.sleep(0)
+        batch.started = True
+
+        timeframe_minutes, since, until = key
+        try:
+            market = await self._provider.get_history(
+                symbols=list(batch.symbols.values()),
+                count=batch.count,
+                since=since,
+                until=until,
+                timeframe_minutes=timeframe_minutes,
+            )
+        finally:
+            if self._batches.get(key) is batch:
+                del self._batches[key]
+
+        if self._ttl > 0:
+            result = (time.monotonic(), set(batch.symbols), batch.count, market)
+            self._results[key] = result
+            # Drop the result once it can no longer answer a request
+            asyncio.get_running_loop().call_later(self._ttl, self.__expire, key, result)
+        return market
+
+    def __expire(self, key: HistoryKey, result: Tuple[float, Set[str], Optional[int], Market]) -> None:
+        if self._results.get(key) is result:
+            del self._results[key]
+
+    # Each caller gets its own Market object over the shared frames/columns, cut to its count
+    def __share(self, market: Market, count: Optional[int]) -> Market:
+        if count is not None:
+            return market.tail(count)
+        if market.columnar:
+            return Market.from_columns(market.columns())
+        return Market(frames=list(market._frames))
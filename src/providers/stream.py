@@ -0,0 +1,174 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import ccxt.pro as ccxtpro
+
+from models.columnar import to_epoch_seconds
+from models.market import Market
+from models.records import Candle, Frame
+from models.symbol import Symbol
+from providers.provider import Provider
+
+
+class StreamingProvider(Provider):
+    # Subscribes to kline streams (ccxt.pro watch_ohlcv) for every symbol and pushes a
+    # Frame as soon as every symbol's candle for a timestamp has closed. A candle is
+    # closed once a newer candle arrives for its symbol, or close_timeout seconds after its
+    # period ended by `clock` (quiet markets may never send the next candle). close_timeout=None
+    # only closes candles on arrival of the next one, e.g. for replays of historical data.
+    _exchange: Any
+    _symbols: List[Symbol]
+    _timeframe_minutes: int
+    _close_timeout: Optional[float]
+    _clock: Callable[[], float]
+    _history_provider: Optional[Provider]
+
+    _latest: Dict[str, List[Any]]
+    _closed: Dict[int, Dict[str, Candle]]
+    _last_emitted: int
+    # Holds the exception that stopped a symbol's stream, so next_frame raises it
+    _frames: "asyncio.Queue[Frame | Exception]"
+    _tasks: List["asyncio.Task[None]"]
+
+    def __init__(
+        self,
+        symbols: List[Symbol],
+        timeframe_minutes=1,
+        apikey: Optional[str]=None,
+        secret: Optional[str]=None,
+        exchange: Optional[Any]=None,
+        close_timeout: Optional[float]=5.0,
+        clock: Callable[[], float]=time.time,
+        # Answers get_history, e.g. a CCXTProvider; the stream itself has no history
+        history_provider: Optional[Provider]=None,
+    ) -> None:
+        self._exchange = exchange or ccxtpro.binance({"apiKey": apikey, "secret": secret})
+        self._symbols = list(dict.fromkeys(symbols))
+        self._timeframe_minutes = timeframe_minutes
+        self._close_timeout = close_timeout
+        self._clock = clock
+        self._history_provider = history_provider
+
+        self._latest = {}
+        self._closed = {}
+        self._last_emitted = -1
+        self._frames = asyncio.Queue()
+        self._tasks = []
+
+    @property
+    def started(self) -> bool:
+        return len(self._tasks) > 0
+
+    async def start(self) -> None:
+        if self.started:
+            return
+
+        self._tasks = [asyncio.create_task(self.__watch(symbol)) for symbol in self._symbols]
+        if self._close_timeout is not None:
+            self._tasks.append(asyncio.create_task(self.__close_stale_candles(self._close_timeout)))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._exchange.close()
+
+    async def __aenter__(self) -> "StreamingProvider":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def next_frame(self) -> Frame:
+        frame = await self._frames.get()
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    async def get_current(self, symbols: List[Symbol]=[], timeframe_minutes: int=1) -> Frame:
+        await self.start()
+        return await self.next_frame()
+
+    async def get_history(
+        self,
+        symbols: List[Symbol],
+        # use this (count)
+        count: Optional[int]=None,
+        # or this (since+until)
+        since: Optional[datetime]=None,
+        until: Optional[datetime]=None,
+        timeframe_minutes=1,
+    ) -> Market:
+        if self._history_provider is None:
+            raise NotImplementedError("StreamingProvider.get_history needs a history_provider")
+
+        return await self._history_provider.get_history(
+            symbols=symbols,
+            count=count,
+            since=since,
+            until=until,
+            timeframe_minutes=timeframe_minutes,
+        )
+
+    async def __watch(self, symbol: Symbol) -> None:
+        key = str(symbol)
+        timeframe_str = f"{self._timeframe_minutes}m"
+
+        try:
+            while True:
+                candles = await self._exchange.watch_ohlcv(key, timeframe_str)
+                for candle in sorted(candles, key=lambda x: x[0]):
+                    self.__on_candle(key, candle)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Stream for {key} failed: {e}")
+            self._frames.put_nowait(e)
+
+    # candle: [timestamp (ms), open, high, low, close, volume]
+    def __on_candle(self, key: str, candle: List[Any]) -> None:
+        latest = self._latest.get(key)
+        if latest is not None and candle[0] < latest[0]:
+            return
+
+        if latest is not None and candle[0] > latest[0]:
+            self.__close(key, latest)
+
+        self._latest[key] = candle
+        self.__emit_ready()
+
+    def __close(self, key: str, candle: List[Any]) -> None:
+        timestamp = to_epoch_seconds(candle[0])
+        if timestamp <= self._last_emitted:
+            return
+
+        self._closed.setdefault(timestamp, {})[key] = Candle(*candle[1:6])
+
+    def __emit_ready(self, deadline: Optional[int]=None) -> None:
+        # Frames go out in timestamp order; a frame is complete when all symbols closed,
+        # or forced (with whatever closed) once its period ended before `deadline`
+        for timestamp in sorted(self._closed):
+            ohlcv = self._closed[timestamp]
+            forced = deadline is not None and timestamp + self._timeframe_minutes * 60 <= deadline
+            if len(ohlcv) < len(self._symbols) and not forced:
+                break
+
+            del self._closed[timestamp]
+            self._last_emitted = timestamp
+            self._frames.put_nowait(Frame(datetime.fromtimestamp(timestamp), ohlcv))
+
+    async def __close_stale_candles(self, close_timeout: float) -> None:
+        period = self._timeframe_minutes * 60
+
+        while True:
+            await asyncio.sleep(max(min(close_timeout, period) / 2, 0.05))
+
+            deadline = int(self._clock() - close_timeout)
+            for key, candle in list(self._latest.items()):
+                if to_epoch_seconds(candle[0]) + period <= deadline:
+                    self.__close(key, candle)
+            self.__emit_ready(deadline=deadline)
@@ -0,0 +1,44 @@
+import argparse
+import sys
+
+from benchmarks.suite import CASES, compare_to_baseline, run_suite, save_baseline
+
+# Times the main market and backtest paths on a generated dataset:
+#   python -m scripts.benchmark_backtest --symbols 10 --candles 1000000 --baseline baseline.json
+# The first run with --save writes the baseline; later runs with the same size compare
+# against it and exit with 1 when a case regressed by more than --tolerance.
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--candles", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is reported")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES))
+    parser.add_argument("--baseline", help="baseline JSON file to compare against (or write with --save)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{args.symbols} symbols x {args.candles} candles (seed {args.seed})")
+    results = run_suite(args.symbols, args.candles, seed=args.seed, cases=args.cases, repeat=args.repeat)
+
+    if not args.baseline:
+        return
+
+    if args.save:
+        save_baseline(args.baseline, results, args.symbols, args.candles, args.seed)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    regressions = compare_to_baseline(args.baseline, results, args.symbols, args.candles, tolerance=args.tolerance)
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
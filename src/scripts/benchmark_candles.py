@@ -0,0 +1,72 @@
+import gc
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from models.columnar import MarketColumns
+from models.market import OHLCV
+from models.records import Candle
+
+# Object count, memory and time to build COUNT candles with each representation:
+#   python -m scripts.benchmark_candles [count]
+COUNT = 1_000_000
+
+
+def build_validated(values: List[Tuple[float, ...]]) -> list:
+    return [OHLCV(open=o, high=h, low=l, close=c, volume=v) for o, h, l, c, v in values]
+
+
+def build_constructed(values: List[Tuple[float, ...]]) -> list:
+    return [OHLCV.model_construct(open=o, high=h, low=l, close=c, volume=v) for o, h, l, c, v in values]
+
+
+def build_slotted(values: List[Tuple[float, ...]]) -> list:
+    return [Candle(o, h, l, c, v) for o, h, l, c, v in values]
+
+
+def build_columnar(values: List[Tuple[float, ...]]) -> MarketColumns:
+    columns = MarketColumns()
+    columns.append_rows(np.arange(len(values), dtype=np.int64), {"BTC/USDT": np.array(values).T})
+    return columns
+
+
+def measure(name: str, build: Callable[[List[Tuple[float, ...]]], object], values: List[Tuple[float, ...]]) -> None:
+    # Timed without tracemalloc, which slows allocation-heavy code down several times
+    gc.collect()
+    start = time.perf_counter()
+    result = build(values)
+    elapsed = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    result = build(values)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    objects = len(gc.get_objects()) - objects_before
+    del result
+
+    print(
+        f"{name:<28} {elapsed:8.3f}s  {len(values) / elapsed / 1e6:6.2f}M candles/s  "
+        f"{peak / 2**20:8.1f} MiB peak  {objects / len(values):5.2f} gc objects/candle"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+    rng = np.random.default_rng(0)
+    values = [tuple(row) for row in rng.random((count, 5)).tolist()]
+
+    print(f"Building {count} candles")
+    measure("OHLCV (pydantic, validated)", build_validated, values)
+    measure("OHLCV.model_construct", build_constructed, values)
+    measure("Candle (slots dataclass)", build_slotted, values)
+    measure("MarketColumns", build_columnar, values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import sys
+
+from models.market import Market
+
+
+# Converts a CSV market directory (one <timestamp>.mf.csv per frame) into a single
+# memory-mappable market file
+def convert_csv_to_bin(directory: str, filename: str) -> None:
+    market = Market(columnar=True)
+    market.import_from_file(directory, format="csv")
+    market.save_to_file(filename, format="bin")
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python -m scripts.convert_market_data <csv directory> <output file>")
+        sys.exit(1)
+
+    convert_csv_to_bin(sys.argv[1], sys.argv[2])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
-from typing import List, Tuple, Dict
-from datetime import datetime
+import time
+from typing import List, Dict, Optional, Set
 
+import numpy as np
+
+from indicators.engine import IndicatorEngine
+from indicators.sma import SMA
+from execution.paper import Portfolio
+from indicators.vectorized import rolling_mean
+from metrics.registry import MetricsRegistry, default_registry
 from providers.provider import Provider
+from strategies.batch import BatchSignals, positions_from_signals
 from strategies.strategy import Strategy
-from models.market import FunctionPlot, Log, Market, MarketFrame, OHLCV, OutputFrame
-from models.symbol import Symbol
-from models.transaction import OperationEnum, Transaction
-from providers.ccxt import CCXTProvider
+from models.market import AnyFrame, Log
+from models.records import FunctionPlotRecord, OutputRecord, TransactionRecord
+from models.symbol import Pair, Symbol
+from models.transaction import OperationEnum
 
 
 class AverageCrossover(Strategy):
-    _history: Market = Market(frames=[])
+    _indicators: IndicatorEngine
+    # Symbols (by id) whose indicators were warmed up from the provider's history; after
+    # that every frame is fed to them incrementally
+    _warm: Set[int]
 
     _provider: Provider
     _symbols: List[Symbol] = []
@@ -20,7 +31,9 @@ class AverageCrossover(Strategy):
     _jitter: float
     _transaction_cost: float
 
-    _holding: Dict[Symbol, bool] = {}
+    _holding: Dict[int, bool] = {}  # by symbol id
+    _metrics: MetricsRegistry
+    _portfolio: Optional[Portfolio]
 
     def __init__(
         self,
@@ -31,6 +44,9 @@ class AverageCrossover(Strategy):
         timeframe_minutes=1,
         jitter=0.005,
         transaction_cost=0.00075,
+        metrics: Optional[MetricsRegistry]=None,
+        # when given, positions come from the portfolio instead of the strategy's own bookkeeping
+        portfolio: Optional[Portfolio]=None,
     ):
         self._provider = provider
         self._symbols = symbols
@@ -39,91 +55,132 @@ class AverageCrossover(Strategy):
         self._timeframe_minutes = timeframe_minutes
         self._jitter = jitter
         self._transaction_cost = transaction_cost
+        self._holding = {}
+        self._warm = set()
+        self._portfolio = portfolio
+        self._metrics = metrics or default_registry
+        self._execute_seconds = self._metrics.histogram("strategy_execute_seconds", strategy=type(self).__name__)
+
+        self._indicators = IndicatorEngine()
+        self._indicators.subscribe("fma", lambda: SMA(self._fma_window))
+        self._indicators.subscribe("sma", lambda: SMA(self._sma_window))
+
+    @property
+    def warm_up_count(self) -> int:
+        return self._sma_window
+
+    # Vectorized equivalent of running execute() over every close, starting flat.
+    # warm_up holds the closes execute() would get from the provider on its first frame.
+    def execute_batch(
+        self,
+        closes: Dict[Symbol, np.ndarray],
+        warm_up: Optional[Dict[Symbol, np.ndarray]]=None,
+    ) -> Dict[Symbol, BatchSignals]:
+        if self._transaction_cost + self._jitter < 0:
+            raise Exception("execute_batch requires non-negative transaction_cost + jitter")
+
+        threshold = 1 + self._transaction_cost + self._jitter
+        signals: Dict[Symbol, BatchSignals] = {}
+
+        for pair, pair_closes in closes.items():
+            history = warm_up.get(pair, np.empty(0)) if warm_up else np.empty(0)
+            history = history[~np.isnan(history)]
+            # Missing candles (NaN) are skipped like execute() skips frames without the pair:
+            # the averages run over the present closes and no signal is given at the gaps
+            present = ~np.isnan(pair_closes)
+            values = np.concatenate([history, pair_closes[present]])
+
+            fma = np.full(len(pair_closes), np.nan)
+            sma = np.full(len(pair_closes), np.nan)
+            fma[present] = rolling_mean(values, self._fma_window)[len(history):]
+            sma[present] = rolling_mean(values, self._sma_window)[len(history):]
+
+            # NaN comparisons are False, so gaps keep signal 0 and the position carries over
+            signal = np.zeros(len(pair_closes), dtype=np.int8)
+            signal[fma > sma * threshold] = 1
+            signal[sma > fma * threshold] = -1
+
+            signals[pair] = BatchSignals(
+                indicators={"fma": fma, "sma": sma},
+                signal=signal,
+                position=positions_from_signals(signal),
+            )
 
-    def __calculate_fma(self, values: List[Tuple[datetime, OHLCV]]) -> float:
-        ohlcv = [v[1] for v in values]
-
-        fma_closes = [x.close for x in ohlcv][-1*self._fma_window:]
-        return sum(fma_closes) / len(fma_closes)
-
-    def __calculate_sma(self, values: List[Tuple[datetime, OHLCV]]) -> float:
-        ohlcv = [v[1] for v in values]
-
-        sma_closes = [x.close for x in ohlcv][-1*self._sma_window:]
-        return sum(sma_closes) / len(sma_closes)
+        return signals
+
+    async def execute(self, frame: AnyFrame) -> OutputRecord:
+        start = time.perf_counter()
+        output_frame = await self.__execute(frame)
+        self._execute_seconds.observe(time.perf_counter() - start)
+
+        for transaction in output_frame.transactions:
+            self._metrics.counter(
+                "signals_total",
+                strategy=type(self).__name__,
+                operation=transaction.operation.value,
+            ).inc()
+
+        return output_frame
+
+    # History is fetched once per symbol; a symbol the provider has no history for yet is
+    # retried on the next frame, starting over from the history that includes this one
+    async def __warm_up(self) -> None:
+        cold = [symbol for symbol in dict.fromkeys(self._symbols) if symbol.id not in self._warm]
+        if not cold:
+            return
+
+        history = await self._provider.get_history(
+            symbols=cold,
+            count=self._sma_window,
+            timeframe_minutes=self._timeframe_minutes,
+        )
+        self._indicators.reset(cold)
+        self._indicators.warm_up(history, cold)
+        self._warm.update(symbol.id for symbol in cold if len(history.get_symbol_columns(symbol)[0]))
 
     # returns (Transactions, Logs, Function plots)
-    async def execute(self, frame: MarketFrame) -> OutputFrame:
-        transactions: List[Transaction] = []
+    async def __execute(self, frame: AnyFrame) -> OutputRecord:
+        transactions: List[TransactionRecord] = []
         logs: List[Log] = []
-        function_plots: List[FunctionPlot] = []
-
-        if len(self._history._frames) < self._sma_window:
-            print("Getting history")
-            self._history = await self._provider.get_history(
-                symbols=self._symbols,
-                count=self._sma_window,
-                timeframe_minutes=self._timeframe_minutes,
-            )
+        function_plots: List[FunctionPlotRecord] = []
 
+        await self.__warm_up()
+        self._indicators.update(frame, self._symbols)
 
         for pair in self._symbols:
-            history_ohclv = self._history.get_all_symbol_data(pair)
-            timestamp, current_ohclv = frame.get_symbol(pair)
+            # e.g. the provider failed to fetch this pair
+            if str(pair) not in frame.ohlcv:
+                continue
 
-            fma = self.__calculate_fma(
-                values=history_ohclv+[(timestamp, current_ohclv)],
-            )
-            sma = self.__calculate_sma(
-                values=history_ohclv+[(timestamp, current_ohclv)],
-            )
+            timestamp = frame.timestamp
 
-            function_plots.append(FunctionPlot(
-                timestamp=timestamp,
-                label=f"{pair} FMA",
-                value=fma,
-                color="blue",
-            ))
-            function_plots.append(FunctionPlot(
-                timestamp=timestamp,
-                label=f"{pair} SMA",
-                value=sma,
-                color="purple",
-            ))
+            fma = self._indicators.value(pair, "fma")
+            sma = self._indicators.value(pair, "sma")
+
+            function_plots.append(FunctionPlotRecord(timestamp, f"{pair} FMA", fma, "blue", pair))
+            function_plots.append(FunctionPlotRecord(timestamp, f"{pair} SMA", sma, "purple", pair))
 
             buy_threshold = sma * (1 + self._transaction_cost + self._jitter)
             # buy_threshold = sma 
             sell_threshold = fma * (1 + self._transaction_cost + self._jitter)
             # sell_threshold = fma
 
-            is_holding = self._holding.get(pair, False)
+            if self._portfolio is not None and isinstance(pair, Pair):
+                is_holding = self._portfolio.holding(pair)
+            else:
+                is_holding = self._holding.get(pair.id, False)
 
             if fma > buy_threshold and not is_holding:
                 transactions.append(
-                    Transaction(
-                        timestamp=timestamp,
-                        symbol=pair,
-                        operation=OperationEnum.BUY,
-                        # notes=f"{fma} > {buy_threshold}",
-                    )
+                    # notes=f"{fma} > {buy_threshold}"
+                    TransactionRecord(timestamp, OperationEnum.BUY, pair)
                 )
-                self._holding[pair] = True
+                self._holding[pair.id] = True
             elif sma > sell_threshold and is_holding:
                 transactions.append(
-                    Transaction(
-                        timestamp=timestamp,
-                        symbol=pair,
-                        operation=OperationEnum.SELL,
-                        # notes=f"{sell_threshold} < {sma}",
-                    )
+                    # notes=f"{sell_threshold} < {sma}"
+                    TransactionRecord(timestamp, OperationEnum.SELL, pair)
                 )
-                self._holding[pair] = False
-
-        self._history._frames = self._history._frames[-1*(self._sma_window-1):] + [frame]
+                self._holding[pair.id] = False
 
-        return OutputFrame(
-            timestamp=frame.timestamp,
-            logs=logs,
-            transactions=transactions,
-            function_plots=function_plots,
-        )
+        return OutputRecord(frame.timestamp, logs, transactions, function_plots)
@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Protocol
+
+import numpy as np
+
+from models.market import Market
+from models.symbol import Symbol
+from models.transaction import OperationEnum, Transaction
+from providers.provider import Provider
+
+
+class BatchSignals:
+    # All arrays are aligned with the closes passed to execute_batch; indicators are NaN
+    # where the close is (a missing candle).
+    # signal: 1 where the buy condition holds, -1 where the sell condition holds, 0 otherwise
+    # position: 1 while holding, 0 otherwise
+    indicators: Dict[str, np.ndarray]
+    signal: np.ndarray
+    position: np.ndarray
+
+    def __init__(self, indicators: Dict[str, np.ndarray], signal: np.ndarray, position: np.ndarray) -> None:
+        self.indicators = indicators
+        self.signal = signal
+        self.position = position
+
+    # Indices where the position is entered (BUY) or left (SELL)
+    def entries(self) -> np.ndarray:
+        return np.flatnonzero(np.diff(self.position, prepend=0) > 0)
+
+    def exits(self) -> np.ndarray:
+        return np.flatnonzero(np.diff(self.position, prepend=0) < 0)
+
+
+class BatchStrategy(Protocol):
+    # How many frames of history the event-driven execute() warms up with
+    @property
+    def warm_up_count(self) -> int:
+        raise NotImplementedError
+
+    def execute_batch(
+        self,
+        closes: Dict[Symbol, np.ndarray],
+        warm_up: Optional[Dict[Symbol, np.ndarray]]=None,
+    ) -> Dict[Symbol, BatchSignals]:
+        raise NotImplementedError
+
+
+# Long/flat state machine: a buy signal opens the position, a sell signal closes it.
+# Requires the buy and sell conditions to never hold at the same index.
+def positions_from_signals(signal: np.ndarray) -> np.ndarray:
+    indices = np.where(signal != 0, np.arange(len(signal)), -1)
+    last_signal = np.maximum.accumulate(indices) if len(indices) else indices
+    state = np.where(last_signal >= 0, signal[np.maximum(last_signal, 0)], 0)
+    return (state > 0).astype(np.int8)
+
+
+def transactions_from_signals(
+    timestamps: np.ndarray,
+    signals: Dict[Symbol, BatchSignals],
+) -> List[Transaction]:
+    events: List[tuple] = []
+
+    for order, (symbol, batch) in enumerate(signals.items()):
+        for index in batch.entries().tolist():
+            events.append((index, order, symbol, OperationEnum.BUY))
+        for index in batch.exits().tolist():
+            events.append((index, order, symbol, OperationEnum.SELL))
+
+    # Same order as the event-driven loop: by frame, then by symbol
+    events.sort(key=lambda x: (x[0], x[1]))
+
+    return [
+        Transaction(
+            timestamp=datetime.fromtimestamp(int(timestamps[index])),
+            symbol=symbol,
+            operation=operation,
+        )
+        for index, _, symbol, operation in events
+    ]
+
+
+async def run_batch(
+    strategy: BatchStrategy,
+    provider: Provider,
+    market: Market,
+    symbols: List[Symbol],
+    starting_index=0,
+    timeframe_minutes=1,
+) -> Dict[Symbol, BatchSignals]:
+    # Warm up from the provider exactly like the event-driven strategy does on its first frame
+    history = await provider.get_history(
+        symbols=symbols,
+        count=strategy.warm_up_count,
+        timeframe_minutes=timeframe_minutes,
+    )
+
+    # Closes of every symbol on the market's shared timestamp axis (NaN where a candle is
+    # missing), so index i is frame starting_index + i for all of them
+    columns = market.columns()
+    length = len(columns.timestamps()[starting_index:])
+
+    closes: Dict[Symbol, np.ndarray] = {}
+    warm_up: Dict[Symbol, np.ndarray] = {}
+    for symbol in dict.fromkeys(symbols):
+        if columns.has_symbol(symbol):
+            closes[symbol] = columns.column(symbol, "close")[starting_index:]
+        else:
+            closes[symbol] = np.full(length, np.nan)
+        warm_up[symbol] = history.get_symbol_columns(symbol)[1][3]
+
+    return strategy.execute_batch(closes, warm_up=warm_up)
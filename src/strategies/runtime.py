@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from metrics.registry import MetricsRegistry, default_registry
+from models.market import AnyFrame, AnyOutput
+from strategies.strategy import Strategy
+
+
+class StrategyReport:
+    name: str
+    elapsed: float  # seconds
+    error: Optional[BaseException]
+    timed_out: bool
+
+    def __init__(self, name: str, elapsed: float, error: Optional[BaseException]=None, timed_out=False) -> None:
+        self.name = name
+        self.elapsed = elapsed
+        self.error = error
+        self.timed_out = timed_out
+
+    def __repr__(self) -> str:
+        status = "timed out" if self.timed_out else f"failed: {self.error!r}" if self.error else "ok"
+        return f"StrategyReport({self.name}, {self.elapsed * 1000:.1f}ms, {status})"
+
+
+class StrategyRuntime:
+    # Runs many strategies off one timer: every frame is handed to all active strategies
+    # concurrently. A strategy that raises or exceeds its time budget only loses that frame;
+    # after max_failures consecutive failures it is disabled. Give the strategies a
+    # providers.shared.SharedProvider so their history fetches are deduplicated.
+    _timer: AsyncIterator[AnyFrame]
+    _strategies: Dict[str, Strategy]
+    _budgets: Dict[str, float]
+    _failures: Dict[str, int]
+    _disabled: Dict[str, BaseException]
+    _metrics: MetricsRegistry
+
+    def __init__(
+        self,
+        timer: AsyncIterator[AnyFrame],
+        strategies: Dict[str, Strategy],
+        budget_seconds=5.0,
+        # per-strategy overrides of budget_seconds
+        budgets: Optional[Dict[str, float]]=None,
+        max_failures=3,
+        metrics: Optional[MetricsRegistry]=None,
+    ) -> None:
+        self._timer = timer
+        self._strategies = dict(strategies)
+        self._budgets = {name: (budgets or {}).get(name, budget_seconds) for name in strategies}
+        self._max_failures = max_failures
+        self._failures = {name: 0 for name in strategies}
+        self._disabled = {}
+        self.last_reports: Dict[str, StrategyReport] = {}
+        self._metrics = metrics or default_registry
+
+    @property
+    def active(self) -> List[str]:
+        return [name for name in self._strategies if name not in self._disabled]
+
+    @property
+    def disabled(self) -> Dict[str, BaseException]:
+        return dict(self._disabled)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[AnyFrame, Dict[str, AnyOutput]]:
+        frame = await self._timer.__anext__()
+        return frame, await self.execute(frame)
+
+    async def execute(self, frame: AnyFrame) -> Dict[str, AnyOutput]:
+        names = self.active
+        results = await asyncio.gather(*[self.__execute_one(name, frame) for name in names])
+
+        self.last_reports = {}
+        outputs: Dict[str, AnyOutput] = {}
+        for name, (output, report) in zip(names, results):
+            self.last_reports[name] = report
+            self._metrics.histogram("runtime_strategy_seconds", strategy=name).observe(report.elapsed)
+            if output is not None:
+                outputs[name] = output
+                self._failures[name] = 0
+                continue
+
+            self._failures[name] += 1
+            self._metrics.counter(
+                "runtime_strategy_failures_total",
+                strategy=name,
+                reason="timeout" if report.timed_out else "error",
+            ).inc()
+            print(f"Strategy {report}")
+            if self._failures[name] >= self._max_failures:
+                self._disabled[name] = report.error or TimeoutError(f"{name} exceeded its time budget")
+                print(f"Strategy {name} disabled after {self._failures[name]} consecutive failures")
+
+        self._metrics.maybe_flush()
+        return outputs
+
+    async def __execute_one(self, name: str, frame: AnyFrame) -> Tuple[Optional[AnyOutput], StrategyReport]:
+        start = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(self._strategies[name].execute(frame), self._budgets[name])
+            return output, StrategyReport(name, time.perf_counter() - start)
+        except asyncio.TimeoutError as e:
+            return None, StrategyReport(name, time.perf_counter() - start, error=e, timed_out=True)
+        except Exception as e:
+            return None, StrategyReport(name, time.perf_counter() - start, error=e)
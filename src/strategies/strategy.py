@@ -1,11 +1,11 @@
 from typing import AsyncIterator, Protocol
 
-from models.market import MarketFrame, OutputFrame
+from models.market import AnyFrame, AnyOutput
 
 
 class Strategy(Protocol):
-    def __init__(self, timer: AsyncIterator[MarketFrame]):
+    def __init__(self, timer: AsyncIterator[AnyFrame]):
         raise NotImplementedError
 
-    async def execute(self, frame: MarketFrame) -> OutputFrame:
+    async def execute(self, frame: AnyFrame) -> AnyOutput:
         raise NotImplementedError
\ No newline at end of file
@@ -0,0 +1,154 @@
+import itertools
+import os
+import tempfile
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analytics.performance import max_drawdown, portfolio_returns
+from models.market import Market
+from models.symbol import Symbol
+from providers.provider import Provider
+from strategies.batch import BatchStrategy
+from strategies.average_crossover import AverageCrossover
+
+StrategyFactory = Callable[..., BatchStrategy]
+
+
+class SweepResult:
+    params: Dict[str, Any]
+    pnl: float
+    trades: int
+    max_drawdown: float
+
+    def __init__(self, params: Dict[str, Any], pnl: float, trades: int, max_drawdown: float) -> None:
+        self.params = params
+        self.pnl = pnl
+        self.trades = trades
+        self.max_drawdown = max_drawdown
+
+    def __repr__(self) -> str:
+        return f"SweepResult(params={self.params}, pnl={self.pnl:.4f}, trades={self.trades}, max_drawdown={self.max_drawdown:.4f})"
+
+
+def parameter_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+# Equal-weight long/flat portfolio over all symbols, see analytics.performance.portfolio_returns
+def evaluate_positions(closes: np.ndarray, positions: np.ndarray, fee: float) -> Tuple[float, int, float]:
+    returns, changes = portfolio_returns(closes, positions, fee)
+    equity = np.cumprod(1 + returns)
+    if len(equity) == 0:
+        return 0.0, 0, 0.0
+
+    return float(equity[-1] - 1), int(changes.sum()), max_drawdown(equity)
+
+
+# Worker processes map the shared market file once, in the pool initializer
+_worker_closes: Dict[str, np.ndarray] = {}
+_worker_symbols: List[Symbol] = []
+
+
+def _init_worker(filename: str, symbols: List[Symbol], length: int) -> None:
+    global _worker_closes, _worker_symbols
+
+    closes = np.memmap(filename, dtype=np.float64, mode="r", shape=(len(symbols), length))
+    _worker_symbols = symbols
+    _worker_closes = {str(symbol): closes[i] for i, symbol in enumerate(symbols)}
+
+
+def _run_params(
+    strategy_factory: StrategyFactory,
+    params: Dict[str, Any],
+    starting_index: int,
+    fee: float,
+) -> SweepResult:
+    strategy = strategy_factory(
+        provider=typing.cast(Provider, None),  # the batch path never calls the provider
+        symbols=_worker_symbols,
+        **params,
+    )
+
+    warm_up_start = max(0, starting_index - strategy.warm_up_count)
+    closes = {symbol: _worker_closes[str(symbol)][starting_index:] for symbol in _worker_symbols}
+    warm_up = {symbol: _worker_closes[str(symbol)][warm_up_start:starting_index] for symbol in _worker_symbols}
+
+    signals = strategy.execute_batch(closes, warm_up=warm_up)
+
+    pnl, trades, max_drawdown = evaluate_positions(
+        np.stack([closes[symbol] for symbol in _worker_symbols]),
+        np.stack([signals[symbol].position for symbol in _worker_symbols]).astype(np.float64),
+        params.get("transaction_cost", fee),
+    )
+    return SweepResult(params=params, pnl=pnl, trades=trades, max_drawdown=max_drawdown)
+
+
+# Every symbol's closes on the market's common timestamp axis, NaN where a candle is missing,
+# so column i is the same frame for all of them; the strategies only ever read closes
+def _share_market(market: Market, symbols: List[Symbol]) -> Tuple[str, int]:
+    columns = market.columns()
+    length = len(columns)
+
+    # Workers map this file instead of receiving a pickled copy of the market per task;
+    # /dev/shm keeps it in memory where available
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    fd, filename = tempfile.mkstemp(prefix="trader-sweep-", suffix=".f64", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        for symbol in symbols:
+            if columns.has_symbol(symbol):
+                closes = np.ascontiguousarray(columns.column(symbol, "close"), dtype=np.float64)
+            else:
+                closes = np.full(length, np.nan)
+            f.write(closes.tobytes())
+
+    return filename, length
+
+
+def run_sweep(
+    market: Market,
+    symbols: List[Symbol],
+    grid: Dict[str, List[Any]],
+    strategy_factory: StrategyFactory=AverageCrossover,
+    starting_index=0,
+    fee=0.00075,
+    workers: Optional[int]=None,
+) -> List[SweepResult]:
+    symbols = list(dict.fromkeys(symbols))
+    combinations = parameter_grid(grid)
+
+    filename, length = _share_market(market, symbols)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(filename, symbols, length),
+        ) as executor:
+            futures = [
+                executor.submit(_run_params, strategy_factory, params, starting_index, fee)
+                for params in combinations
+            ]
+            return [future.result() for future in futures]
+    finally:
+        os.unlink(filename)
+
+
+def results_table(results: List[SweepResult], sort_by="pnl") -> str:
+    if not results:
+        return ""
+
+    ordered = sorted(results, key=lambda x: getattr(x, sort_by), reverse=sort_by != "max_drawdown")
+    keys = list(ordered[0].params.keys())
+
+    rows = [keys + ["pnl", "trades", "max_drawdown"]]
+    for result in ordered:
+        rows.append(
+            [str(result.params[key]) for key in keys]
+            + [f"{result.pnl:.4%}", str(result.trades), f"{result.max_drawdown:.4%}"]
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
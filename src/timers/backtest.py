@@ -1,38 +1,46 @@
-from datetime import datetime, timedelta
-from typing import List, Tuple
+from typing import Optional
 
+from metrics.registry import MetricsRegistry, default_registry
 from providers.mock_crypto import MockCryptoProvider
 from models.market import MarketFrame, Market
 
 
 class BacktestTimer:
-    _index: int 
+    # Replays the provider's market frame by frame. The timer and the provider share the
+    # provider's cursor, and the timer advances it itself: while a frame is being handled,
+    # the provider's "now" is that frame.
+    _started: bool = False
+    _metrics: MetricsRegistry
 
     def __init__(
         self,
         provider: MockCryptoProvider,
-        market: Market,
-        starting_index=100,
+        market: Optional[Market]=None,
+        starting_index: Optional[int]=None,
+        metrics: Optional[MetricsRegistry]=None,
     ):
+        if market is not None and market is not provider.market:
+            raise Exception("BacktestTimer must replay the market of its provider")
+
         self._provider = provider
-        self._index = starting_index
-        self._market = market
+        self._market = provider.market
+        self._cursor = provider.cursor
+        self._metrics = metrics or default_registry
+        if starting_index is not None:
+            self._cursor.index = starting_index
 
     def __aiter__(self):
         return self
 
-    def tick(self):
-        self._index += 1
-
     async def __anext__(self) -> MarketFrame:
-        try:
-            if self._index == len(self._market._frames):
-                raise StopIteration
-
-            # return await self._provider.get_current()  # why not this?
+        if self._started:
+            self._cursor.index += 1
+        self._started = True
 
-            mf_of = self._market._frames[self._index]
-            return mf_of[0] if isinstance(mf_of, tuple) else mf_of
-        except StopIteration:
-            raise StopAsyncIteration from None
+        if self._cursor.index >= len(self._market._frames):
+            # What the last frames recorded is written out even if flush_interval hasn't passed
+            self._metrics.flush()
+            raise StopAsyncIteration
 
+        self._metrics.maybe_flush()
+        return await self._provider.get_current()
@@ -1,43 +1,161 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import asyncio
-from typing import List, Tuple
+import enum
+import time
+from typing import Awaitable, Callable, List, Optional
 
+import numpy as np
+
+from metrics.registry import MetricsRegistry, default_registry
+from models.market import AnyFrame, Market
+from models.records import Candle, Frame
 from models.symbol import Symbol
-from providers.ccxt import CCXTProvider
-from models.market import MarketFrame
+from providers.provider import Provider
+
+
+class CatchUp(enum.Enum):
+    # What to do when the loop falls more than a whole interval behind
+    SKIP = "SKIP"  # drop the missed candles, return the latest one
+    COALESCE = "COALESCE"  # return one frame merging the missed candles and the latest one
+    REPLAY = "REPLAY"  # return every missed candle in order, then the latest one
 
 
 class IntervalTimer:
+    # Wakes up when a candle closes: deadlines are epoch-aligned boundaries of the
+    # timeframe (:00 and :30 for 30m), computed from the previous deadline rather than from
+    # when the last fetch finished, so fetch latency doesn't accumulate. settle_seconds
+    # gives the exchange time to finalize the candle before it is fetched.
     last_run: datetime | None = None
+    # Intervals skipped (or coalesced/replayed) on the last wake-up, and since the start
+    last_skipped: int
+    skipped_total: int
+
     _symbols: List[Symbol]
+    _metrics: MetricsRegistry
+    _deadline: Optional[int] = None  # unix seconds
+    _replay: List[AnyFrame]
 
     def __init__(
         self,
-        provider: CCXTProvider,
+        provider: Provider,
         symbols: List[Symbol],
         timeframe_minutes=1,
+        metrics: Optional[MetricsRegistry]=None,
+        # a frame fetched more than this many seconds after it was due counts as late
+        late_after=2.0,
+        settle_seconds=1.0,
+        catch_up=CatchUp.SKIP,
+        clock: Callable[[], float]=time.time,
+        sleep: Callable[[float], Awaitable[None]]=asyncio.sleep,
     ):
         self._timeframe_minutes = timeframe_minutes
+        self._step = timeframe_minutes * 60
         self._provider = provider
         self._symbols = symbols
+        self._metrics = metrics or default_registry
+        self._late_after = late_after
+        self._settle_seconds = settle_seconds
+        self._catch_up = catch_up
+        self._clock = clock
+        self._sleep = sleep
+
+        self._replay = []
+        self.last_skipped = 0
+        self.skipped_total = 0
+
+        self._wait_seconds = self._metrics.histogram("timer_wait_seconds")
+        self._fetch_seconds = self._metrics.histogram("timer_fetch_seconds")
+        self._ticks = self._metrics.counter("timer_ticks_total")
+        self._late_frames = self._metrics.counter("timer_late_frames_total")
+        self._missed_frames = self._metrics.counter("timer_missed_frames_total", catch_up=catch_up.value)
 
     def __aiter__(self):
         return self
 
-    async def __anext__(self) -> MarketFrame:
-        try:
-            if self.last_run is None:
-                self.last_run = datetime.now()
+    # The first boundary strictly after `timestamp`
+    def __next_boundary(self, timestamp: float) -> int:
+        return (int(timestamp) // self._step + 1) * self._step
+
+    async def __sleep_until(self, due: float) -> None:
+        # Sleep can return a little early, so keep going until the deadline has really passed
+        remaining = due - self._clock()
+        while remaining > 0:
+            await self._sleep(remaining)
+            remaining = due - self._clock()
+
+    async def __anext__(self) -> AnyFrame:
+        if self._replay:
+            return self.__tick(self._replay.pop(0))
+
+        start = time.perf_counter()
+        missed = 0
+
+        if self._deadline is None:
+            # The first frame is returned right away, later ones at candle closes
+            self._deadline = self.__next_boundary(self._clock())
+        else:
+            due = self._deadline + self._settle_seconds
+            await self.__sleep_until(due)
+
+            behind = self._clock() - due
+            if behind > self._late_after:
+                self._late_frames.inc()
+
+            # Boundaries that passed while we were busy; the latest one is the one handled now
+            missed = int(behind // self._step)
+            self._deadline += (missed + 1) * self._step
+
+        self._wait_seconds.observe(time.perf_counter() - start)
+
+        self.last_skipped = missed
+        if missed > 0:
+            self.skipped_total += missed
+            self._missed_frames.inc(missed)
+
+        start = time.perf_counter()
+        if missed == 0 or self._catch_up == CatchUp.SKIP:
+            frame = await self._provider.get_current(self._symbols, timeframe_minutes=self._timeframe_minutes)
+        else:
+            history = await self._provider.get_history(
+                self._symbols,
+                count=missed + 1,
+                timeframe_minutes=self._timeframe_minutes,
+            )
+            if self._catch_up == CatchUp.COALESCE:
+                frame = self.__coalesce(history)
             else:
-                next_run = self.last_run + timedelta(minutes=self._timeframe_minutes)
-                while next_run > datetime.now():
-                    await asyncio.sleep(1)
+                frames = [f[0] if isinstance(f, tuple) else f for f in history._frames]
+                frame, self._replay = frames[0], frames[1:]
+        self._fetch_seconds.observe(time.perf_counter() - start)
+
+        return self.__tick(frame)
+
+    def __tick(self, frame: AnyFrame) -> AnyFrame:
+        self.last_run = datetime.fromtimestamp(self._clock())
+        self._ticks.inc()
+        self._metrics.maybe_flush()
+        return frame
+
+    # One candle per symbol spanning all of the market's candles
+    def __coalesce(self, market: Market) -> Frame:
+        columns = market.columns()
+        timestamps = columns.timestamps()
+        if len(timestamps) == 0:
+            raise Exception("No candles to coalesce")
 
-            frame = await self._provider.get_current(
-                self._symbols, timeframe_minutes=self._timeframe_minutes
+        ohlcv = {}
+        for symbol in columns.symbols():
+            block = columns.ohlcv(symbol)
+            present = ~np.isnan(block[3])
+            if not present.any():
+                continue
+            values = block[:, present]
+            ohlcv[symbol] = Candle(
+                float(values[0, 0]),
+                float(values[1].max()),
+                float(values[2].min()),
+                float(values[3, -1]),
+                float(values[4].sum()),
             )
-            self.last_run = datetime.now()
 
-            return frame
-        except StopIteration:
-            raise StopAsyncIteration from None
+        return Frame(datetime.fromtimestamp(int(timestamps[0])), ohlcv)
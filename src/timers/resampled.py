@@ -0,0 +1,67 @@
+import asyncio
+from typing import AsyncIterator, List, Tuple
+
+from models.market import AnyFrame
+from models.resample import CandleAggregator
+
+
+class ResampledFeed:
+    # One fine source (e.g. an IntervalTimer or StreamTimer on 1m candles) shared by timers on
+    # several timeframes: each source frame is pulled once and fed to every timeframe's
+    # CandleAggregator. Create all the timers before iterating any of them; a timer only sees
+    # source frames pulled after it was created.
+    _timer: AsyncIterator[AnyFrame]
+    _source_minutes: int
+    _subscribers: List[Tuple[CandleAggregator, List[AnyFrame]]]  # (aggregator, its completed frames)
+
+    def __init__(self, timer: AsyncIterator[AnyFrame], source_minutes=1) -> None:
+        self._timer = timer
+        self._source_minutes = source_minutes
+        self._subscribers = []
+        self._lock = asyncio.Lock()
+
+    def timer(self, timeframe_minutes: int, include_partial=False) -> "ResampledTimer":
+        return ResampledTimer(self, timeframe_minutes, include_partial=include_partial)
+
+    # The list the timeframe's completed frames are appended to
+    def subscribe(self, timeframe_minutes: int, include_partial=False) -> List[AnyFrame]:
+        pending: List[AnyFrame] = []
+        aggregator = CandleAggregator(timeframe_minutes, source_minutes=self._source_minutes, include_partial=include_partial)
+        self._subscribers.append((aggregator, pending))
+        return pending
+
+    # Pulls source frames until `pending` has a frame; timers waiting at the same time share
+    # the pulls instead of each advancing the source
+    async def fill(self, pending: List[AnyFrame]) -> None:
+        async with self._lock:
+            while not pending:
+                frame = await self._timer.__anext__()
+                for aggregator, frames in self._subscribers:
+                    frames += aggregator.update(frame)
+
+
+class ResampledTimer:
+    # Turns a stream of fine frames into N-minute frames, so one 1m feed can drive strategies
+    # on other timeframes. Pass a ResampledFeed (or use ResampledFeed.timer) to share one
+    # source between several timeframes; a plain timer gets a feed of its own.
+    _feed: ResampledFeed
+    _pending: List[AnyFrame]
+
+    def __init__(
+        self,
+        timer: AsyncIterator[AnyFrame] | ResampledFeed,
+        timeframe_minutes: int,
+        source_minutes=1,
+        include_partial=False,
+    ):
+        self._feed = timer if isinstance(timer, ResampledFeed) else ResampledFeed(timer, source_minutes=source_minutes)
+        self._pending = self._feed.subscribe(timeframe_minutes, include_partial=include_partial)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> AnyFrame:
+        if not self._pending:
+            await self._feed.fill(self._pending)
+
+        return self._pending.pop(0)
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from metrics.registry import MetricsRegistry, default_registry
+from models.market import MarketFrame
+from providers.stream import StreamingProvider
+
+
+class StreamTimer:
+    # Yields frames pushed by a StreamingProvider the moment their candles close,
+    # instead of polling on an interval
+    _metrics: MetricsRegistry
+
+    def __init__(self, provider: StreamingProvider, metrics: Optional[MetricsRegistry]=None):
+        self._provider = provider
+        self._metrics = metrics or default_registry
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> MarketFrame:
+        try:
+            await self._provider.start()
+            frame = await self._provider.next_frame()
+            self._metrics.maybe_flush()
+            return frame
+        except StopIteration:
+            raise StopAsyncIteration from None
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from models.columnar import to_epoch_seconds
+from models.market import MarketFrame
+from models.symbol import Symbol
+from models.ticks import TickBatch, TickCandleBuilder, TickStore, merge_streams
+
+
+class TickReplayTimer:
+    # Tick-level counterpart of BacktestTimer: replays the stored ticks of `symbols` in
+    # timestamp order across symbols, as TickBatches of at most about
+    # len(symbols) * batch_size events. Chunks are memory-mapped and merged as they are
+    # reached, so the store never has to fit in memory.
+    _batches: Iterator[TickBatch]
+
+    def __init__(
+        self,
+        store: TickStore,
+        symbols: List[Symbol | str],
+        since: Optional[datetime | int]=None,
+        until: Optional[datetime | int]=None,
+        batch_size=65536,
+    ):
+        # Bounds are unix seconds or datetimes, like elsewhere; the store works in milliseconds
+        since_ms = to_epoch_seconds(since) * 1000 if since is not None else None
+        until_ms = to_epoch_seconds(until) * 1000 if until is not None else None
+
+        self._batches = merge_streams(
+            {str(symbol): store.read(symbol, since=since_ms, until=until_ms) for symbol in dict.fromkeys(symbols)},
+            batch_size=batch_size,
+        )
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> TickBatch:
+        batch = next(self._batches, None)
+        if batch is None:
+            raise StopAsyncIteration
+        return batch
+
+
+class TickCandleTimer:
+    # Turns a tick replay into N-minute frames built on the fly, so existing strategies can
+    # run on tick data the same way they run on a BacktestTimer
+    _pending: List[MarketFrame]
+    _done = False
+
+    def __init__(self, replay: TickReplayTimer, timeframe_minutes=1):
+        self._replay = replay
+        self._builder = TickCandleBuilder(timeframe_minutes)
+        self._pending = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> MarketFrame:
+        while not self._pending:
+            if self._done:
+                raise StopAsyncIteration
+            try:
+                batch = await self._replay.__anext__()
+                self._pending += self._builder.add(batch)
+            except StopAsyncIteration:
+                self._done = True
+                self._pending += self._builder.flush()
+
+        return self._pending.pop(0)
@@ -1,16 +1,17 @@
-from typing import Dict
+from typing import Dict, Optional
 
 from wallets.wallet import Wallet
 
 
 class MockWallet(Wallet):
+    # Balances per asset (e.g. "BTC", "USDT"), kept up to date by execution.paper.PaperBroker
     balances: Dict[str, float] = {}
 
-    def __init__(self):
-        self.balances = {}
+    def __init__(self, balances: Optional[Dict[str, float]]=None):
+        self.balances = dict(balances or {})
 
     async def get_balance(self, symbol: str) -> float:
-        return 1000
+        return self.balances.get(symbol, 0.0)
 
     async def get_all(self) -> Dict[str, float]:
-        return self.balances
+        return dict(self.balances)
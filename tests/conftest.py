@@ -0,0 +1,71 @@
+import sys
+from datetime import datetime
+from os import path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pytest
+
+# The sources are run from src/ (python src/app.py), so tests import them the same way
+sys.path.insert(0, path.join(path.dirname(path.dirname(path.abspath(__file__))), "src"))
+
+from models.columnar import MarketColumns  # noqa: E402
+from models.market import AnyOutput, Market, MarketFrame, OHLCV  # noqa: E402
+from models.symbol import Symbol  # noqa: E402
+
+START = datetime(2024, 1, 1)
+
+
+class MarketFactory:
+    # Builds a market of 1m candles from each symbol's closes: open is the close, high and low
+    # are `spread` away from it and NaN closes (or the `gaps` indices) are missing candles.
+    # `minutes` are the frames' offsets from `start`, to leave out whole frames.
+    def __call__(
+        self,
+        closes: Dict[Symbol, Sequence[float]],
+        start=START,
+        minutes: Optional[Sequence[int]]=None,
+        gaps: Optional[Dict[Symbol, Sequence[int]]]=None,
+        spread=0.0,
+        volume=1.0,
+        columnar=True,
+        outputs: Optional[Dict[int, AnyOutput]]=None,
+    ) -> Market:
+        data = {}
+        for symbol, values in closes.items():
+            close = np.array(values, dtype=np.float64)
+            block = np.vstack([close, close + spread, close - spread, close, np.full(len(close), volume)])
+            block[:, list((gaps or {}).get(symbol, []))] = np.nan
+            data[str(symbol)] = block
+
+        length = next(iter(data.values())).shape[1]
+        offsets = np.arange(length, dtype=np.int64) if minutes is None else np.array(minutes, dtype=np.int64)
+        timestamps = offsets * 60 + int(start.timestamp())
+
+        if columnar:
+            columns = MarketColumns()
+            columns.append_rows(timestamps, data)
+            return Market.from_columns(columns, outputs)
+
+        frames = []
+        for i, timestamp in enumerate(timestamps):
+            frame = MarketFrame(
+                timestamp=datetime.fromtimestamp(int(timestamp)),
+                ohlcv={
+                    symbol: OHLCV(open=block[0, i], high=block[1, i], low=block[2, i], close=block[3, i], volume=block[4, i])
+                    for symbol, block in data.items()
+                    if not np.isnan(block[3, i])
+                },
+            )
+            frames.append((frame, outputs[i]) if outputs and i in outputs else frame)
+        return Market(frames=frames)
+
+    # Geometric random walks around 100, one per symbol
+    def random_walk(self, symbols: Sequence[Symbol], length: int, seed=1, volatility=0.01) -> Dict[Symbol, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        return {symbol: 100 * np.exp(np.cumsum(rng.normal(0, volatility, length))) for symbol in symbols}
+
+
+@pytest.fixture
+def make_market() -> MarketFactory:
+    return MarketFactory()
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from models.market import Market
+
+
+class MockExchange:
+    # In-process stand-in for a ccxt async exchange, serving a market's candles to a
+    # CCXTProvider(exchange=MockExchange(...)). `latency` delays every request and symbols
+    # in `failing` raise, to exercise timeouts and missing candles without a network.
+    # Trades and order books are served from `trades` and `books`, keyed by symbol.
+    id: str
+    latency: float
+    failing: Set[str]
+    trades: Dict[str, List[Dict[str, Any]]]
+    books: Dict[str, Dict[str, Any]]
+    # Requests being answered now, and the most there ever were at once
+    in_flight = 0
+    max_in_flight = 0
+    session: Any = None
+    own_session = True
+
+    def __init__(self, id: str, market: Market, latency=0.0, failing: Optional[Set[str]]=None) -> None:
+        self.id = id
+        self.latency = latency
+        self.failing = failing if failing is not None else set()
+        self.trades = {}
+        self.books = {}
+
+        columns = market.columns()
+        self._timestamps = columns.timestamps() * 1000
+        self._candles: Dict[str, np.ndarray] = {symbol: columns.ohlcv(symbol) for symbol in columns.symbols()}
+
+    async def load_markets(self, reload=False) -> Dict[str, Any]:
+        return {symbol: {"symbol": symbol} for symbol in self._candles}
+
+    # Candles as [timestamp (ms), open, high, low, close, volume] opening at or after `since`
+    # and no later than params["until"], at most `limit`, like the exchanges answer
+    async def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe="1m",
+        since: Optional[int]=None,
+        limit: Optional[int]=None,
+        params: Optional[Dict[str, Any]]=None,
+    ) -> List[List[Any]]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if symbol in self.failing or symbol not in self._candles:
+            raise Exception(f"{self.id} does not serve {symbol}")
+
+        start = int(np.searchsorted(self._timestamps, since)) if since is not None else 0
+        until = (params or {}).get("until")
+        end = int(np.searchsorted(self._timestamps, until, side="right")) if until is not None else len(self._timestamps)
+        if limit is not None:
+            end = min(end, start + limit)
+
+        block = self._candles[symbol][:, start:end]
+        present = ~np.isnan(block[3])
+        rows = np.column_stack([self._timestamps[start:end][present], block[:, present].T])
+        return [[int(row[0]), *row[1:]] for row in rows.tolist()]
+
+    async def fetch_trades(self, symbol: str, since: Optional[int]=None, limit: Optional[int]=None) -> List[Dict[str, Any]]:
+        trades = [trade for trade in self.trades.get(symbol, []) if since is None or trade["timestamp"] >= since]
+        return trades[:limit] if limit is not None else trades
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int]=None) -> Dict[str, Any]:
+        book = self.books[symbol]
+        return {**book, "bids": book["bids"][:limit], "asks": book["asks"][:limit]}
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Dict, List
+
+from models.market import Market
+from models.symbol import Symbol
+
+
+class MockStreamExchange:
+    # In-process stand-in for a ccxt.pro exchange: publish() is the server side pushing
+    # kline updates, watch_ohlcv() the client side a StreamingProvider subscribes with
+    _subscriptions: Dict[str, "asyncio.Queue[List[Any]]"]
+
+    def __init__(self) -> None:
+        self._subscriptions = {}
+
+    def __queue(self, symbol: str) -> "asyncio.Queue[List[Any]]":
+        queue = self._subscriptions.get(symbol)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._subscriptions[symbol] = queue
+        return queue
+
+    # candle: [timestamp (ms), open, high, low, close, volume]; publishing the same
+    # timestamp again is an update of a still-forming candle
+    def publish(self, symbol: Symbol | str, candle: List[Any]) -> None:
+        self.__queue(str(symbol)).put_nowait(candle)
+
+    async def watch_ohlcv(self, symbol: str, timeframe: str="1m") -> List[List[Any]]:
+        queue = self.__queue(symbol)
+        candles = [await queue.get()]
+        while not queue.empty():
+            candles.append(queue.get_nowait())
+        return candles
+
+    # Streams a market candle by candle: each candle is first published half-formed, then
+    # final, and the next frame's candles close it
+    async def replay(self, market: Market, delay=0.0) -> None:
+        for frame in market._frames:
+            mf = frame[0] if isinstance(frame, tuple) else frame
+            timestamp = int(mf.timestamp.timestamp() * 1000)
+            for symbol, ohlcv in mf.ohlcv.items():
+                self.publish(symbol, [timestamp, ohlcv.open, ohlcv.open, ohlcv.open, ohlcv.open, 0.0])
+                self.publish(symbol, [timestamp, ohlcv.open, ohlcv.high, ohlcv.low, ohlcv.close, ohlcv.volume])
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,98 @@
+import asyncio
+from typing import List
+
+import numpy as np
+
+from conftest import MarketFactory
+from models.market import Market
+from models.symbol import Pair, Symbol
+from models.transaction import Transaction
+from providers.mock_crypto import MockCryptoProvider
+from strategies.average_crossover import AverageCrossover
+from strategies.batch import run_batch, transactions_from_signals
+from timers.backtest import BacktestTimer
+
+PAIRS: List[Symbol] = [Pair.of("BTC", "USDT"), Pair.of("ETH", "USDT")]
+STARTING_INDEX = 30
+
+
+# Missing candles for both pairs, in the warm-up and in the replayed frames
+GAPS = {PAIRS[1]: [3, 10, 11, 12, 45, 46, 100, 101, 102, 103, 250, 399], PAIRS[0]: [31, 200]}
+
+
+def random_market(make_market: MarketFactory, gaps=False) -> Market:
+    return make_market(make_market.random_walk(PAIRS, 400), gaps=GAPS if gaps else None, spread=0.1, volume=10.0)
+
+
+def strategy(provider: MockCryptoProvider) -> AverageCrossover:
+    return AverageCrossover(provider=provider, symbols=PAIRS, sma_window=20, fma_window=5, jitter=0.0)
+
+
+class CountingProvider(MockCryptoProvider):
+    calls = 0
+
+    async def get_history(self, *args, **kwargs) -> Market:
+        self.calls += 1
+        return await super().get_history(*args, **kwargs)
+
+
+async def event_driven(market: Market, starting_index=STARTING_INDEX) -> List[Transaction]:
+    provider = MockCryptoProvider(market, starting_index=starting_index)
+    crossover = strategy(provider)
+    transactions: List[Transaction] = []
+    async for frame in BacktestTimer(provider):
+        transactions += (await crossover.execute(frame)).transactions
+    return transactions
+
+
+async def batch(market: Market, starting_index=STARTING_INDEX) -> List[Transaction]:
+    provider = MockCryptoProvider(market, starting_index=starting_index)
+    signals = await run_batch(strategy(provider), provider, market, PAIRS, starting_index=starting_index)
+    return transactions_from_signals(market.columns().timestamps()[starting_index:], signals)
+
+
+def summary(transactions: List[Transaction]) -> List[tuple]:
+    return [(t.timestamp, str(t.symbol), t.operation.value) for t in transactions]
+
+
+def check(market: Market, starting_index=STARTING_INDEX) -> None:
+    expected = asyncio.run(event_driven(market, starting_index))
+    assert expected
+    assert summary(asyncio.run(batch(market, starting_index))) == summary(expected)
+
+
+def test_batch_matches_event_driven(make_market):
+    check(random_market(make_market))
+
+
+def test_batch_matches_event_driven_with_missing_candles(make_market):
+    check(random_market(make_market, gaps=True))
+
+
+def test_short_history_is_warmed_up_once_and_fed_incrementally(make_market):
+    # Less history than sma_window before the first frame
+    market = random_market(make_market, gaps=True)
+    check(market, starting_index=5)
+
+    provider = CountingProvider(market, starting_index=5)
+    crossover = strategy(provider)
+
+    async def replay():
+        async for frame in BacktestTimer(provider):
+            await crossover.execute(frame)
+
+    asyncio.run(replay())
+    assert provider.calls == 1
+
+
+def test_batch_signals_stay_aligned_across_gaps(make_market):
+    market = random_market(make_market, gaps=True)
+    provider = MockCryptoProvider(market, starting_index=STARTING_INDEX)
+    signals = asyncio.run(run_batch(strategy(provider), provider, market, PAIRS, starting_index=STARTING_INDEX))
+
+    length = len(market.columns()) - STARTING_INDEX
+    for pair in PAIRS:
+        closes = market.columns().column(pair, "close")[STARTING_INDEX:]
+        assert len(signals[pair].signal) == length
+        assert np.array_equal(np.isnan(signals[pair].indicators["sma"]), np.isnan(closes))
+        assert not signals[pair].signal[np.isnan(closes)].any()
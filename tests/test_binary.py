@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from conftest import START
+from models.binary import read_market_file, write_market_file
+from models.market import Market
+from models.records import OutputRecord
+from models.symbol import Pair
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+
+
+def test_market_file_round_trips_with_missing_candles(tmp_path, make_market):
+    filename = str(tmp_path / "market.bin")
+    market = make_market(make_market.random_walk([BTC, ETH], 100), gaps={ETH: [0, 50, 99]}, spread=0.5)
+    write_market_file(filename, market.columns())
+
+    columns = read_market_file(filename)
+    assert columns.symbols() == [str(BTC), str(ETH)]
+    np.testing.assert_array_equal(columns.timestamps(), market.columns().timestamps())
+    for symbol in (BTC, ETH):
+        np.testing.assert_array_equal(columns.ohlcv(symbol), market.columns().ohlcv(symbol))
+
+
+def test_mapped_columns_are_read_only_until_appended_to(tmp_path, make_market):
+    filename = str(tmp_path / "market.bin")
+    write_market_file(filename, make_market({BTC: np.arange(10)}).columns())
+
+    columns = read_market_file(filename)
+    with pytest.raises(ValueError):
+        columns.column(BTC, "close")[0] = -1.0
+
+    # Appending copies the data out of the mapping; the file is left alone
+    columns.append(int(columns.timestamps()[-1]) + 60, {str(BTC): (10.0, 10.0, 10.0, 10.0, 1.0)})
+    np.testing.assert_array_equal(columns.column(BTC, "close"), np.arange(11))
+    assert len(read_market_file(filename)) == 10
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["list", "columnar"])
+def test_market_saves_and_imports_the_bin_format(tmp_path, make_market, columnar):
+    filename = str(tmp_path / "market.bin")
+    market = make_market({BTC: np.arange(20), ETH: np.arange(20) * 2}, gaps={BTC: [7]}, columnar=columnar)
+    market.save_to_file(filename, format="bin")
+
+    imported = Market(columnar=columnar)
+    imported.import_from_file(filename, format="bin")
+    assert imported.columnar == columnar
+    np.testing.assert_array_equal(imported.columns().timestamps(), market.columns().timestamps())
+    np.testing.assert_array_equal(imported.columns().ohlcv(BTC), market.columns().ohlcv(BTC))
+    assert str(BTC) not in imported._frames[7].ohlcv
+
+
+def test_invalid_files_and_markets_are_rejected(tmp_path, make_market):
+    not_a_market = tmp_path / "other.bin"
+    not_a_market.write_bytes(b"\0" * 128)
+    with pytest.raises(Exception, match="not a market data file"):
+        read_market_file(str(not_a_market))
+
+    long_name = Pair.of("X" * 20, "Y" * 20)
+    with pytest.raises(Exception, match="too long"):
+        write_market_file(str(tmp_path / "long.bin"), make_market({long_name: [1.0]}).columns())
+
+    traded = make_market({BTC: [1.0]}, outputs={0: OutputRecord(START, [], [], [])})
+    with pytest.raises(NotImplementedError):
+        traded.save_to_file(str(tmp_path / "traded.bin"), format="bin")
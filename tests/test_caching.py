@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from conftest import START, MarketFactory
+from models.market import Market
+from models.symbol import Pair
+from providers.caching import CachingProvider
+from providers.mock_crypto import MockCryptoProvider
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+
+
+class RecordingProvider(MockCryptoProvider):
+    requests: List[Tuple[Optional[datetime], Optional[datetime]]]
+
+    def __init__(self, market: Market, starting_index: int) -> None:
+        super().__init__(market, starting_index=starting_index)
+        self.requests = []
+
+    async def get_history(self, symbols=[], count=None, since=None, until=None, timeframe_minutes=1) -> Market:
+        self.requests.append((since, until))
+        return await super().get_history(symbols, count=count, since=since, until=until, timeframe_minutes=timeframe_minutes)
+
+
+# 1m candles with no frames at all at minutes 120-122 and no ETH candle at minute 150
+def market(make_market: MarketFactory) -> Market:
+    minutes = np.array([i for i in range(200) if not 120 <= i <= 122])
+    closes = minutes + 1.0
+    return make_market({BTC: closes, ETH: closes * 2}, minutes=minutes, gaps={ETH: np.flatnonzero(minutes == 150)})
+
+
+def caching(provider: MockCryptoProvider, filename: str) -> CachingProvider:
+    # The replay's "now" is the frame at the cursor
+    timestamps = provider.market.columns().timestamps()
+    return CachingProvider(provider, filename, clock=lambda: datetime.fromtimestamp(int(timestamps[provider.cursor.index])))
+
+
+def assert_same_market(a: Market, b: Market) -> None:
+    np.testing.assert_array_equal(a.columns().timestamps(), b.columns().timestamps())
+    for symbol in (BTC, ETH):
+        np.testing.assert_array_equal(a.columns().ohlcv(str(symbol)), b.columns().ohlcv(str(symbol)))
+
+
+def test_cached_history_is_the_providers_history(tmp_path, make_market):
+    provider = RecordingProvider(market(make_market), starting_index=190)
+    cache = caching(provider, str(tmp_path / "cache.db"))
+
+    async def run():
+        for _ in range(2):  # cold, then warm
+            assert_same_market(
+                await cache.get_history([BTC, ETH], count=40),
+                await provider.get_history([BTC, ETH], count=40),
+            )
+            assert_same_market(
+                await cache.get_history([BTC, ETH], since=START + timedelta(minutes=100), until=START + timedelta(minutes=160)),
+                await provider.get_history([BTC, ETH], since=START + timedelta(minutes=100), until=START + timedelta(minutes=160)),
+            )
+
+    asyncio.run(run())
+    cache.close()
+
+
+def test_warm_cache_makes_no_upstream_calls(tmp_path, make_market):
+    provider = RecordingProvider(market(make_market), starting_index=190)
+    cache = caching(provider, str(tmp_path / "cache.db"))
+    since, until = START + timedelta(minutes=100), START + timedelta(minutes=180)
+
+    async def run():
+        await cache.get_history([BTC, ETH], since=since, until=until)
+        assert len(provider.requests) == 1
+        # The missing frames and ETH's missing candle are known gaps now
+        history = await cache.get_history([BTC, ETH], since=since, until=until)
+        assert len(provider.requests) == 1
+        assert len(history.columns()) == 80 - 3
+
+    asyncio.run(run())
+    cache.close()
+
+
+def test_partial_overlap_fetches_only_the_missing_range(tmp_path, make_market):
+    provider = RecordingProvider(market(make_market), starting_index=190)
+    cache = caching(provider, str(tmp_path / "cache.db"))
+
+    async def run():
+        await cache.get_history([BTC, ETH], since=START + timedelta(minutes=50), until=START + timedelta(minutes=100))
+        await cache.get_history([BTC, ETH], since=START + timedelta(minutes=80), until=START + timedelta(minutes=130))
+
+    asyncio.run(run())
+    cache.close()
+    assert provider.requests[1:] == [(START + timedelta(minutes=100), START + timedelta(minutes=130))]
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from conftest import START, MarketFactory
+from metrics.registry import MetricsRegistry
+from mock_exchange import MockExchange
+from models.market import Market
+from models.symbol import Pair
+from providers.ccxt import CCXTProvider
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+SOL = Pair.of("SOL", "USDT")
+
+
+# Each pair's closes count up from 100, 200, ...
+def market(make_market: MarketFactory, pairs, gaps=None) -> Market:
+    return make_market({pair: np.arange(10, dtype=np.float64) + 100 * (i + 1) for i, pair in enumerate(pairs)}, gaps=gaps)
+
+
+def test_current_frame_is_the_last_closed_candle(make_market):
+    now = int(time.time()) // 60 * 60
+    # Candles up to a few minutes ahead, so the one forming now exists too
+    closes = np.arange(now - 600, now + 300, 60, dtype=np.float64)
+    source = make_market({BTC: closes}, start=datetime.fromtimestamp(now - 600))
+
+    provider = CCXTProvider(apikey="", secret="", exchange=MockExchange("mock", source), metrics=MetricsRegistry())
+    frame = asyncio.run(provider.get_current([BTC]))
+
+    # The boundary is taken when get_current runs, which may be a minute after `now`
+    closed = int(frame.timestamp.timestamp())
+    assert closed == int(time.time()) // 60 * 60 - 60 or closed == now - 60
+    assert frame.ohlcv[str(BTC)].close == closed
+    assert frame.timestamp < datetime.fromtimestamp(time.time() // 60 * 60)
+
+
+def test_history_requests_respect_max_concurrency(make_market):
+    pairs = [Pair.of(f"C{i}", "USDT") for i in range(6)]
+    exchange = MockExchange("mock", market(make_market, pairs), latency=0.01)
+    provider = CCXTProvider(apikey="", secret="", exchange=exchange, max_concurrency=2, metrics=MetricsRegistry())
+
+    history = asyncio.run(provider.get_history(pairs, since=START, until=START + timedelta(minutes=10)))
+
+    assert exchange.max_in_flight == 2
+    assert sorted(history.columns().symbols()) == sorted(str(pair) for pair in pairs)
+
+
+def test_partially_failed_history_keeps_the_other_pairs_on_one_grid(capsys, make_market):
+    exchange = MockExchange("mock", market(make_market, [BTC, ETH, SOL], gaps={BTC: [3], ETH: [3, 5]}), failing={str(SOL)})
+    metrics = MetricsRegistry()
+    provider = CCXTProvider(apikey="", secret="", exchange=exchange, metrics=metrics)
+
+    columns = asyncio.run(provider.get_history([BTC, ETH, SOL], since=START, until=START + timedelta(minutes=8))).columns()
+
+    # Minute 3 has no candle at all; minute 5 only misses ETH's
+    expected = np.array([0, 1, 2, 4, 5, 6, 7]) * 60 + int(START.timestamp())
+    np.testing.assert_array_equal(columns.timestamps(), expected)
+    assert sorted(columns.symbols()) == [str(BTC), str(ETH)]
+    np.testing.assert_array_equal(columns.column(BTC, "close"), [100, 101, 102, 104, 105, 106, 107])
+    np.testing.assert_array_equal(columns.column(ETH, "close"), [200, 201, 202, 204, np.nan, 206, 207])
+
+    reports = provider.last_fetch_reports
+    assert reports[str(SOL)].error is not None
+    assert (reports[str(BTC)].missing, reports[str(ETH)].missing) == (0, 1)
+    assert metrics.counter("fetch_errors_total", symbol=str(SOL), exchange="mock").value == 1
+    assert metrics.counter("fetch_missing_candles_total", symbol=str(ETH), exchange="mock").value == 1
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from conftest import START
+from models.csv_import import iter_csv_frames, read_csv_columns
+from models.market import Market
+from models.records import OutputRecord
+from models.symbol import Pair
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+LENGTH = 20
+
+
+def saved(tmp_path, make_market) -> Market:
+    # No candles at all at minute 4 (a frame file with only its header), no ETH one at minute 9,
+    # and output frames in the same directory
+    market = make_market(
+        {BTC: np.arange(LENGTH) + 0.5, ETH: np.arange(LENGTH) * 2.0},
+        gaps={BTC: [4], ETH: [4, 9]},
+        spread=1.0,
+        outputs={i: OutputRecord(START + timedelta(minutes=i), [], [], []) for i in range(0, LENGTH, 3)},
+    )
+    market.save_to_file(str(tmp_path))
+    return market
+
+
+@pytest.mark.parametrize("chunk_size", [3, 2048])
+def test_columns_are_the_saved_market(tmp_path, make_market, chunk_size):
+    market = saved(tmp_path, make_market)
+    columns = read_csv_columns(str(tmp_path), workers=2, chunk_size=chunk_size)
+
+    np.testing.assert_array_equal(columns.timestamps(), market.columns().timestamps())
+    for symbol in (BTC, ETH):
+        np.testing.assert_array_equal(columns.ohlcv(symbol), market.columns().ohlcv(symbol))
+
+
+def test_symbols_and_time_range_are_filtered(tmp_path, make_market):
+    saved(tmp_path, make_market)
+    since, until = START + timedelta(minutes=5), START + timedelta(minutes=12)
+    columns = read_csv_columns(str(tmp_path), symbols=[ETH], since=since, until=until, chunk_size=4)
+
+    assert columns.symbols() == [str(ETH)]
+    # until is exclusive
+    assert columns.timestamps().tolist() == [int((START + timedelta(minutes=i)).timestamp()) for i in range(5, 12)]
+    np.testing.assert_array_equal(columns.column(ETH, "close"), [10.0, 12.0, 14.0, 16.0, np.nan, 20.0, 22.0])
+
+
+def test_frames_are_streamed_in_order_without_missing_candles(tmp_path, make_market):
+    market = saved(tmp_path, make_market)
+    frames = list(iter_csv_frames(str(tmp_path), chunk_size=3))
+
+    assert [timestamp for timestamp, _ in frames] == market.columns().timestamps().tolist()
+    assert frames[4][1] == {}
+    assert set(frames[9][1]) == {str(BTC)}
+    np.testing.assert_array_equal(frames[1][1][str(BTC)], [1.5, 2.5, 0.5, 1.5, 1.0])
+
+    streamed = list(Market.stream_from_file(str(tmp_path), symbols=[BTC], until=START + timedelta(minutes=3)))
+    assert [frame.ohlcv[str(BTC)].close for frame in streamed] == [0.5, 1.5, 2.5]
+
+
+def test_blank_lines_and_a_missing_trailing_newline_are_tolerated(tmp_path):
+    header = "timestamp,symbol,open,high,low,close,volume\n"
+    timestamp = int(START.timestamp())
+    (tmp_path / f"{timestamp}.mf.csv").write_text(header + f"{timestamp},BTC/USDT,1,2,0,1.5,3\n\n{timestamp},ETH/USDT,4,5,3,4.5,6")
+
+    columns = read_csv_columns(str(tmp_path))
+    assert columns.column(BTC, "close").tolist() == [1.5]
+    assert columns.column(ETH, "volume").tolist() == [6.0]
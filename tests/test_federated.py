@@ -0,0 +1,122 @@
+import asyncio
+from datetime import timedelta
+from typing import Dict, Optional, Set
+
+import numpy as np
+import pytest
+
+from conftest import START, MarketFactory
+from metrics.registry import MetricsRegistry
+from mock_exchange import MockExchange
+from models.market import Market
+from models.symbol import Pair, VenuePair
+from providers.ccxt import CCXTProvider
+from providers.federated import FederatedProvider, MissingCandle
+from providers.mock_crypto import MockCryptoProvider
+from providers.provider import Provider
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+
+
+def market(make_market: MarketFactory, offset=0.0, gaps: Optional[Dict[Pair, list]]=None) -> Market:
+    closes = np.arange(30, dtype=np.float64) + 100 + offset
+    return make_market({BTC: closes, ETH: closes * 2}, gaps=gaps)
+
+
+def ccxt_venue(id: str, source: Market, latency=0.0, failing: Optional[Set[str]]=None) -> CCXTProvider:
+    return CCXTProvider(apikey="", secret="", exchange=MockExchange(id, source, latency=latency, failing=failing), metrics=MetricsRegistry())
+
+
+async def history(provider: FederatedProvider) -> Market:
+    return await provider.get_history([BTC, ETH], since=START, until=START + timedelta(minutes=9))
+
+
+def test_history_is_aligned_across_venues(make_market):
+    federated = FederatedProvider({"a": ccxt_venue("a", market(make_market)), "b": ccxt_venue("b", market(make_market, offset=1.0))}, metrics=MetricsRegistry())
+    columns = asyncio.run(history(federated)).columns()
+
+    assert sorted(columns.symbols()) == ["a:BTC/USDT", "a:ETH/USDT", "b:BTC/USDT", "b:ETH/USDT"]
+    np.testing.assert_array_equal(columns.column("b:BTC/USDT", "close") - columns.column("a:BTC/USDT", "close"), np.ones(len(columns)))
+
+
+def test_slow_venue_times_out_and_its_candles_are_missing(make_market):
+    metrics = MetricsRegistry()
+    federated = FederatedProvider(
+        {"a": ccxt_venue("a", market(make_market)), "b": ccxt_venue("b", market(make_market), latency=1.0)},
+        timeout=5.0,
+        timeouts={"b": 0.05},
+        metrics=metrics,
+    )
+    columns = asyncio.run(history(federated)).columns()
+
+    assert list(federated.last_errors) == ["b"]
+    assert metrics.counter("federated_timeouts_total", venue="b").value == 1
+    assert not np.isnan(columns.column("a:BTC/USDT", "close")).any()
+    assert np.isnan(columns.column("b:BTC/USDT", "close")).all()
+
+
+def test_failing_symbol_only_loses_its_own_candles(make_market):
+    federated = FederatedProvider(
+        {"a": ccxt_venue("a", market(make_market)), "b": ccxt_venue("b", market(make_market), failing={str(ETH)})},
+        metrics=MetricsRegistry(),
+    )
+    columns = asyncio.run(history(federated)).columns()
+
+    assert federated.last_errors == {}  # the venue answered, without one of its pairs
+    assert not np.isnan(columns.column("b:BTC/USDT", "close")).any()
+    assert np.isnan(columns.column("b:ETH/USDT", "close")).all()
+
+    failing = FederatedProvider(
+        {"a": ccxt_venue("a", market(make_market)), "b": ccxt_venue("b", market(make_market), failing={str(ETH)})},
+        missing=MissingCandle.FAIL,
+        metrics=MetricsRegistry(),
+    )
+    with pytest.raises(Exception, match="b:ETH/USDT"):
+        asyncio.run(history(failing))
+
+
+def test_all_venues_failing_raises(make_market):
+    federated = FederatedProvider({"a": ccxt_venue("a", market(make_market), failing={str(BTC), str(ETH)})}, metrics=MetricsRegistry())
+    with pytest.raises(Exception, match="All venue requests failed"):
+        asyncio.run(history(federated))
+
+
+def test_missing_candles_are_forward_filled(make_market):
+    source = market(make_market, gaps={BTC: [0, 4, 5]})
+    venues: Dict[str, Provider] = {"a": MockCryptoProvider(source, starting_index=len(source.columns()))}
+    federated = FederatedProvider(venues, missing=MissingCandle.PREVIOUS, metrics=MetricsRegistry())
+    columns = asyncio.run(history(federated)).columns()
+
+    closes = columns.column("a:BTC/USDT", "close")
+    volumes = columns.column("a:BTC/USDT", "volume")
+    assert np.isnan(closes[0])  # nothing to repeat before the first candle
+    assert closes[4] == closes[5] == closes[3]
+    assert columns.column("a:BTC/USDT", "high")[4] == closes[3]
+    assert volumes[4] == volumes[5] == 0.0
+    assert volumes[3] == 1.0
+
+
+def test_late_venue_candle_is_missing_from_the_current_frame(make_market):
+    source = market(make_market)
+    venues: Dict[str, Provider] = {
+        "a": MockCryptoProvider(source, starting_index=10),
+        "b": MockCryptoProvider(source, starting_index=10),
+    }
+    metrics = MetricsRegistry()
+    federated = FederatedProvider(venues, missing=MissingCandle.PREVIOUS, metrics=metrics)
+
+    async def run():
+        on_time = await federated.get_current([BTC, VenuePair.of("b", "ETH", "USDT")])
+        venues["a"].tick()  # b stays a candle behind
+        late = await federated.get_current([BTC, VenuePair.of("b", "ETH", "USDT")])
+        return on_time, late
+
+    on_time, late = asyncio.run(run())
+    assert set(on_time.ohlcv) == {"a:BTC/USDT", "b:BTC/USDT", "b:ETH/USDT"}
+    assert late.timestamp == START + timedelta(minutes=11)
+    assert late.ohlcv["a:BTC/USDT"].close == 111.0
+    # b's candles are repeated from its last close as flat candles without volume
+    assert late.ohlcv["b:BTC/USDT"].close == on_time.ohlcv["b:BTC/USDT"].close == 110.0
+    assert late.ohlcv["b:ETH/USDT"].volume == 0.0
+    assert metrics.counter("federated_late_candles_total", venue="b").value == 1
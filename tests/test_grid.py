@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from conftest import MarketFactory
+from models.market import Market
+from models.symbol import Pair
+from strategies.average_crossover import AverageCrossover
+from sweeps.grid import _share_market, evaluate_positions, run_sweep
+
+PAIRS = [Pair.of("BTC", "USDT"), Pair.of("ETH", "USDT"), Pair.of("SOL", "USDT")]
+
+
+def gapped_market(make_market: MarketFactory) -> Market:
+    return make_market(make_market.random_walk(PAIRS[:2], 300, seed=2), gaps={PAIRS[1]: [5, 6, 120, 121, 122, 299]}, volume=10.0)
+
+
+def test_shared_market_keeps_symbols_aligned(make_market):
+    market = gapped_market(make_market)
+    filename, length = _share_market(market, PAIRS)
+    try:
+        data = np.fromfile(filename, dtype=np.float64).reshape(len(PAIRS), length)
+    finally:
+        os.unlink(filename)
+
+    assert length == len(market.columns())
+    for i, pair in enumerate(PAIRS[:2]):
+        np.testing.assert_array_equal(data[i], market.columns().column(pair, "close"))
+    assert np.isnan(data[2]).all()  # not in the market at all
+
+
+def test_sweep_matches_batch_on_aligned_closes(make_market):
+    market = gapped_market(make_market)
+    pairs = PAIRS[:2]
+    params = {"sma_window": 20, "fma_window": 5, "jitter": 0.0, "transaction_cost": 0.001}
+    [result] = run_sweep(market, pairs, {key: [value] for key, value in params.items()}, starting_index=50, workers=1)
+
+    closes = {pair: market.columns().column(pair, "close") for pair in pairs}
+    strategy = AverageCrossover(provider=None, symbols=pairs, **params)
+    signals = strategy.execute_batch(
+        {pair: closes[pair][50:] for pair in pairs},
+        warm_up={pair: closes[pair][50 - strategy.warm_up_count:50] for pair in pairs},
+    )
+    pnl, trades, max_drawdown = evaluate_positions(
+        np.stack([closes[pair][50:] for pair in pairs]),
+        np.stack([signals[pair].position for pair in pairs]).astype(np.float64),
+        0.001,
+    )
+
+    assert trades > 0 and np.isfinite(result.pnl)
+    assert (result.pnl, result.trades, result.max_drawdown) == (pnl, trades, max_drawdown)
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+from metrics.registry import MetricsRegistry
+from models.market import Market, MarketFrame
+from models.symbol import Pair
+from providers.mock_crypto import MockCryptoProvider
+from timers.interval import CatchUp, IntervalTimer
+
+BTC = Pair.of("BTC", "USDT")
+
+
+class Clock:
+    now: float
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_missed_intervals_are_counted():
+    clock = Clock(1_700_000_010.0)
+    metrics = MetricsRegistry()
+    frame = MarketFrame(timestamp=datetime.fromtimestamp(1_700_000_000), ohlcv={})
+    provider = MockCryptoProvider(Market(frames=[frame]), starting_index=0)
+    timer = IntervalTimer(provider, [BTC], metrics=metrics, catch_up=CatchUp.SKIP, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        await timer.__anext__()
+        await timer.__anext__()  # on time
+        on_time = timer.last_skipped
+        clock.now += 250  # three more candles close while busy
+        await timer.__anext__()
+        return on_time
+
+    assert asyncio.run(run()) == 0
+    assert timer.last_skipped == timer.skipped_total == 3
+    assert metrics.counter("timer_missed_frames_total", catch_up="SKIP").value == 3
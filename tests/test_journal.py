@@ -0,0 +1,113 @@
+import csv
+import io
+import time
+from datetime import timedelta
+from os import listdir, path
+from typing import List
+
+import numpy as np
+
+from conftest import START, MarketFactory
+from models.journal import OutputJournal, market_from_journal, read_journal
+from models.market import Log, LogType, OutputFrame, csv_field
+from models.records import Frame, FunctionPlotRecord, OutputRecord, TransactionRecord
+from models.symbol import Pair
+from models.transaction import OperationEnum
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+
+
+# ETH only shows up at minute 5
+def market_frames(make_market: MarketFactory, count: int) -> List[Frame]:
+    market = make_market({BTC: np.arange(count) + 0.5, ETH: 2.0 * np.arange(count)}, gaps={ETH: range(min(count, 5))}, spread=1.0)
+    return list(market._frames)
+
+
+def output(i: int) -> OutputRecord:
+    timestamp = START + timedelta(minutes=i)
+    transactions = [TransactionRecord(timestamp, OperationEnum.BUY, BTC)] if i % 3 == 0 else []
+    return OutputRecord(timestamp, [], transactions, [FunctionPlotRecord(timestamp, "SMA", float(i), "purple", BTC)])
+
+
+def journal_files(directory: str) -> list:
+    return [path.join(directory, name) for name in sorted(listdir(directory))]
+
+
+def write(directory: str, frames: List[Frame], **options) -> None:
+    with OutputJournal(directory, **options) as journal:
+        for i, frame in enumerate(frames):
+            journal.append(frame, output(i))
+
+
+def test_rotated_files_read_back_in_order(tmp_path, make_market):
+    directory = str(tmp_path)
+    write(directory, market_frames(make_market, 20), batch_size=1, max_bytes=600)
+    files = journal_files(directory)
+    assert len(files) > 1
+
+    frames = list(read_journal(directory))
+    assert [f.timestamp for f, _ in frames] == [START + timedelta(minutes=i) for i in range(20)]
+    assert [len(o.transactions) for _, o in frames] == [1 if i % 3 == 0 else 0 for i in range(20)]
+
+    # A new journal continues after the existing files
+    write(directory, market_frames(make_market, 1))
+    assert len(journal_files(directory)) == len(files) + 1
+
+
+def test_market_from_journal_is_built_in_chunks(tmp_path, make_market):
+    directory = str(tmp_path)
+    written = market_frames(make_market, 10)
+    write(directory, written)
+
+    market = market_from_journal(directory, chunk_size=3)
+    columns = market.columns()
+    assert len(columns) == 10
+    np.testing.assert_array_equal(columns.column(BTC, "close"), np.arange(10) + 0.5)
+    np.testing.assert_array_equal(columns.column(ETH, "close")[:5], [np.nan] * 5)
+    np.testing.assert_array_equal(columns.column(ETH, "close")[5:], 2.0 * np.arange(5, 10))
+
+    listed = market_from_journal(directory, columnar=False)
+    assert [f[0] if isinstance(f, tuple) else f for f in listed._frames] == written
+    assert [f[1].function_plots[0].value for f in listed._frames] == [float(i) for i in range(10)]
+
+
+def test_torn_tail_is_skipped(tmp_path, make_market):
+    directory = str(tmp_path)
+    write(directory, market_frames(make_market, 4))
+    last = journal_files(directory)[-1]
+    with open(last, "a") as f:
+        f.write('{"timestamp": 1704067440, "ohlcv": {"BTC/USDT": [1, 2')
+
+    assert len(list(read_journal(directory))) == 4
+    assert len(market_from_journal(directory).columns()) == 4
+
+
+def test_frames_are_flushed_on_time_without_more_appends(tmp_path, make_market):
+    directory = str(tmp_path)
+    journal = OutputJournal(directory, batch_size=100, flush_interval=0.05)
+    journal.append(market_frames(make_market, 1)[0], output(0))
+
+    deadline = time.monotonic() + 5
+    while not listdir(directory) or not list(read_journal(directory)):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    journal.close()
+    assert len(list(read_journal(directory))) == 1
+
+
+def test_csv_fields_with_separators_are_quoted():
+    assert csv_field("plain") == "plain"
+    assert csv_field("a,b") == '"a,b"'
+    assert csv_field('say "hi"') == '"say ""hi"""'
+    assert csv_field("two\nlines") == '"two\nlines"'
+
+    value = {"note": 'a, "b"', "n": 1}
+    log = Log(timestamp=START, type=LogType.JSON, value=value, symbol=BTC)
+    output_frame = OutputFrame(timestamp=START, logs=[log], transactions=[], function_plots=[])
+
+    header = next(csv.reader([output_frame.csv_header()]))
+    rows = list(csv.reader(io.StringIO("\n".join(output_frame.csv()))))
+    assert len(rows) == 1 and len(rows[0]) == len(header)
+    assert rows[0][header.index("log_value")] == log.value_str()
+    assert rows[0][header.index("log_symbol")] == str(BTC)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from conftest import START
+from models.market import Market
+from models.records import OutputRecord
+from models.symbol import Pair
+
+BTC = Pair.of("BTC", "USDT")
+LENGTH = 30
+
+
+def minute(i: int) -> int:
+    return int((START + timedelta(minutes=i)).timestamp())
+
+
+def timestamps(market: Market) -> List[int]:
+    return market.columns().timestamps().tolist()
+
+
+# Every fifth frame has an output
+def outputs() -> Dict[int, OutputRecord]:
+    return {i: OutputRecord(START + timedelta(minutes=i), [], [], []) for i in range(0, LENGTH, 5)}
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["list", "columnar"])
+def test_window_is_start_inclusive_and_end_exclusive(make_market, columnar):
+    market = make_market({BTC: np.arange(LENGTH)}, columnar=columnar)
+
+    assert timestamps(market.window(START + timedelta(minutes=10), START + timedelta(minutes=15))) == [minute(i) for i in range(10, 15)]
+    # Bounds between frames, as datetimes or unix seconds
+    assert timestamps(market.window(minute(9) + 30, minute(12) + 30)) == [minute(i) for i in range(10, 13)]
+    assert timestamps(market.window(end=START + timedelta(minutes=3))) == [minute(i) for i in range(3)]
+    assert timestamps(market.window(start=START + timedelta(minutes=27))) == [minute(i) for i in range(27, 30)]
+    assert len(market.window(START + timedelta(minutes=20), START + timedelta(minutes=10)).columns()) == 0
+    assert len(market.window(START + timedelta(hours=1)).columns()) == 0
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["list", "columnar"])
+def test_tail_and_at(make_market, columnar):
+    market = make_market({BTC: np.arange(LENGTH)}, minutes=np.arange(LENGTH) * 2, columnar=columnar)
+
+    assert timestamps(market.tail(3)) == [minute(i) for i in (54, 56, 58)]
+    assert len(market.tail(100).columns()) == LENGTH
+
+    # The latest frame at or before the timestamp
+    assert market.at(START + timedelta(minutes=10)).ohlcv[str(BTC)].close == 5.0
+    assert market.at(START + timedelta(minutes=11)).ohlcv[str(BTC)].close == 5.0
+    assert market.at(minute(100)).ohlcv[str(BTC)].close == LENGTH - 1
+    assert market.at(START - timedelta(minutes=1)) is None
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["list", "columnar"])
+def test_slices_keep_their_outputs(make_market, columnar):
+    market = make_market({BTC: np.arange(LENGTH)}, outputs=outputs(), columnar=columnar)
+
+    sliced = market.slice(8, 21)
+    assert timestamps(sliced) == [minute(i) for i in range(8, 21)]
+    with_outputs = [frame for frame in sliced._frames if isinstance(frame, tuple)]
+    assert [output.timestamp for _, output in with_outputs] == [START + timedelta(minutes=i) for i in (10, 15, 20)]
+    assert all(frame.timestamp == output.timestamp for frame, output in with_outputs)
+
+    # A frame with an output is returned without it
+    assert not isinstance(market.at(START + timedelta(minutes=10)), tuple)
+
+
+def test_columnar_views_share_the_markets_arrays(make_market):
+    market = make_market({BTC: np.arange(LENGTH)})
+    window = market.window(START + timedelta(minutes=5), START + timedelta(minutes=25))
+
+    assert window.columnar
+    assert np.shares_memory(window.columns().ohlcv(BTC), market.columns().ohlcv(BTC))
+    assert np.shares_memory(market.tail(5).columns().timestamps(), market.columns().timestamps())
+
+    # Appending to the market doesn't change an existing view
+    market.columns().append(minute(LENGTH), {str(BTC): (30.0, 30.0, 30.0, 30.0, 1.0)})
+    assert len(window.columns()) == 20
+    assert window.columns().column(BTC, "close")[-1] == 24.0
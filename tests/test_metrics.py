@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from metrics.registry import MetricsRegistry
+from metrics.sinks import MemorySink, _label_str
+from models.market import Market, MarketFrame, OutputFrame
+from providers.mock_crypto import MockCryptoProvider
+from strategies.runtime import StrategyRuntime
+from timers.backtest import BacktestTimer
+
+START = datetime(2024, 1, 1)
+
+
+class Clock:
+    now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Echo:
+    async def execute(self, frame: MarketFrame) -> OutputFrame:
+        return OutputFrame(timestamp=frame.timestamp, logs=[], transactions=[], function_plots=[])
+
+
+def market(length: int) -> Market:
+    return Market(frames=[MarketFrame(timestamp=START + timedelta(minutes=i), ohlcv={}) for i in range(length)])
+
+
+def test_backtest_flushes_on_the_interval_and_at_the_end():
+    clock = Clock()
+    sink = MemorySink()
+    metrics = MetricsRegistry(sinks=[sink], flush_interval=10.0, clock=clock)
+    provider = MockCryptoProvider(market(30), starting_index=0)
+
+    async def replay():
+        async for _ in BacktestTimer(provider, metrics=metrics):
+            metrics.counter("frames_total").inc()
+            clock.now += 1.0
+
+    asyncio.run(replay())
+    # Every 10 frames, then once more at the end with the final count
+    assert len(sink.snapshots) == 3
+    assert sink.last["counters"] == [{"name": "frames_total", "labels": {}, "value": 30.0}]
+
+
+def test_runtime_flushes_every_frame_once_due():
+    clock = Clock()
+    sink = MemorySink()
+    metrics = MetricsRegistry(sinks=[sink], flush_interval=0.0, clock=clock)
+    provider = MockCryptoProvider(market(3), starting_index=0)
+    timer = BacktestTimer(provider, metrics=MetricsRegistry())
+    runtime = StrategyRuntime(timer, {"echo": Echo()}, metrics=metrics)
+
+    async def run():
+        async for _ in runtime:
+            pass
+
+    asyncio.run(run())
+    assert len(sink.snapshots) == 3
+
+
+def test_label_str():
+    assert _label_str({}) == ""
+    assert _label_str({"a": "1"}, {"le": "+Inf"}) == '{a="1",le="+Inf"}'
+    assert _label_str({"a": 'x"y'}) == '{a="x\\"y"}'
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from conftest import START
+from models.market import Market
+from models.symbol import Pair
+from providers.mock_crypto import MockCryptoProvider
+from timers.backtest import BacktestTimer
+
+BTC = Pair.of("BTC", "USDT")
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["list", "columnar"])
+def test_history_never_sees_the_current_frame_or_later(make_market, columnar):
+    market = make_market({BTC: np.arange(50)}, columnar=columnar)
+    provider = MockCryptoProvider(market, starting_index=10)
+
+    async def replay():
+        async for frame in BacktestTimer(provider):
+            now = frame.timestamp
+            history = await provider.get_history([BTC], count=20)
+            assert len(history.columns()) == min(20, provider.cursor.index)
+            assert all(f.timestamp < now for f in history._frames)
+
+            ranged = await provider.get_history([BTC], since=START, until=now + timedelta(minutes=30))
+            assert len(ranged.columns()) == provider.cursor.index
+            assert all(f.timestamp < now for f in ranged._frames)
+
+    asyncio.run(replay())
+
+
+def test_history_sees_frames_added_during_the_replay(make_market):
+    feed = make_market({BTC: np.arange(30)}, columnar=False)
+    market = Market(frames=list(feed._frames[:10]))
+    provider = MockCryptoProvider(market, starting_index=5)
+
+    async def replay():
+        seen = 0
+        async for frame in BacktestTimer(provider):
+            # A live feed appending to the market while it is replayed
+            if len(market._frames) < 30:
+                market.add_frame(feed._frames[len(market._frames)])
+
+            history = await provider.get_history([BTC], since=START, until=START + timedelta(days=1))
+            assert [f.timestamp for f in history._frames] == [START + timedelta(minutes=i) for i in range(provider.cursor.index)]
+            seen += 1
+        return seen
+
+    assert asyncio.run(replay()) == 25
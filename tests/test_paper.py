@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import numpy as np
+
+from conftest import START
+from execution.paper import PaperBroker
+from models.symbol import Pair
+from models.transaction import OperationEnum, Transaction
+from wallets.mock_wallet import MockWallet
+
+BTC_USDT = Pair.of("BTC", "USDT")
+BTC_USDC = Pair.of("BTC", "USDC")
+
+
+def transaction(minute: int, pair: Pair, operation: OperationEnum) -> Transaction:
+    return Transaction(timestamp=START + timedelta(minutes=minute), operation=operation, symbol=pair)
+
+
+def test_pairs_sharing_a_base_hold_separate_positions(make_market):
+    frames = make_market({BTC_USDT: [100.0, 110.0], BTC_USDC: [100.0, 110.0]}, volume=1000.0, columnar=False)._frames
+    wallet = MockWallet({"USDT": 1000.0, "USDC": 1000.0})
+    broker = PaperBroker(wallet, fee=0.0, slippage=0.0, order_size=0.5)
+
+    broker.execute(frames[0], [
+        transaction(0, BTC_USDT, OperationEnum.BUY),
+        transaction(0, BTC_USDC, OperationEnum.BUY),
+    ])
+    assert broker.portfolio.position(BTC_USDT) == 5.0
+    assert broker.portfolio.position(BTC_USDC) == 5.0
+    assert wallet.balances["BTC"] == 10.0
+
+    # Selling one pair leaves the other's BTC alone
+    fills = broker.execute(frames[1], [transaction(1, BTC_USDT, OperationEnum.SELL)])
+    assert [fill.quantity for fill in fills] == [5.0]
+    assert broker.portfolio.position(BTC_USDT) == 0.0
+    assert broker.portfolio.position(BTC_USDC) == 5.0
+    assert wallet.balances["BTC"] == 5.0
+    assert wallet.balances["USDT"] == 1050.0
+
+
+def test_pending_buy_counts_as_held(make_market):
+    # No BTC/USDT candle at minute 1
+    frames = make_market({BTC_USDT: [100.0, np.nan, 100.0], BTC_USDC: [100.0] * 3}, volume=10.0, columnar=False)._frames
+    wallet = MockWallet({"USDT": 1000.0})
+    broker = PaperBroker(wallet, fee=0.0, slippage=0.0, max_volume_fraction=0.1, order_size=1.0)
+
+    # 10 BTC to buy, 1 fills per frame
+    broker.execute(frames[0], [transaction(0, BTC_USDT, OperationEnum.BUY)])
+    assert broker.portfolio.position(BTC_USDT) == 1.0
+    assert broker.portfolio.holding(BTC_USDT)
+
+    # No candle for the pair: nothing fills, but the order is still pending
+    broker.execute(frames[1], [])
+    assert BTC_USDT.id in {order.pair.id for order in broker.pending.values()}
+    assert broker.portfolio.holding(BTC_USDT)
+
+    broker.execute(frames[2], [transaction(2, BTC_USDT, OperationEnum.SELL)])
+    assert not broker.portfolio.holding(BTC_USDT)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import numpy as np
+
+from analytics.performance import analyze_fills, analyze_market, positions_from_fills
+from conftest import START
+from execution.paper import Fill, PaperBroker
+from models.symbol import Pair
+from models.transaction import OperationEnum, Transaction
+from wallets.mock_wallet import MockWallet
+
+BTC = Pair.of("BTC", "USDT")
+SOL = Pair.of("SOL", "USDT")
+
+
+def fill(minute: int, operation: OperationEnum, remaining=0.0, price=100.0) -> Fill:
+    return Fill(START + timedelta(minutes=minute), BTC, operation, quantity=1.0, price=price, fee=0.0, remaining=remaining)
+
+
+def test_positions_follow_fills_not_orders(make_market):
+    timestamps = make_market({BTC: [100.0] * 8}).columns().timestamps()
+    fills = [
+        fill(1, OperationEnum.BUY, remaining=2.0),  # partially filled, held already
+        fill(2, OperationEnum.BUY),
+        fill(4, OperationEnum.SELL, remaining=1.0),  # still holding what wasn't sold
+        fill(5, OperationEnum.SELL),
+    ]
+    positions = positions_from_fills(timestamps, [BTC], fills)
+    np.testing.assert_array_equal(positions[0], [0, 1, 1, 1, 1, 0, 0, 0])
+
+
+def test_fills_are_what_the_performance_is_made_of(make_market):
+    prices = make_market({BTC: [100.0, 100.0, 110.0, 121.0, 121.0]})
+    fills = [fill(1, OperationEnum.BUY), fill(3, OperationEnum.SELL, price=121.0)]
+    report = analyze_fills(prices, fills, {"USDT": 100.0}, "USDT")
+    assert report.trades == 1 and report.win_rate == 1.0
+    assert np.isclose(report.total_return, 0.21)
+    np.testing.assert_allclose(report.value, [100.0, 100.0, 110.0, 121.0, 121.0])
+
+
+def test_final_equity_is_the_brokers_equity(make_market):
+    closes = [100.0, 101.0, 99.0, 104.0, 108.0, 103.0, 107.0, 111.0]
+    prices = make_market({BTC: closes})
+    wallet = MockWallet({"USDT": 1000.0})
+    # Candle volumes of 1 cap every fill at 0.5 BTC, so orders fill over several frames
+    broker = PaperBroker(wallet, fee=0.001, slippage=0.001, max_volume_fraction=0.5, order_size=0.1)
+    orders = {1: OperationEnum.BUY, 3: OperationEnum.SELL, 6: OperationEnum.BUY}
+
+    for i, frame in enumerate(prices._frames):
+        timestamp = START + timedelta(minutes=i)
+        transactions = [Transaction(timestamp=timestamp, operation=orders[i], symbol=BTC)] if i in orders else []
+        broker.execute(frame, transactions)
+
+    report = analyze_fills(prices, broker.fills, {"USDT": 1000.0}, "USDT")
+    assert len(broker.fills) > len(orders)
+    assert broker.portfolio.position(BTC) > 0  # the last trip is still open
+    assert np.isclose(report.value[-1], broker.portfolio.equity("USDT"))
+    assert np.isclose(report.total_return, broker.portfolio.equity("USDT") / 1000.0 - 1)
+    assert report.trades == 2
+
+
+def test_symbols_missing_from_the_market_are_skipped(make_market):
+    prices = make_market({BTC: [100.0, 110.0, 121.0]})
+    transactions = [
+        Transaction(timestamp=START, operation=OperationEnum.BUY, symbol=BTC),
+        Transaction(timestamp=START, operation=OperationEnum.BUY, symbol=SOL),
+    ]
+    report = analyze_market(prices, transactions, [BTC, SOL], fee=0.0)
+    assert np.isclose(report.total_return, 0.21)
+    empty = analyze_market(prices, [], [SOL])
+    assert empty.trades == 0 and empty.total_return == 0.0
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import pytest
+
+import models.market
+from conftest import START, MarketFactory
+from models.market import Market
+from models.records import FunctionPlotRecord, OutputRecord, TransactionRecord
+from models.symbol import Pair
+from models.transaction import OperationEnum
+
+BTC = Pair.of("BTC", "USDT")
+LENGTH = 5000
+
+
+def traded_market(make_market: MarketFactory) -> Market:
+    closes = make_market.random_walk([BTC], LENGTH, seed=2)
+
+    outputs = {}
+    for i in range(LENGTH):
+        timestamp = START + timedelta(minutes=i)
+        transactions = []
+        if i % 50 == 0:
+            transactions = [TransactionRecord(timestamp, OperationEnum.BUY if i % 100 == 0 else OperationEnum.SELL, BTC)]
+        outputs[i] = OutputRecord(timestamp, [], transactions, [FunctionPlotRecord(timestamp, "SMA", float(closes[BTC][i]), "purple", BTC)])
+    return make_market(closes, spread=1.0, outputs=outputs)
+
+
+def test_html_plot_is_decimated_with_one_transaction_trace(tmp_path, make_market):
+    filename = str(tmp_path / "plot.html")
+    figure = traded_market(make_market).plot_for_symbol(BTC, display=False, max_points=500, filename=filename)
+
+    traces = {trace.name: trace for trace in figure.data}
+    assert len(traces[str(BTC)].x) <= 500
+    assert len(traces["SMA"].x) <= 500
+    # Every transaction, in a single marker trace
+    assert [trace.name for trace in figure.data].count("Transactions") == 1
+    assert len(traces["Transactions"].x) == LENGTH // 50
+    assert list(traces["Transactions"].marker.color[:2]) == ["green", "red"]
+    assert "Transactions" in (tmp_path / "plot.html").read_text()
+
+
+def test_image_plot_without_kaleido_fails_clearly(tmp_path, monkeypatch, make_market):
+    monkeypatch.setattr(models.market, "find_spec", lambda name: None)
+    with pytest.raises(Exception, match="kaleido"):
+        traded_market(make_market).plot_for_symbol(BTC, display=False, filename=str(tmp_path / "plot.png"))
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from os import listdir
+from typing import List
+
+import numpy as np
+
+from conftest import START, MarketFactory
+from models.market import Log, Market, MarketFrame, OutputFrame
+from models.records import Frame, FunctionPlotRecord, OutputRecord, TransactionRecord
+from models.symbol import Pair
+from models.transaction import OperationEnum
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+
+
+# A market of columns hands out Frame records
+def records(make_market: MarketFactory) -> List[Frame]:
+    return list(make_market({BTC: np.arange(4) + 0.5, ETH: [2.5] * 4}, spread=1.0)._frames)
+
+
+def output(minute: int) -> OutputRecord:
+    timestamp = START + timedelta(minutes=minute)
+    return OutputRecord(
+        timestamp,
+        [Log(timestamp=timestamp, value="a, \"quoted\" log", symbol=BTC)],
+        [TransactionRecord(timestamp, OperationEnum.BUY, BTC, notes="entry")],
+        [FunctionPlotRecord(timestamp, "BTC/USDT SMA", 1.5, "purple", BTC)],
+    )
+
+
+def test_records_round_trip_through_the_models(make_market):
+    frame, out = records(make_market)[3], output(3)
+    assert isinstance(frame, Frame)
+
+    model = frame.to_model()
+    assert isinstance(model, MarketFrame)
+    assert model.ohlcv[str(BTC)].close == 3.5
+    assert Frame.from_model(model) == frame
+
+    output_model = out.to_model()
+    assert isinstance(output_model, OutputFrame)
+    assert output_model.transactions[0].operation is OperationEnum.BUY
+    assert output_model.function_plots[0].symbol == BTC
+    assert OutputRecord.from_model(output_model) == out
+
+
+def test_market_of_records_saves_models_and_imports_records(tmp_path, make_market):
+    expected = records(make_market)
+    frames = [(frame, output(i)) if i % 2 else frame for i, frame in enumerate(expected)]
+    Market(frames=frames).save_to_file(str(tmp_path))
+
+    names = sorted(listdir(tmp_path))
+    assert len([name for name in names if name.endswith(".mf.csv")]) == 4
+    assert len([name for name in names if name.endswith(".of.csv")]) == 2
+
+    # Output frames are written with the pydantic models' CSV format
+    first_output = next(name for name in names if name.endswith(".of.csv"))
+    lines = (tmp_path / first_output).read_text().splitlines()
+    assert lines[0] == output(1).to_model().csv_header()
+    assert lines[1:] == output(1).to_model().csv()
+
+    imported = Market()
+    imported.import_from_file(str(tmp_path))
+    assert all(isinstance(frame, Frame) for frame in imported._frames)
+    assert imported._frames == expected
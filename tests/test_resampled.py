@@ -0,0 +1,56 @@
+import asyncio
+from datetime import timedelta
+from typing import AsyncIterator, List
+
+import numpy as np
+
+from conftest import START
+from models.market import AnyFrame, Market
+from models.resample import resample
+from models.symbol import Pair
+from timers.resampled import ResampledFeed
+
+BTC = Pair.of("BTC", "USDT")
+
+
+class Source:
+    pulled = 0
+
+    def __init__(self, market: Market) -> None:
+        self._frames = iter(list(market._frames))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> AnyFrame:
+        frame = next(self._frames, None)
+        if frame is None:
+            raise StopAsyncIteration
+        self.pulled += 1
+        return frame
+
+
+async def collect(timer: AsyncIterator[AnyFrame]) -> List[AnyFrame]:
+    return [frame async for frame in timer]
+
+
+def test_one_minute_source_feeds_five_and_fifteen_minute_timers(make_market):
+    market = make_market(make_market.random_walk([BTC], 60, seed=3), spread=1.0)
+    source = Source(market)
+    feed = ResampledFeed(source)
+    five, fifteen = feed.timer(5), feed.timer(15)
+
+    async def run():
+        return await asyncio.gather(collect(five), collect(fifteen))
+
+    five_frames, fifteen_frames = asyncio.run(run())
+
+    # Every 1m frame was pulled once, for both timeframes
+    assert source.pulled == 60
+    assert [f.timestamp for f in five_frames] == [START + timedelta(minutes=5 * i) for i in range(12)]
+    assert [f.timestamp for f in fifteen_frames] == [START + timedelta(minutes=15 * i) for i in range(4)]
+
+    for frames, timeframe in [(five_frames, 5), (fifteen_frames, 15)]:
+        expected = resample(market, timeframe).columns().ohlcv(str(BTC))
+        candles = np.array([[getattr(f.ohlcv[str(BTC)], field) for field in ("open", "high", "low", "close", "volume")] for f in frames]).T
+        np.testing.assert_allclose(candles, expected)
@@ -0,0 +1,77 @@
+import asyncio
+from typing import List, Optional
+
+import numpy as np
+
+from conftest import START
+from models.market import Market
+from models.symbol import Pair
+from providers.mock_crypto import MockCryptoProvider
+from providers.shared import SharedProvider
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+
+CLOSES = np.arange(100, dtype=np.float64) + 1
+
+
+class CountingProvider(MockCryptoProvider):
+    counts: List[Optional[int]]
+
+    def __init__(self, market: Market, starting_index: int) -> None:
+        super().__init__(market, starting_index=starting_index)
+        self.counts = []
+
+    async def get_history(self, symbols=[], count=None, since=None, until=None, timeframe_minutes=1) -> Market:
+        self.counts.append(count)
+        return await super().get_history(symbols, count=count, since=since, until=until, timeframe_minutes=timeframe_minutes)
+
+
+def test_history_counts_share_one_request(make_market):
+    provider = CountingProvider(make_market({BTC: CLOSES, ETH: CLOSES * 2}), starting_index=80)
+    shared = SharedProvider(provider)
+
+    async def run():
+        return await asyncio.gather(
+            shared.get_history([BTC], count=5),
+            shared.get_history([ETH], count=20),
+            shared.get_history([BTC, ETH], count=10),
+        )
+
+    short, long, middle = asyncio.run(run())
+    assert provider.counts == [20]
+    assert [len(m.columns()) for m in (short, long, middle)] == [5, 20, 10]
+    # Every caller gets the latest frames, not the first ones of the larger request
+    assert short.columns().timestamps()[-1] == long.columns().timestamps()[-1] == START.timestamp() + 79 * 60
+    np.testing.assert_array_equal(short.columns().column(BTC, "close"), np.arange(76, 81))
+
+
+def test_cached_history_answers_smaller_counts_only(make_market):
+    provider = CountingProvider(make_market({BTC: CLOSES, ETH: CLOSES * 2}), starting_index=80)
+    shared = SharedProvider(provider, ttl=60.0)
+
+    async def run():
+        await shared.get_history([BTC], count=10)
+        smaller = await shared.get_history([BTC], count=3)
+        await shared.get_history([BTC], count=30)
+        return smaller
+
+    smaller = asyncio.run(run())
+    assert provider.counts == [10, 30]
+    assert len(smaller.columns()) == 3
+
+
+def test_results_are_dropped_once_expired(make_market):
+    provider = CountingProvider(make_market({BTC: CLOSES, ETH: CLOSES * 2}), starting_index=80)
+    uncached, shared = SharedProvider(provider, ttl=0), SharedProvider(provider, ttl=0.01)
+
+    async def run():
+        await uncached.get_history([BTC], count=10)
+        assert uncached._results == {}
+
+        await shared.get_history([BTC], count=10)
+        assert len(shared._results) == 1
+        await asyncio.sleep(0.05)
+        assert shared._results == {}
+
+    asyncio.run(run())
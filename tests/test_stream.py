@@ -0,0 +1,50 @@
+import asyncio
+from typing import List
+
+import numpy as np
+
+from conftest import START
+from mock_stream import MockStreamExchange
+from models.market import MarketFrame
+from models.symbol import Pair
+from providers.stream import StreamingProvider
+from timers.stream import StreamTimer
+
+PAIRS = [Pair.of("BTC", "USDT"), Pair.of("ETH", "USDT")]
+
+
+def test_replayed_frames_come_out_closed_and_in_order(make_market):
+    replayed = make_market({pair: np.arange(10) * (j + 1) for j, pair in enumerate(PAIRS)}, spread=1.0, columnar=False)
+
+    async def run() -> List[MarketFrame]:
+        exchange = MockStreamExchange()
+        frames: List[MarketFrame] = []
+        async with StreamingProvider(PAIRS, exchange=exchange, close_timeout=None) as provider:
+            await exchange.replay(replayed)
+            async for frame in StreamTimer(provider):
+                frames.append(frame)
+                if len(frames) == len(replayed._frames) - 1:
+                    break
+        return frames
+
+    frames = asyncio.run(run())
+    # The last candles are never followed by newer ones, so they stay open
+    assert [frame.to_model() for frame in frames] == replayed._frames[:-1]
+
+
+def test_quiet_symbol_is_closed_after_the_timeout():
+    now = [START.timestamp() + 120]
+
+    async def run() -> MarketFrame:
+        exchange = MockStreamExchange()
+        async with StreamingProvider(PAIRS, exchange=exchange, close_timeout=1.0, clock=lambda: now[0]) as provider:
+            timestamp = int(START.timestamp() * 1000)
+            exchange.publish(PAIRS[0], [timestamp, 1.0, 2.0, 0.5, 1.5, 10.0])
+            exchange.publish(PAIRS[0], [timestamp + 60_000, 1.5, 1.5, 1.5, 1.5, 0.0])
+            exchange.publish(PAIRS[1], [timestamp, 3.0, 3.0, 3.0, 3.0, 1.0])
+            return await asyncio.wait_for(provider.next_frame(), timeout=5.0)
+
+    frame = asyncio.run(run())
+    assert frame.timestamp == START
+    assert set(frame.ohlcv) == {str(pair) for pair in PAIRS}
+    assert frame.ohlcv[str(PAIRS[0])].close == 1.5
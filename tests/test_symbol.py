@@ -0,0 +1,26 @@
+import pickle
+
+import pytest
+
+from models.symbol import Pair, Ticker, VenuePair, parse_symbol
+
+
+def test_ticker_cannot_pass_for_a_pair():
+    with pytest.raises(Exception, match="Pair"):
+        Ticker("BTC/USDT")
+    with pytest.raises(Exception):
+        Ticker.of("ETH/BTC")
+    assert Pair.of("BTC", "USDT") != Ticker.of("BTCUSDT")
+
+
+def test_parse_symbol_round_trips():
+    for symbol in [Pair.of("BTC", "USDT"), VenuePair.of("kraken", "BTC", "USDT"), Ticker.of("AAPL")]:
+        parsed = parse_symbol(str(symbol))
+        assert parsed is symbol
+        assert type(parsed) is type(symbol)
+
+
+def test_interned_symbols_survive_pickling():
+    pair = Pair.of("SOL", "USDT")
+    copy = pickle.loads(pickle.dumps(pair))
+    assert copy == pair and hash(copy) == hash(pair) and copy.id == pair.id
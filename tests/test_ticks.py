@@ -0,0 +1,157 @@
+import asyncio
+from typing import List
+
+import numpy as np
+import pytest
+
+from conftest import START
+from metrics.registry import MetricsRegistry
+from mock_exchange import MockExchange
+from models.market import MarketFrame
+from models.symbol import Pair
+from models.ticks import TRADE, TickBatch, TickCandleBuilder, TickStore, book_dtype, merge_streams
+from providers.ccxt import CCXTProvider
+from timers.tick_replay import TickCandleTimer, TickReplayTimer
+
+BTC = Pair.of("BTC", "USDT")
+ETH = Pair.of("ETH", "USDT")
+T0 = int(START.timestamp()) * 1000
+
+
+# `timestamps` in ms after START; prices count up from `first`
+def trades(timestamps: List[int], first=100.0, amount=1.0) -> np.ndarray:
+    events = np.zeros(len(timestamps), dtype=TRADE)
+    events["timestamp"] = np.array(timestamps) + T0
+    events["price"] = first + np.arange(len(timestamps))
+    events["amount"] = amount
+    events["side"] = 1
+    return events
+
+
+def blocks(events: np.ndarray, size: int) -> List[np.ndarray]:
+    return [events[i:i + size] for i in range(0, len(events), size)]
+
+
+def test_store_writes_chunks_and_reads_ranges_back(tmp_path):
+    events = trades(list(range(0, 25_000, 1000)))
+    store = TickStore(str(tmp_path), chunk_size=10)
+    for block in blocks(events, 7):
+        store.append(BTC, block)
+    assert store.count(BTC) == 25
+    store.flush()
+
+    # Reopened from disk: two full chunks and the flushed remainder
+    reopened = TickStore(str(tmp_path), chunk_size=10)
+    assert reopened.symbols() == [str(BTC)]
+    assert [len(chunk) for chunk in reopened.read(BTC)] == [10, 10, 5]
+    np.testing.assert_array_equal(np.concatenate(list(reopened.read(BTC))), events)
+
+    # [since, until), across a chunk boundary
+    ranged = np.concatenate(list(reopened.read(BTC, since=T0 + 8000, until=T0 + 12_000)))
+    assert (ranged["timestamp"] - T0).tolist() == [8000, 9000, 10_000, 11_000]
+    assert list(reopened.read(BTC, since=T0 + 100_000)) == []
+
+    with pytest.raises(Exception, match="time order"):
+        reopened.append(BTC, trades([0]))
+    with pytest.raises(Exception, match="expected"):
+        TickStore(str(tmp_path), dtype=book_dtype(5))
+
+
+def test_merged_streams_are_in_time_order_with_their_symbols():
+    btc = trades([0, 10, 20, 30, 40, 50, 60], first=100.0)
+    eth = trades([5, 10, 25, 26, 27, 70], first=200.0)
+
+    batches = list(merge_streams({str(BTC): iter(blocks(btc, 2)), str(ETH): iter(blocks(eth, 4))}, batch_size=3))
+    merged = np.concatenate([batch.events for batch in batches])
+    owners = np.concatenate([batch.symbol for batch in batches])
+
+    assert all(len(batch) <= 2 * 3 for batch in batches)
+    assert (merged["timestamp"] - T0).tolist() == [0, 5, 10, 10, 20, 25, 26, 27, 30, 40, 50, 60, 70]
+    np.testing.assert_array_equal(merged["price"][owners == 0], btc["price"])
+    np.testing.assert_array_equal(merged["price"][owners == 1], eth["price"])
+
+
+def test_candles_are_built_from_trades():
+    builder = TickCandleBuilder(timeframe_minutes=1)
+    # BTC trades in minutes 0 and 1, ETH only in minute 0
+    btc = trades([0, 20_000, 40_000, 60_000, 70_000], first=100.0, amount=0.5)
+    btc["price"][1] = 90.0
+    eth = trades([30_000], first=200.0)
+    events = np.concatenate([btc[:3], eth, btc[3:]])
+    owners = np.array([0, 0, 0, 1, 0, 0], dtype=np.int32)
+    order = np.argsort(events["timestamp"], kind="stable")
+
+    frames = builder.add(TickBatch([str(BTC), str(ETH)], owners[order], events[order])) + builder.flush()
+    assert [frame.timestamp for frame in frames] == [START, START.replace(minute=1)]
+    first = frames[0].ohlcv[str(BTC)]
+    assert (first.open, first.high, first.low, first.close, first.volume) == (100.0, 102.0, 90.0, 102.0, 1.5)
+    assert frames[0].ohlcv[str(ETH)].close == 200.0
+    assert set(frames[1].ohlcv) == {str(BTC)}
+    assert frames[1].ohlcv[str(BTC)].close == 104.0
+
+
+def test_book_snapshots_make_mid_price_candles_closed_on_flush():
+    builder = TickCandleBuilder()
+    books = np.zeros(2, dtype=book_dtype(1))
+    books["timestamp"] = [T0, T0 + 1000]
+    books["bid_price"] = [[99.0], [101.0]]
+    books["ask_price"] = [[101.0], [103.0]]
+    assert builder.add(TickBatch([str(BTC)], np.zeros(2, dtype=np.int32), books)) == []
+
+    [frame] = builder.flush()
+    candle = frame.ohlcv[str(BTC)]
+    assert (candle.open, candle.high, candle.low, candle.close, candle.volume) == (100.0, 102.0, 100.0, 102.0, 0.0)
+    assert builder.flush() == []
+
+
+def test_replay_timers_turn_stored_ticks_into_frames(tmp_path):
+    store = TickStore(str(tmp_path), chunk_size=4)
+    store.append(BTC, trades(list(range(0, 300_000, 15_000)), first=100.0))
+    store.append(ETH, trades(list(range(5_000, 300_000, 30_000)), first=200.0))
+    store.flush()
+
+    # Minutes 1 to 3; bounds in unix seconds like the other timers
+    since, until = int(START.timestamp()) + 60, int(START.timestamp()) + 240
+
+    async def run():
+        batches = [batch async for batch in TickReplayTimer(store, [BTC, ETH], since=since, until=until, batch_size=2)]
+        frames: List[MarketFrame] = [frame async for frame in TickCandleTimer(TickReplayTimer(store, [BTC, ETH], since=since, until=until), 1)]
+        return batches, frames
+
+    batches, frames = asyncio.run(run())
+    timestamps = np.concatenate([batch.events["timestamp"] for batch in batches])
+    assert np.all(np.diff(timestamps) >= 0)
+    assert timestamps.min() >= since * 1000 and timestamps.max() < until * 1000
+    assert len(timestamps) == 12 + 6
+
+    assert [int(frame.timestamp.timestamp()) for frame in frames] == [since, since + 60, since + 120]
+    assert [frame.ohlcv[str(BTC)].open for frame in frames] == [104.0, 108.0, 112.0]
+    assert [frame.ohlcv[str(BTC)].volume for frame in frames] == [4.0, 4.0, 4.0]
+    assert [frame.ohlcv[str(ETH)].volume for frame in frames] == [2.0, 2.0, 2.0]
+
+
+def test_ccxt_trades_and_order_book(make_market):
+    exchange = MockExchange("mock", make_market({BTC: [1.0]}))
+    exchange.trades[str(BTC)] = [
+        {"timestamp": T0 + 2000, "price": 101.0, "amount": 0.5, "side": "sell"},
+        {"timestamp": T0, "price": 100.0, "amount": 1.0, "side": "buy"},
+        {"timestamp": T0 + 1000, "price": 100.5, "amount": 2.0, "side": None},
+    ]
+    exchange.books[str(BTC)] = {"timestamp": T0, "bids": [[99.0, 1.0], [98.0, 2.0]], "asks": [[101.0, 3.0]]}
+    provider = CCXTProvider(apikey="", secret="", exchange=exchange, metrics=MetricsRegistry())
+
+    async def run():
+        return await provider.get_trades(BTC), await provider.get_trades(BTC, since=START, limit=1), await provider.get_order_book(BTC, depth=3)
+
+    events, limited, book = asyncio.run(run())
+    assert events.dtype == TRADE
+    # Sorted by time, whatever order the exchange answered in
+    assert (events["timestamp"] - T0).tolist() == [0, 1000, 2000]
+    assert events["side"].tolist() == [1, 0, -1]
+    assert events["amount"].tolist() == [1.0, 2.0, 0.5]
+    assert len(limited) == 1
+
+    assert book.dtype == book_dtype(3) and len(book) == 1
+    assert book["timestamp"][0] == T0
+    np.testing.assert_array_equal(book["bid_price"][0], [99.0, 98.0, np.nan])
+    np.testing.assert_array_equal(book["ask_amount"][0], [3.0, np.nan, np.nan])